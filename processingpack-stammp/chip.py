@@ -8,11 +8,17 @@
 # python_version    : 3.7
 
 # General Python
+import os
 import gc
 import warnings
-from copy import deepcopy
-from collections import namedtuple
+from functools import partial, lru_cache
+from contextlib import nullcontext
+from collections import namedtuple, OrderedDict
 from processingpack import experiment
+from processingpack import raster
+from processingpack import engine
+from processingpack import parallel
+from processingpack.writer import BackgroundWriter
 
 import numpy as np
 import numpy.ma as ma
@@ -55,6 +61,8 @@ class ChipImage:
         self.pinlist = pinlist
         self.attrs = attrs
         self.stamps = None
+        self.stampstack = None
+        self.geometry = None
         self.centers = []
 
         if not isinstance(corners, type(namedtuple)):
@@ -67,7 +75,9 @@ class ChipImage:
 
     def __grid(self, altCorners = None):
         """
-        Calculates chamber center positions interpolating the corner positions
+        Gets the chamber center positions (interpolated from the corner positions), stamp slices,
+        and pinlist identifiers from the device geometry, which is shared by all ChipImages of 
+        the device.
 
         Arguments:
             (tuple | namedtuple) corners: cornerpositions of the form 
@@ -78,63 +88,87 @@ class ChipImage:
 
         """
 
+        corners = self.corners
         if altCorners:
-            if not isinstance(altCorners, namedtuple):
-                corners = experiment.Device._corners(altCorners)
-            else:
-                corners = altCorners
-            self.centers = self.quadrilateralInterp(altCorners, self.device.dims)
-        self.centers = self.quadrilateralInterp(self.corners, self.device.dims)
+            corners = altCorners
+        self.geometry = self.device.geometry(corners, self.stampWidth, self.pinlist)
+        self.centers = self.geometry.centers
 
 
-    def stamp(self):
+    def stamp(self, stampstack = None):
         """
         Wrapper class for chamber stamping. Stamps ChipImage using calculated center positions.
 
         Arguments:
-            None
+            (np.ndarray | None) stampstack: stamp stack already read from the raster (see
+                ChipImage.read_stamps), e.g. prefetched on another thread
 
         Returns:
             None
         
         """
-        self.stamps = self._stamp()
+        self.stamps = self._stamp(stampstack)
 
 
-    def _stamp(self):
+    def _stamp(self, stampstack = None):
         """
-        Stamps the chipImage using calculated center positions.
+        Stamps the chipImage using calculated center positions. Only the stamp windows are read
+        from the raster (see raster.read_windowed).
         
+        Arguments:
+            (np.ndarray | None) stampstack: stamp stack already read from the raster
+
+        Returns:
+            (StampGrid) the grid of stamps
+
+        """
+
+        if stampstack is None:
+            stampstack = self.read_stamps()
+        self.stampstack = stampstack
+        return StampGrid(self.stampstack, self.geometry)
+
+
+    def read_stamps(self):
+        """
+        Reads the stamp stack of the ChipImage from its raster, without modifying the ChipImage
+        (so it may run on a prefetching thread).
+
         Arguments:
             None
 
         Returns:
-            (np.ndarray) an array of Stamp objects
+            (np.ndarray) stamp stack of shape (dims.x, dims.y, width, width)
 
         """
 
-        pinlistFeatureTitle = 'MutantID'
-        img = skimage.io.imread(self.data_ref)
-        def makeSlice(center, width):
-            s = (slice(center[1]-(width//2), center[1]+(width//2)), slice(center[0]-(width//2), center[0]+(width//2)))
-            return s
-        
-        slices = np.apply_along_axis(makeSlice, 2, self.centers, *[(self.stampWidth)])
-        def stampImg(slices, img):
-            return img[tuple(slices)]
-        
-        xdim = self.device.dims.x
-        ydim = self.device.dims.y
-        imgstamps = np.apply_along_axis(stampImg, 2, slices, *[(img)])
-        indices = np.array([[x,y] for x in range(0, xdim) for y in range(0, ydim)]).reshape(xdim, ydim, 2)
+        img = raster.read_windowed(self.data_ref, self.centers, self.stampWidth)
+        return ChipImage.stampStack(img, self.centers, self.stampWidth)
+
 
-        a = np.empty((xdim, ydim), dtype = np.object) 
-        for x, y in indices.reshape((xdim*ydim, 2)):
-            stamp = imgstamps[x, y]
-            center = self.centers[x, y]
-            s = tuple(slices[x, y])
-            a[x, y] = Stamp(stamp, center, s, (x+1,y+1), self.pinlist.loc[x+1, y+1][pinlistFeatureTitle])
-        return a
+    @staticmethod
+    def stampStack(img, centers, width):
+        """
+        Cuts the stamps for all chamber centers out of the image in a single vectorized gather.
+        Each Stamp holds a view into the returned stack, so stamping copies the pixels only once.
+
+        Arguments:
+            (np.ndarray) img: 2-D rastered chip image
+            (np.ndarray) centers: array of chamber (x, y) center positions of shape (dims.x, dims.y, 2)
+            (int) width: stamp width (pixels)
+
+        Returns:
+            (np.ndarray) a contiguous stamp stack of shape (dims.x, dims.y, width, width)
+
+        """
+
+        half = width//2
+        offsets = np.arange(-half, half)
+        rows = centers[..., 1, np.newaxis] + offsets # (dims.x, dims.y, width)
+        cols = centers[..., 0, np.newaxis] + offsets
+        if rows.min() < 0 or cols.min() < 0 or rows.max() >= img.shape[0] or cols.max() >= img.shape[1]:
+            raise ValueError('Stamps extend past the image border. Check the corner positions.')
+        return img[rows[..., :, np.newaxis], cols[..., np.newaxis, :]]
 
 
     @staticmethod
@@ -180,53 +214,108 @@ class ChipImage:
 
         """
 
-        dims = self.device.dims
-        indices = [(i, j) for i in range(dims.x) for j in range(dims.y)]
-        for i in indices:
-            x, y = i
-            s = self.stamps[x, y]
-            t = target.stamps[x, y]
-            if features == 'chamber':
-                t.defineChamber(s.chamber.center, s.chamber.radius)
-            elif features == 'button':
-                t.defineButton(s.button.center, s.button.disk_radius, s.button.annulus_radii)
-            elif features == 'all':
-                t.defineChamber(s.chamber.center, s.chamber.radius)
-                t.defineButton(s.button.center, s.button.disk_radius, s.button.annulus_radii)
-            else:
-                raise ValueError('Invalid feature name. Choices are "chamber", "button", or "all".')
+        target.stamps.copy_features(self.stamps, features)
+        target.stamps.quantify(features)
 
 
-    def findChambers(self):
+    def set_mapped(self, reference, features, summaries):
+        """
+        Defines the ChipImage features from a reference and their precomputed summaries (as
+        returned by map_rasters), without stamping. The stamps are read on demand (see restamp).
+
+        Arguments:
+            (ChipImage | featuremap.FeatureMap) reference: the mapped reference
+            (str) features: mapped features ('chamber', 'button', 'all')
+            (dict) summaries: summary arrays, keyed by feature type (see StampGrid.summaries)
+
+        Returns:
+            None
+
+        """
+
+        if self.stamps is None:
+            self.stamps = StampGrid(None, self.geometry)
+        self.stamps.copy_features(reference.stamps, features)
+        self.stamps.set_summaries(summaries)
+
+
+    def feature_map(self, digest = None):
+        """
+        Exports the found chamber and button geometry of the ChipImage as a serializable
+        FeatureMap, which can be used in place of the ChipImage as a mapping reference.
+
+        Arguments:
+            (str | None) digest: content hash of the image file, if already computed (see 
+                featuremap.content_hash)
+
+        Returns:
+            (featuremap.FeatureMap) the feature map
+
+        """
+
+        from processingpack.featuremap import FeatureMap
+        return FeatureMap.from_chip(self, digest = digest)
+
+
+    def findChambers(self, workers = None):
         """
         Performs chamber finding for each of the Stamps in the ChipImage. Uses a Hough transform.
         
         Arguments:
-            None
+            (int | None) workers: number of worker processes to split the stamps across. If None,
+                the stamps are processed in this process.
 
         Returns:
             None
 
         """
 
-        for c in self.stamps.flatten():
-            c.findChamber()
+        g = self.stamps
+        finder = partial(engine.find_chambers, **Stamp.chamberSearchParams())
+        stack = g.data.reshape((-1,) + g.data.shape[2:])
+        if workers:
+            centers, radii, found = parallel.map_stamps(stack, finder, workers)
+        else:
+            centers, radii, found = finder(stack)
+        for x, y in np.argwhere(~found.reshape(g.shape)):
+            warnings.warn('No chamber border found for chamber {}'.format(str((x+1, y+1))))
+        g.set_chambers(centers.reshape(g.shape + (2,)), radii.reshape(g.shape), ~found.reshape(g.shape))
+        g.quantify('chamber')
 
 
-    def findButtons(self):
+    def findButtons(self, batched = True, workers = None):
         """
-        Performs button finding for each of the Stamps in the ChipImage. Uses a Hough transform.
+        Performs button finding for each of the Stamps in the ChipImage. Uses a grid search.
+        In batched mode, the grid search runs vectorized over the whole stamp stack and the
+        button features of every chamber are set at once.
 
         Arguments:
-            None
+            (bool) batched: flag to search the whole stamp stack at once (otherwise stamp by stamp)
+            (int | None) workers: number of worker processes to split the (batched) search across.
+                If None, the search runs in this process.
 
         Returns:
             None
 
         """
 
-        for c in tqdm(self.stamps.flatten(), desc = 'Finding Buttons'):
-            c.findButton()
+        if not batched:
+            for c in tqdm(self.stamps.flatten(), desc = 'Finding Buttons'):
+                c.findButton()
+            return
+
+        g = self.stamps
+        params = Stamp.buttonSearchParams
+        stack = g.data.reshape((-1,) + g.data.shape[2:])
+        if workers:
+            centers, found = parallel.map_stamps(stack, partial(engine.find_buttons, **params), workers)
+        else:
+            centers, found = engine.find_buttons(stack, **params)
+        for x, y in np.argwhere(~found.reshape(g.shape)):
+            warnings.warn('No intensity observed for chamber {}'.format((x+1, y+1)))
+        radius = params['radius']
+        g.set_buttons(centers.reshape(g.shape + (2,)), radius, (radius, radius*2))
+        g.quantify('button')
 
 
     def summarize(self):
@@ -237,22 +326,34 @@ class ChipImage:
             None
 
         Returns:
-            (pd.DataFrame) a Pandas DataFrame summarizing the ChipImage feature parameters
+            (pd.DataFrame) a Pandas DataFrame summarizing the ChipImage feature parameters (see 
+                StampGrid.summary_columns for the schema)
+
+        """
+        
+        return self.stamps.summarize()
+
+
+    def summary_columns(self):
+        """
+        Summarizes the ChipImage feature parameters as typed column arrays (see 
+        StampGrid.summary_columns).
+        
+        Arguments:
+            None
+
+        Returns:
+            (OrderedDict) summary column arrays, keyed by column name
 
         """
         
-        records = {}
-        for s in self.stamps.flatten():
-            records[s.index] = s.summarize()
-        s = pd.DataFrame.from_dict(records, orient = 'index').sort_index()
-        s.index.rename(['x', 'y'], inplace = True)
-        return s
+        return self.stamps.summary_columns()
 
 
     def _delete_stamps(self):
         """
         Deletes and forces garbage collection on the image data contained in the ChipImage stamps.
-        Data include the stamp data, the chamber and/or button stamp data, and the feature masks.
+        The feature geometry and summaries are kept, so the ChipImage can still be summarized.
 
         Arguments:
             None
@@ -262,57 +363,48 @@ class ChipImage:
         
         """
 
-        for s in self.stamps.flatten():
-            del(s.data)
-            s.data = None
-            if s.chamber:
-                del(s.chamber.stampdata)
-                del(s.chamber.disk)
-                s.chamber.disk = None
-                s.chamber.stampdata = None
-            if s.button:
-                del(s.button.stampdata)
-                del(s.chamber.disk)
-                del(s.chamber.annulus)
-                s.chamber.disk = None
-                s.chamber.annulus = None
-                s.button.stampdata = None
+        self.stamps.data = None
+        self.stampstack = None
         gc.collect()
 
 
-    def summary_image(self, stamptype):
+    def restamp(self):
         """
-        Generates a "deflated" chip image as a numpy ndarray. Returns the
-        the ChipImage stamps concatenated into a single array (image)
+        Re-reads the stamp data of a ChipImage whose stamps were deleted (see _delete_stamps),
+        keeping its feature geometry and summaries.
 
         Arguments:
-            (str) stamptype: parameterized feature type to draw onto stamp ('chamber' | 'button')
-        
+            None
+
         Returns:
-            (np.ndarray) a 2-D numpy ndarray of the concatenated stamps 
+            None
 
         """
 
-        return ChipImage.stitch2D(self._summary_image_arr(stamptype))
+        self.stampstack = self.read_stamps()
+        self.stamps.data = self.stampstack
 
 
-    def _summary_image_arr(self, stamptype):
+    def summary_image(self, stamptype):
         """
-        Generates a 2-d numpy array of stamp images (2-d numpy arrays), indexed by their chip indices. 
+        Generates a "deflated" chip image as a numpy ndarray. Returns the
+        the ChipImage stamps concatenated into a single array (image)
 
         Arguments:
             (str) stamptype: parameterized feature type to draw onto stamp ('chamber' | 'button')
         
         Returns:
-            (np.ndarray) a 2-D numpy array of stamp data (ndarrays)
-        """
+            (np.ndarray) a 2-D numpy ndarray of the concatenated stamps 
 
-        tiles = self.stamps.flatten()
-        stampdims = tiles[0].summary_stamp(stamptype).shape
+        """
 
-        arrShape = [self.device.dims[0], self.device.dims[1], stampdims[0], stampdims[1]]
-        r = np.array([s.summary_stamp(stamptype) for s in tiles]).reshape(*arrShape)
-        return r
+        released = self.stamps.data is None
+        if released:
+            self.restamp()
+        image = render_stamps(self.stamps.data, self.stamps.annotations(stamptype))
+        if released:
+            self._delete_stamps()
+        return image
 
 
     @staticmethod
@@ -333,68 +425,662 @@ class ChipImage:
         fullStitched = np.concatenate(rowsStitched, axis = 0) #Stitch cols
         return fullStitched
 
-    def repo_dump(self, stamptype, target_root, title, as_ubyte = False):
+    def repo_dump(self, stamptype, target_root, title, as_ubyte = False, writer = None):
         """
         Saves the stamps of the ChipImage to the target directory as a stamp repository (repo).
+        The annotated stamps are rendered together (see render_stamps) and written on a 
+        background writer.
 
         Arguments:
             (str) stamptype:parameterized feature type to draw onto stamp ('chamber' | 'button') 
             (str) target_root: repo directory, or directory in which to instantiate repo
             (str) title: stem of filename
             (bool) as_ubyte: flag to save stamp as uint8 image
+            (writer.BackgroundWriter | None) writer: background writer to write the stamps on. If
+                None, the stamps are written on a writer of the call, before returning.
 
         Returns:
             None
 
         """
         # saves each stamp to a repo of the form root->id->index
-        import os
-        from pathlib import Path
-        for stamp in self.stamps.flatten():
-            sid = stamp.id
-            index = '{}_{}'.format(*stamp.index)
-            s = stamp.summary_stamp(stamptype) #uint8 for export (space saving)
-            if as_ubyte:
-                s = skimage.img_as_ubyte(s)
-            target = Path(os.path.join(target_root, sid, index, '{}.png'.format(title)))
-            os.makedirs(target.parent, exist_ok = True)
-            skimage.io.imsave(target, s)
+        released = self.stamps.data is None
+        if released:
+            self.restamp()
+        image = render_stamps(self.stamps.data, self.stamps.annotations(stamptype))
+        h, w = self.stamps.data.shape[2] + 2, self.stamps.data.shape[3] + 2 # annotated stamp
+        with (BackgroundWriter() if writer is None else nullcontext(writer)) as stampwriter:
+            for (x, y), sid in np.ndenumerate(self.stamps.ids):
+                target = os.path.join(target_root, sid, '{}_{}'.format(x+1, y+1), '{}.png'.format(title))
+                stampwriter.submit(write_stamp, target, image[y*h:(y+1)*h, x*w:(x+1)*w], as_ubyte)
+        if released:
+            self._delete_stamps()
 
     def __str__(self):
         return ('IDs: {}, Device: {}, ImageReference: {}'.format(self.ids, str((self.device.setup, self.device.dname)), self.data_ref))
 
 
 
+def apply_feature_map(reference, raster_path, features = 'all', columns = False, geometry = None):
+    """
+    Quantifies a rastered chip image with the feature geometry of a reference, without cutting
+    stamps or generating Stamp, Chamber, or Button objects: the feature pixels are sampled 
+    straight from the raster, at the chamber lattice of the image. Equivalent to stamping a 
+    ChipImage of the raster (with that lattice), mapping the reference features to it (see 
+    ChipImage.mapto), and summarizing it.
+
+    Arguments:
+        (ChipImage | featuremap.FeatureMap) reference: reference image (with found button and/or 
+            chamber features), or its feature map
+        (str | pathlib.Path) raster_path: path of the rastered image file
+        (str) features: features to quantify ('chamber', 'button', 'all')
+        (bool) columns: whether to return the summary as typed column arrays (see 
+            StampGrid.summary_columns) rather than a DataFrame
+        (experiment.DeviceGeometry | None) geometry: chamber lattice of the image (e.g., 
+            ChipImage.geometry). If None, the image is sampled at the reference lattice.
+
+    Returns:
+        (pd.DataFrame | OrderedDict) summary of the chip features (see ChipImage.summarize)
+
+    """
+
+    grid = _quantify_raster(reference.stamps, raster_path, features, geometry)
+    if columns:
+        return grid.summary_columns()
+    return grid.summarize()
+
+
+def map_rasters(reference, raster_paths, features = 'all', workers = 1, geometries = None, cube = None):
+    """
+    Quantifies rastered chip images with the feature geometry of a reference on a process pool
+    (see apply_feature_map). The reference feature geometry is sent to each worker once, and
+    only the feature summaries are returned.
+
+    Arguments:
+        (ChipImage | featuremap.FeatureMap) reference: reference image (with found button and/or 
+            chamber features), or its feature map
+        (list) raster_paths: paths of the rastered image files
+        (str) features: features to quantify ('chamber', 'button', 'all')
+        (int) workers: number of worker processes
+        (list | None) geometries: chamber lattice of each image (see apply_feature_map). If 
+            None, the images are sampled at the reference lattice.
+        (str | pathlib.Path | None) cube: path of a stamp cube (see stampstore.StampCube) to 
+            write the stamps of each image to, at its position in raster_paths. The workers 
+            write to the cube as they quantify, so each raster is read once.
+
+    Yields:
+        (dict) the feature summaries of each image (see StampGrid.summaries), in order
+
+    """
+
+    raster_paths = list(raster_paths)
+    if geometries is None:
+        geometries = [None]*len(raster_paths)
+    grid = StampGrid(None, reference.stamps.geometry)
+    grid.copy_features(reference.stamps, features)
+    items = list(zip(range(len(raster_paths)), raster_paths, geometries))
+    for summaries in parallel.map_items(_raster_summaries, items, workers, (grid, features, cube)):
+        yield summaries
+
+
+def _raster_summaries(context, item):
+    grid, features, cube = context
+    index, raster_path, geometry = item
+    if geometry is None:
+        geometry = grid.geometry
+    img = raster.read_windowed(raster_path, geometry.centers, geometry.width)
+    if cube is not None:
+        from processingpack.stampstore import StampCube
+        stampcube = StampCube(cube, 'r+')
+        stampcube.write(index, ChipImage.stampStack(img, geometry.centers, geometry.width))
+        stampcube.flush()
+    return _quantify_image(grid, img, features, geometry).summaries(features)
+
+
+def _quantify_raster(reference, raster_path, features, geometry = None):
+    """
+    Quantifies a rastered chip image with the feature geometry of a reference StampGrid.
+
+    Arguments:
+        (StampGrid) reference: grid with the reference feature geometry
+        (str | pathlib.Path) raster_path: path of the rastered image file
+        (str) features: features to quantify ('chamber', 'button', 'all')
+        (experiment.DeviceGeometry | None) geometry: chamber lattice of the image. If None, the
+            image is sampled at the reference lattice.
+
+    Returns:
+        (StampGrid) a quantified grid, without stamp data
+
+    """
+
+    if geometry is None:
+        geometry = reference.geometry
+    img = raster.read_windowed(raster_path, geometry.centers, geometry.width)
+    return _quantify_image(reference, img, features, geometry)
+
+
+def _quantify_image(reference, img, features, geometry):
+    """
+    Quantifies the stamp windows of a read chip image (see raster.read_windowed) with the 
+    feature geometry of a reference StampGrid.
+
+    Arguments:
+        (StampGrid) reference: grid with the reference feature geometry
+        (np.ndarray) img: 2-D rastered chip image
+        (str) features: features to quantify ('chamber', 'button', 'all')
+        (experiment.DeviceGeometry) geometry: chamber lattice of the image
+
+    Returns:
+        (StampGrid) a quantified grid, without stamp data
+
+    """
+
+    windows = raster.StampWindows(img, geometry.slices[..., 0].reshape(-1, 2), geometry.width)
+    grid = StampGrid(None, geometry)
+    grid.copy_features(reference, features)
+    grid.quantify(features, stack = windows)
+    return grid
+
+
+def summary_frame(columns):
+    """
+    Builds a summary DataFrame indexed by the chip indices (x, y) from summary column arrays 
+    (see StampGrid.summary_columns).
+
+    Arguments:
+        (dict) columns: summary column arrays, keyed by column name (including 'x' and 'y')
+
+    Returns:
+        (pd.DataFrame) the summary
+
+    """
+
+    columns = OrderedDict(columns)
+    index = pd.MultiIndex.from_arrays([columns.pop('x'), columns.pop('y')], names = ['x', 'y'])
+    return pd.DataFrame(columns, index = index, copy = False)
+
+
+def concat_summaries(summaries, identifiers, indexer):
+    """
+    Concatenates the summary columns of images of a device (see StampGrid.summary_columns) 
+    into series summary columns, ordered by chip index and then by image, with a column of 
+    the image identifiers. Each column is allocated once and filled image by image (no 
+    sorting). Features missing from an image are NaN.
+
+    Arguments:
+        (list) summaries: summary column arrays of each image
+        (list) identifiers: image identifiers
+        (str) indexer: name of the identifier column
+
+    Returns:
+        (OrderedDict) series summary column arrays, keyed by column name
+
+    """
+
+    if not summaries:
+        raise ValueError('No summaries to concatenate')
+    dtypes = OrderedDict()
+    for summary in summaries:
+        for k, v in summary.items():
+            dtypes.setdefault(k, v.dtype)
+    rows = len(summaries[0]['x'])
+    columns = OrderedDict()
+    for k, dtype in dtypes.items():
+        column = np.full((rows, len(summaries)), np.nan) if dtype.kind == 'f' else np.empty((rows, len(summaries)), dtype)
+        for j, summary in enumerate(summaries):
+            if k in summary:
+                column[:, j] = summary[k]
+        columns[k] = column.ravel()
+    columns[indexer] = np.tile(np.asarray(identifiers), rows)
+    return columns
+
+
+
+class StampGrid:
+    def __init__(self, data, geometry):
+        """
+        Constructor for a StampGrid object. A StampGrid stores the stamps of a ChipImage and their
+        chamber and button features as typed arrays (struct-of-arrays) indexed by the zero-based
+        chip indices (x, y). Stamp objects are lightweight views onto a grid position, created
+        only when requested.
+
+        Arguments:
+            (np.ndarray | None) data: stamp stack of shape (dims.x, dims.y, width, width)
+            (experiment.DeviceGeometry) geometry: the (shared) device geometry
+
+        Returns:
+            None
+
+        """
+
+        self.data = data
+        self.geometry = geometry
+        self.width = geometry.width
+        self.shape = tuple(geometry.centers.shape[:2])
+        self.centers = geometry.centers
+        self.ids = geometry.ids
+        self.slices = geometry.slices # [[rowstart, rowstop], [colstart, colstop]]
+
+        self.chamber_defined = np.zeros(self.shape, dtype = bool)
+        self.chamber_blank = np.zeros(self.shape, dtype = bool)
+        self.chamber_centers = np.zeros(self.shape + (2,), dtype = np.int32)
+        self.chamber_radii = np.zeros(self.shape, dtype = np.int32)
+        self.chamber_summary = {f: np.full(self.shape, np.nan) for f in Chamber.features}
+
+        self.button_defined = np.zeros(self.shape, dtype = bool)
+        self.button_blank = np.zeros(self.shape, dtype = bool)
+        self.button_centers = np.zeros(self.shape + (2,), dtype = np.int32)
+        self.button_radii = np.zeros(self.shape, dtype = np.int32)
+        self.button_annulus_radii = np.zeros(self.shape + (2,), dtype = np.int32)
+        self.button_summary = {f: np.full(self.shape, np.nan) for f in Button.features}
+
+
+    def __getitem__(self, index):
+        x, y = index
+        return Stamp(self, x, y)
+
+
+    def flatten(self):
+        """
+        Generates the Stamps of the grid in chip index order (x-major).
+
+        Arguments:
+            None
+
+        Returns:
+            (list) list of Stamp objects
+
+        """
+
+        return [Stamp(self, x, y) for x in range(self.shape[0]) for y in range(self.shape[1])]
+
+
+    def set_chamber(self, x, y, chamber):
+        """
+        Stores the geometry and summary of a Chamber at a grid position.
+
+        Arguments:
+            (int) x: zero-based x index
+            (int) y: zero-based y index
+            (Chamber | None) chamber: chamber to store (None clears the chamber)
+
+        Returns:
+            None
+
+        """
+
+        self.chamber_defined[x, y] = chamber is not None
+        self.chamber_blank[x, y] = chamber is not None and chamber.blankFlag
+        if chamber is None or chamber.blankFlag:
+            for f in Chamber.features:
+                self.chamber_summary[f][x, y] = np.nan
+            return
+        self.chamber_centers[x, y] = chamber.center
+        self.chamber_radii[x, y] = chamber.radius
+        for f, v in chamber.summary.items():
+            self.chamber_summary[f][x, y] = v
+
+
+    def set_button(self, x, y, button):
+        """
+        Stores the geometry and summary of a Button at a grid position.
+
+        Arguments:
+            (int) x: zero-based x index
+            (int) y: zero-based y index
+            (Button | None) button: button to store (None clears the button)
+
+        Returns:
+            None
+
+        """
+
+        self.button_defined[x, y] = button is not None
+        self.button_blank[x, y] = button is not None and button.blankFlag
+        if button is None or button.blankFlag:
+            for f in Button.features:
+                self.button_summary[f][x, y] = np.nan
+            return
+        self.button_centers[x, y] = button.center
+        self.button_radii[x, y] = button.disk_radius
+        self.button_annulus_radii[x, y] = button.annulus_radii
+        for f, v in button.summary.items():
+            self.button_summary[f][x, y] = v
+
+
+    def set_chambers(self, centers, radii, blank = False):
+        """
+        Defines the chamber geometry of every grid position at once. Summaries are not computed; 
+        see StampGrid.quantify().
+
+        Arguments:
+            (np.ndarray) centers: chamber (x, y) centers of shape (dims.x, dims.y, 2)
+            (int | np.ndarray) radii: chamber radii (scalar or of shape (dims.x, dims.y))
+            (bool | np.ndarray) blank: blank (failed) chamber flags (scalar or of shape (dims.x, dims.y))
+
+        Returns:
+            None
+
+        """
+
+        self.chamber_defined[:] = True
+        self.chamber_blank[:] = blank
+        self.chamber_centers[:] = centers
+        self.chamber_radii[:] = radii
+
+
+    def set_buttons(self, centers, radii, annulus_radii):
+        """
+        Defines the button geometry of every grid position at once. Summaries are not computed; 
+        see StampGrid.quantify().
+
+        Arguments:
+            (np.ndarray) centers: button (x, y) centers of shape (dims.x, dims.y, 2)
+            (int | np.ndarray) radii: button radii (scalar or of shape (dims.x, dims.y))
+            (tuple | np.ndarray) annulus_radii: annulus (inner, outer) radii, (broadcastable to) 
+                shape (dims.x, dims.y, 2)
+
+        Returns:
+            None
+
+        """
+
+        self.button_defined[:] = True
+        self.button_blank[:] = False
+        self.button_centers[:] = centers
+        self.button_radii[:] = radii
+        self.button_annulus_radii[:] = annulus_radii
+
+
+    def copy_features(self, other, features = 'all'):
+        """
+        Copies the chamber and/or button geometry of another StampGrid onto this grid. Summaries
+        are not copied; see StampGrid.quantify().
+
+        Arguments:
+            (StampGrid) other: the source grid
+            (str) features: features to copy ('chamber', 'button', 'all')
+
+        Returns:
+            None
+
+        """
+
+        if features not in ('chamber', 'button', 'all'):
+            raise ValueError('Invalid feature name. Choices are "chamber", "button", or "all".')
+        if other.shape != self.shape:
+            raise ValueError('Feature grid of shape {} cannot be mapped to grid of shape {}'.format(other.shape, self.shape))
+        if features in ('chamber', 'all'):
+            for attr in ('chamber_defined', 'chamber_blank', 'chamber_centers', 'chamber_radii'):
+                setattr(self, attr, getattr(other, attr).copy())
+        if features in ('button', 'all'):
+            for attr in ('button_defined', 'button_blank', 'button_centers', 'button_radii', 'button_annulus_radii'):
+                setattr(self, attr, getattr(other, attr).copy())
+
+
+    def summaries(self, features = 'all'):
+        """
+        Gets the chamber and/or button summary arrays of the grid.
+
+        Arguments:
+            (str) features: features ('chamber', 'button', 'all')
+
+        Returns:
+            (dict) summary arrays, keyed by feature type ('chamber', 'button')
+
+        """
+
+        kinds = ('chamber', 'button') if features == 'all' else (features,)
+        return {k: getattr(self, '{}_summary'.format(k)) for k in kinds}
+
+
+    def set_summaries(self, summaries):
+        """
+        Sets the chamber and/or button summary arrays of the grid (see StampGrid.summaries).
+
+        Arguments:
+            (dict) summaries: summary arrays, keyed by feature type ('chamber', 'button')
+
+        Returns:
+            None
+
+        """
+
+        for k, summary in summaries.items():
+            setattr(self, '{}_summary'.format(k), summary)
+
+
+    def quantify(self, features = 'all', stack = None):
+        """
+        (Re)computes the chamber and/or button summaries from the stamp data and the stored
+        feature geometry, for all stamps at once (see engine.region_statistics). The button
+        annulus is taken from the button radius to the stored outer annulus radius; the stored
+        annulus radii are left unchanged.
+
+        Arguments:
+            (str) features: features to quantify ('chamber', 'button', 'all')
+            (np.ndarray | raster.StampWindows | None) stack: stamp stack of shape 
+                (dims.x*dims.y, width, width) in x-major order to quantify, if not the grid data
+
+        Returns:
+            None
+
+        """
+
+        if stack is None:
+            stack = self.data.reshape((-1,) + self.data.shape[2:])
+        if features in ('chamber', 'all'):
+            summary = {f: np.full(self.shape, np.nan) for f in Chamber.features}
+            quantified = (self.chamber_defined & ~self.chamber_blank).ravel()
+            index = np.flatnonzero(quantified)
+            centers = self.chamber_centers.reshape(-1, 2)[index]
+            radii = self.chamber_radii.ravel()[index]
+            _, sums, medians, stds = engine.disk_statistics(stack, index, centers, radii)
+            columns = [np.trunc(medians), sums, np.trunc(stds), centers[:, 0], centers[:, 1], radii]
+            for f, column in zip(Chamber.features, columns):
+                summary[f].ravel()[index] = column
+            self.chamber_summary = summary
+        if features in ('button', 'all'):
+            summary = {f: np.full(self.shape, np.nan) for f in Button.features}
+            quantified = (self.button_defined & ~self.button_blank).ravel()
+            index = np.flatnonzero(quantified)
+            centers = self.button_centers.reshape(-1, 2)[index]
+            radii = self.button_radii.ravel()[index]
+            annulus_radii = np.stack((radii, self.button_annulus_radii.reshape(-1, 2)[index, 1]), axis = 1) # the annulus is bound by the disk
+            diskCounts, diskSums, diskMedians, diskStds = engine.disk_statistics(stack, index, centers, radii)
+            annCounts, annSums, annMedians, annStds = engine.annulus_statistics(stack, index, centers, annulus_radii)
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                annNormed = np.trunc(annSums / (annCounts / diskCounts))
+            columns = [np.trunc(diskMedians), diskSums, diskSums - annNormed, np.trunc(diskStds), 
+                centers[:, 0], centers[:, 1], radii, np.trunc(annMedians), annNormed, np.trunc(annStds), 
+                annulus_radii[:, 0], annulus_radii[:, 1]]
+            for f, column in zip(Button.features, columns):
+                summary[f].ravel()[index] = column
+            self.button_summary = summary
+
+
+    def summary_columns(self):
+        """
+        Summarizes the chamber, button, and stamp features of the grid as typed column arrays, 
+        one row per stamp in chip index (x-major) order. The summary schema is:
+
+            x, y (int32): one-based chip indices
+            Chamber.features (float64): chamber features, if any chamber is defined (NaN where 
+                blank or undefined)
+            Button.features (float64): button features, if any button is defined (NaN where 
+                blank or undefined)
+            xslice_start, xslice_stop, yslice_start, yslice_stop (int32): stamp bounds in the raster
+            id (object): MutantID
+
+        Arguments:
+            None
+
+        Returns:
+            (OrderedDict) summary column arrays, keyed by column name
+
+        """
+
+        xs, ys = np.indices(self.shape, dtype = np.int32)
+        columns = OrderedDict([('x', xs.ravel()+1), ('y', ys.ravel()+1)])
+        if self.chamber_defined.any():
+            columns.update((f, v.ravel().astype(np.float64)) for f, v in self.chamber_summary.items())
+        if self.button_defined.any():
+            columns.update((f, v.ravel().astype(np.float64)) for f, v in self.button_summary.items())
+        slices = self.slices.reshape(-1, 2, 2).astype(np.int32)
+        for i, axis in enumerate(('xslice', 'yslice')):
+            columns['{}_start'.format(axis)] = slices[:, i, 0]
+            columns['{}_stop'.format(axis)] = slices[:, i, 1]
+        columns['id'] = self.ids.ravel()
+        return columns
+
+
+    def annotations(self, stamptype):
+        """
+        Gets the annotations of the summary stamps of the grid (see Stamp.summary_stamp), from 
+        the feature summaries.
+
+        Arguments:
+            (str) stamptype: parameterized feature type to draw onto stamp ('chamber' | 'button')
+
+        Returns:
+            (list) (circles, index, val) of each stamp, in chip index (x-major) order (see 
+                annotateStamp)
+
+        """
+
+        if stamptype not in ('chamber', 'button'):
+            raise ValueError('Invalid stamp type. Valid values are "chamber" or "button"') 
+        undefined = np.argwhere(~getattr(self, '{}_defined'.format(stamptype)))
+        if len(undefined):
+            raise ValueError('No {} defined for stamp {}'.format(stamptype, tuple(int(i) for i in undefined[0] + 1)))
+        columns = self.summary_columns()
+        features = Chamber.features if stamptype == 'chamber' else Button.features
+        rows = zip(*[columns[f].tolist() for f in features])
+        annotations = []
+        for x, y, mid, row in zip(columns['x'].tolist(), columns['y'].tolist(), columns['id'], rows):
+            circles, val = stamp_overlay(stamptype, dict(zip(features, row)), (x, y))
+            annotations.append((circles, '{}.{} | {}'.format(x, y, mid), val))
+        return annotations
+
+
+    def summarize(self):
+        """
+        Summarizes the chamber, button, and stamp features of the grid as a Pandas DataFrame
+        indexed by the chip indices (x, y) (see StampGrid.summary_columns for the schema).
+
+        Arguments:
+            None
+
+        Returns:
+            (pd.DataFrame) summary of the grid features
+
+        """
+
+        return summary_frame(self.summary_columns())
+
+
+
 class Stamp:
-    
+    __slots__ = ('grid', 'x', 'y')
+
     chamberrad = 33
     outerchamberbound = 5
     circlePara1Index = 50
     circlePara2Index = 40
+    buttonSearchParams = {'searchSpacing': 7, 'radius': 15, 'tileWidth': 110, 'tileHeight': 110,
+                          'refiningRange': 7, 'minRadius': 9, 'stdCutoff': 0.9, 'boundingInsetRatio': 0.3}
     
-    def __init__(self, img, center, slice, index, id):
+    def __init__(self, grid, x, y):
         """
-        Constructor for a Stamp object, which contains feature data and parameters and permits
-        feature finding.
+        Constructor for a Stamp object, a lightweight view onto a StampGrid position, which
+        exposes the stamp data and features and permits feature finding.
 
         Arguments:
-            (np.ndarray) img:
-            (tuple) center
-            (tuple) slice
-            (tuple) index
-            (str | int) id:
+            (StampGrid) grid: the grid holding the stamp
+            (int) x: zero-based x index
+            (int) y: zero-based y index
         
         Returns:
             None
         
         """
 
-        self.data = img #the actual stamp data
-        self.index = index
-        self.slice = slice
-        self.id = id
-        self.chamber = None
-        self.button = None
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+
+    @property
+    def data(self):
+        if self.grid.data is None:
+            return None
+        return self.grid.data[self.x, self.y] #the actual stamp data
+
+
+    @property
+    def index(self):
+        return (self.x+1, self.y+1)
+
+
+    @property
+    def center(self):
+        return self.grid.centers[self.x, self.y]
+
+
+    @property
+    def slice(self):
+        (r0, r1), (c0, c1) = self.grid.slices[self.x, self.y]
+        return (slice(r0, r1), slice(c0, c1))
+
+
+    @property
+    def id(self):
+        return self.grid.ids[self.x, self.y]
+
+
+    @property
+    def chamber(self):
+        """
+        The stamp Chamber, generated from the grid geometry and summary on request (None if 
+        undefined)
+        """
+
+        g, x, y = self.grid, self.x, self.y
+        if not g.chamber_defined[x, y]:
+            return None
+        if g.chamber_blank[x, y]:
+            return Chamber.BlankChamber()
+        center = tuple(int(i) for i in g.chamber_centers[x, y])
+        summary = {f: v[x, y] for f, v in g.chamber_summary.items()}
+        return Chamber(self.data, None, center, int(g.chamber_radii[x, y]), summary = summary)
+
+
+    @chamber.setter
+    def chamber(self, chamber):
+        self.grid.set_chamber(self.x, self.y, chamber)
+
+
+    @property
+    def button(self):
+        """
+        The stamp Button, generated from the grid geometry and summary on request (None if 
+        undefined)
+        """
+
+        g, x, y = self.grid, self.x, self.y
+        if not g.button_defined[x, y]:
+            return None
+        if g.button_blank[x, y]:
+            return Button.BlankButton()
+        center = tuple(int(i) for i in g.button_centers[x, y])
+        annulus_radii = (int(g.button_radii[x, y]), int(g.button_annulus_radii[x, y, 1])) # as quantified
+        summary = {f: v[x, y] for f, v in g.button_summary.items()}
+        return Button(self.data, None, None, center, int(g.button_radii[x, y]), annulus_radii, summary = summary)
+
+
+    @button.setter
+    def button(self, button):
+        self.grid.set_button(self.x, self.y, button)
 
 
     def defineChamber(self, center, radius):
@@ -413,8 +1099,7 @@ class Stamp:
         if center != center:
             self.chamber = Chamber.BlankChamber()
         else:
-            p = Stamp.circularSubsection(self.data, center, radius)
-            self.chamber = Chamber(self.data, p['mask'], p['center'], p['radius'])
+            self.chamber = Chamber(self.data, None, center, int(radius))
 
 
     def defineButton(self, center, radius, annulus_radii):
@@ -432,13 +1117,8 @@ class Stamp:
 
         """
         
-        b = Stamp.circularSubsection(self.data, center, radius) 
-        o =  Stamp.circularSubsection(self.data, center, annulus_radii[1]) #The circles can extend past the edge of the image
-
-        b_mask = b['mask']
-        o_mask = o['mask']
-        annulus_mask = ~(o_mask^b_mask)
-        self.button = Button(self.data, b_mask, annulus_mask, b['center'], b['radius'], (b['radius'], b['radius']))
+        annulus_radii = (int(radius), int(annulus_radii[1])) #The circles can extend past the edge of the image
+        self.button = Button(self.data, None, None, center, int(radius), annulus_radii)
 
     
     def summarize(self):
@@ -453,14 +1133,15 @@ class Stamp:
 
         """
 
+        g, x, y = self.grid, self.x, self.y
         c_r = {}
         b_r = {}
-        if self.chamber:
-            c_r = self.chamber.summary
-        if self.button:
-            b_r = self.button.summary
-        stampInfo = {'xslice': (self.slice[0].start, self.slice[0].stop),
-                     'yslice': (self.slice[1].start, self.slice[1].stop),
+        if g.chamber_defined[x, y]:
+            c_r = {f: v[x, y] for f, v in g.chamber_summary.items()}
+        if g.button_defined[x, y]:
+            b_r = {f: v[x, y] for f, v in g.button_summary.items()}
+        stampInfo = {'xslice_start': self.slice[0].start, 'xslice_stop': self.slice[0].stop,
+                     'yslice_start': self.slice[1].start, 'yslice_stop': self.slice[1].stop,
                      'id': self.id}
         return {**c_r, **b_r, **stampInfo}
     
@@ -477,25 +1158,17 @@ class Stamp:
         
         """
         # stamptype: ('chamber', 'button')
-        if stamptype == 'chamber':
-            circles = [[self.chamber.radius, self.chamber.center]]
-            index = '{}.{} | {}'.format(self.index[0], self.index[1], self.id)
-            return annotateStamp(self.data, circles, index, '')
-        elif stamptype == 'button':
-            circles = [[self.button.disk_radius, self.button.center],
-                        [self.button.annulus_radii[1], self.button.center]]
-            index = '{}.{} | {}'.format(self.index[0], self.index[1], self.id)
-            val = '{}, {}'.format(int(self.button.summary['summed_button_BGsub']), int(self.button.summary['summed_button_annulus_normed']))
-            return annotateStamp(self.data, circles, index, val)
-        else:
-            raise ValueError('Invalid stamp type. Valid values are "chamber" or "button"') 
+        index = '{}.{} | {}'.format(self.index[0], self.index[1], self.id)
+        circles, val = stamp_overlay(stamptype, self.summarize(), self.index)
+        return annotateStamp(self.data, circles, index, val)
 
 
     @staticmethod
     def circularSubsection(img, center, radius):
         """
         Given an image stamp, chamber/button center position and radius, returns the raw and 
-        analyzed chamber/button pixel values for that chamber/button. Uses a mask.
+        analyzed chamber/button pixel values for that chamber/button. The disk pixels are taken
+        from the cached disk offsets (see engine.disk_offsets), without rasterizing.
         
         Arguments:
             (np.ndarray) image: 
@@ -507,78 +1180,76 @@ class Stamp:
         
         """
 
-        imageCopy = img.copy()
-        mask = np.zeros(imageCopy.shape)
-        
-        cv2.circle(mask, center, radius, 1, -1) # Warning: MODIFIES mask IN PLACE!!
-        mask = mask.astype(np.bool)
-        
-        insert = np.where(mask)
-        intensities = img[insert]
+        insert = engine.disk_indices(center, radius, img.shape)
+        intensities = np.take(img, insert)
         
-        return {'mask': ~mask, 'intensities': intensities, 'center': center, 'radius': int(radius)}
+        return {'mask': engine.indices_mask(insert, img.shape), 'intensities': intensities, 'center': center, 'radius': int(radius)}
 
 
-    def findChamber(self):
+    @staticmethod
+    def annularSubsection(img, center, radii):
         """
-        Uses Hough transform to find a chamber.
+        Given an image stamp, button center position and annulus radii, returns the raw annulus
+        pixel values and mask. The annulus pixels are taken from the cached annulus offsets
+        (see engine.annulus_offsets).
         
         Arguments:
-            (np.ndarray) imageCopy: chamber stamp image.
+            (np.ndarray) image: 
+            (tuple) center: x,y center location of the image
+            (tuple) radii: inner and outer radii of the annulus (innerrad, outerrad)
         
         Returns:
-            (dict) optimizedSpotParams: optimal found chamber border parameters
+            (dict) annularSubsection features
         
         """
 
-        chamberRadius = Stamp.chamberrad
-        outerChamberBound = Stamp.outerchamberbound
+        insert = engine.annulus_indices(center, radii, img.shape)
+        intensities = np.take(img, insert)
+        radii = (int(radii[0]), int(radii[1]))
+
+        return {'mask': engine.indices_mask(insert, img.shape), 'intensities': intensities, 'center': center, 'radii': radii}
 
-        img = self.data
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore") # Will throw warning due to precision loss
-            cimg = skimage.img_as_ubyte(img, force_copy = True);
-        
-        # searchRadii
-        minRad = chamberRadius
-        maxRad = minRad + outerChamberBound
 
-        # find circles
-        circles = cv2.HoughCircles(cimg,cv2.HOUGH_GRADIENT,2,10,param1=self.circlePara1Index,param2=self.circlePara2Index, minRadius=minRad, maxRadius=maxRad)
+    def findChamber(self):
+        """
+        Uses Hough transform to find a chamber (see engine.find_chamber).
         
-        circlePara1Index = self.circlePara1Index
-        # If no circles found, loosen gradient threshold
-        while type(circles) is not np.ndarray and circlePara1Index > 5:
-            circles = cv2.HoughCircles(cimg,cv2.HOUGH_GRADIENT,2,10,param1=circlePara1Index, param2=self.circlePara2Index, minRadius=minRad+1, maxRadius=maxRad+2)
-            circlePara1Index -= 1
+        Arguments:
+            None
         
-        # If still none found, return a blank chamber (failed)
-        if not np.any(circles): 
+        Returns:
+            None
+        
+        """
+
+        result = engine.find_chamber(self.data, **Stamp.chamberSearchParams())
+        
+        # If none found, define a blank chamber (failed)
+        if result is None:
             m = 'No chamber border found for chamber {}'.format(str(self.index))
             warnings.warn(m)
             self.chamber = Chamber.BlankChamber()
             return
         
-        # Else, round the resulting circle params
-        circles = np.around(circles)
-        
-        # Then select circle of highest summed I from those found
-        bestCircle = None
-        bestIntensity = 0
-        for i in circles[0,:]:
-            if len(circles[0,:]) == 1: 
-                bestCircle = i
-                break
-            #pick the set of circles that maximizes intensity inside of it (may have ties)
-            circleResultsSum = np.sum(Stamp.circularSubsection(cimg, (int(i[0]), int(i[1])), i[2])['intensities'])
-            if circleResultsSum > bestIntensity: 
-                bestIntensity = circleResultsSum
-                bestCircle = i
+        center, radius = result
+        self.defineChamber(center, radius)
+
+
+    @classmethod
+    def chamberSearchParams(cls):
+        """
+        Gets the chamber finding parameters (see engine.find_chamber).
         
-        # Calculate the final parameters
-        p = Stamp.circularSubsection(img, (int(bestCircle[0]), int(bestCircle[1])), bestCircle[2])
-        self.chamber = Chamber(img, p['mask'], p['center'], p['radius'])
+        Arguments:
+            None
+
+        Returns:
+            (dict) chamber finding parameters
+
+        """
 
+        return {'chamberRadius': cls.chamberrad, 'outerChamberBound': cls.outerchamberbound,
+                'param1': cls.circlePara1Index, 'param2': cls.circlePara2Index}
 
 
     def findButton(self):
@@ -588,102 +1259,29 @@ class Stamp:
         neighborhood. Then, fits the radius and re-fits the centerposition after each decrease in radius.
         Terminates when either the minRadius is reached or finds a bright circle with small standard deviation
         within the found circle border falls below specified threshold.
+        The candidate disk sums are evaluated on summed-area tables (see engine.find_button).
         
         Arguments:
             None
 
         Returns:
-            (dict) bestSpotParams: {'mask': ~mask, 'intensities': intensities, 'center': center, 'radius': int(radius)}
+            None
         
         """
 
-        ######## DEFAULTS ########
-        searchSpacing = 7
-        radius = 15
-        tileWidth = 110
-        tileHeight = 110
-        refiningRange = 7
-        minRadius = 9
-        stdCutoff = 0.9
-        boundingInsetRatio = 0.3
-        ###########################
-
         imagestamp = self.data
-        
-        maxI = 0
-        bestSpotParams = None
-        fitRadius = radius
+        radius = Stamp.buttonSearchParams['radius']
         localBGRadius = radius *2
 
-        boundingInset = int(tileWidth*boundingInsetRatio)
+        center, found = engine.find_button(imagestamp, **Stamp.buttonSearchParams)
 
-        #Crude initial fit of center position (sparse initial serach grid, entire image stamp) by maximizing summed intensity
-        for xIndex in range(boundingInset, tileWidth-boundingInset, searchSpacing):
-            for yIndex in range(boundingInset, tileHeight-boundingInset, searchSpacing):
-                features = Stamp.circularSubsection(imagestamp, (xIndex, yIndex), fitRadius)
-                summedI = np.nansum(features['intensities'])
-                if summedI > maxI: 
-                    maxI = deepcopy(summedI)
-                    bestSpotParams = deepcopy(features)
-        
-        #If the image is perfectly black in the bounding region, it's necessary to just pick the center position as a placeholder
-        if not bestSpotParams:
+        #If the image is perfectly black in the bounding region, the center position is just a placeholder
+        if not found:
             warnmsg = 'No intensity observed for chamber {}'.format(self.index)
             warnings.warn(warnmsg)
-            bestSpotParams = deepcopy(Stamp.circularSubsection(imagestamp, (int(tileWidth/2), int(tileHeight/2)), fitRadius))
-            buttonBound = Stamp.circularSubsection(imagestamp, bestSpotParams['center'], radius) 
-            outerBound =  Stamp.circularSubsection(imagestamp, bestSpotParams['center'], localBGRadius) #The circles can extend past the edge of the image
-            b_mask = buttonBound['mask']
-            o_mask = outerBound['mask']
-            annulus_mask = ~(o_mask^b_mask)
-            self.button = Button(imagestamp, b_mask, annulus_mask, buttonBound['center'], buttonBound['radius'], (buttonBound['radius'], outerBound['radius']))
-            return
 
-        # Fine-tuning center position (dense local array for search grid) by maximizing summed intensity
-        for xIncrement in np.linspace(bestSpotParams['center'][0]-refiningRange, bestSpotParams['center'][0]+refiningRange, num = 2*refiningRange, dtype = int):
-            for yIncrement in np.linspace(bestSpotParams['center'][1]-refiningRange, bestSpotParams['center'][1]+refiningRange, num = 2*refiningRange, dtype = int):
-                features = Stamp.circularSubsection(imagestamp, (xIncrement, yIncrement), fitRadius)
-                summedI = np.nansum(features['intensities'])
-                if summedI > maxI:
-                    maxI = deepcopy(summedI)
-                    bestSpotParams = deepcopy(features)
-
-        refStdDev = np.nanstd(bestSpotParams['intensities'])
-
-        #Refines center position by optimizing radius via watershed method
-        while bestSpotParams['radius'] > minRadius:
-            fitRadius -= 1
-            
-            maxIAtRadius = 0
-            bestParamsAtRadius = bestSpotParams
-            
-            for xIncrement in np.linspace(bestParamsAtRadius['center'][0]-refiningRange, bestParamsAtRadius['center'][0]+refiningRange, num = 2*refiningRange, dtype = int):
-                for yIncrement in np.linspace(bestParamsAtRadius['center'][1]-refiningRange, bestParamsAtRadius['center'][1]+refiningRange, num = 2*refiningRange, dtype = int):
-                    features = Stamp.circularSubsection(imagestamp, (xIncrement, yIncrement), fitRadius)
-                    summedI = np.nansum(features['intensities'])
-                    if summedI > maxIAtRadius: 
-                        maxIAtRadius = deepcopy(summedI)
-                        bestParamsAtRadius = deepcopy(features)
-            #If the radius has shrunk the optimal circle to w/in bright bounds, stop the fitting and use that circle center)
-            if np.nanstd(bestParamsAtRadius['intensities']) < stdCutoff*refStdDev:
-                bestSpotParams = Stamp.circularSubsection(imagestamp, bestParamsAtRadius['center'], radius)
-                break
-            else:
-                maxI = deepcopy(maxIAtRadius)
-                bestSpotParams = deepcopy(bestParamsAtRadius)
-        
-
-        #If radius fitting didn't work, just go with the parameters from before    
-        buttonBound = Stamp.circularSubsection(imagestamp, bestSpotParams['center'], radius) 
-        outerBound =  Stamp.circularSubsection(imagestamp, bestSpotParams['center'], localBGRadius) #The circles can extend past the edge of the image
-
-        b_mask = buttonBound['mask']
-        o_mask = outerBound['mask']
-        annulus_mask = ~(o_mask^b_mask)
-        
-        self.button = Button(imagestamp, b_mask, annulus_mask, buttonBound['center'], buttonBound['radius'], (buttonBound['radius'], outerBound['radius']))
+        self.defineButton(center, radius, (radius, localBGRadius))
 
-    
 
     def __str__(self):
         return ('Stamp| ID:{}, Index:{}'.format(self.id, self.index))
@@ -695,16 +1293,22 @@ class Stamp:
 
 
 class Chamber:
-    def __init__(self, stampdata, disk, center, radius, empty = False):
+    features = ['median_chamber', 'sum_chamber', 'std_chamber', 
+                    'x_center_chamber', 'y_center_chamber', 'radius_chamber']
+
+    def __init__(self, stampdata, disk, center, radius, empty = False, summary = None):
         """
-        Constructor for a Chamber object
+        Constructor for a Chamber object. Only the chamber geometry and summary are stored; the
+        disk mask and intensities are generated from the stamp data when requested.
 
         Arguments:
-            (np.ndarray) stampdata: the original stamp data
-            (np.ndarray) disk: a boolean mask for the stampdata FALSE within the found chamber
+            (np.ndarray | None) stampdata: the original stamp data (None if released)
+            (np.ndarray | None) disk: a boolean mask for the stampdata FALSE within the found 
+                chamber. If None, generated from the center and radius when requested.
             (tuple) center: chamber center coordinates, with respect to stampdata coord. system
             (int) radius: chamber radius
             (bool) empty: flag for empty chamber
+            (dict | None) summary: precomputed chamber summary (see Chamber.summarize)
 
         Returns:
             None
@@ -713,11 +1317,22 @@ class Chamber:
 
         self.blankFlag = empty
         self.stampdata = stampdata # uint16 ndarray
-        self.disk = disk  # a mask
-        self.disk_intensities = ma.compressed(ma.array(stampdata, mask = disk))
+        self._disk = disk  # a mask
         self.center = center
         self.radius = radius
-        self.summary = self.summarize()
+        self.summary = summary if summary is not None else self.summarize()
+
+
+    @property
+    def disk(self):
+        if self._disk is None:
+            self._disk = Stamp.circularSubsection(_stampdata(self), self.center, self.radius)['mask']
+        return self._disk
+
+
+    @property
+    def disk_intensities(self):
+        return ma.compressed(self.get_disk())
 
 
     def get_disk(self):
@@ -732,7 +1347,7 @@ class Chamber:
 
         """
 
-        return ma.array(self.stampdata, mask = self.disk)
+        return ma.array(_stampdata(self), mask = self.disk)
 
 
     def summarize(self):
@@ -747,8 +1362,7 @@ class Chamber:
         
         """
 
-        features = ['median_chamber', 'sum_chamber', 'std_chamber', 
-                        'x_center_chamber', 'y_center_chamber', 'radius_chamber']
+        features = Chamber.features
         
         if self.blankFlag:
             return dict(zip(features, list(np.full(len(features), np.nan))))
@@ -774,20 +1388,29 @@ class Chamber:
 
 class Button:
     localBG_Margin = 10
+    features_disk = ['median_button', 'summed_button', 'summed_button_BGsub', 'std_button', 'x_button_center', 
+                'y_button_center', 'radius_button_disk']
+    features_ann = ['median_button_annulus', 'summed_button_annulus_normed', 'std_button_annulus_localBG', 
+                        'inner_radius_button_annulus', 'outer_radius_button_annulus']
+    features = features_disk + features_ann
 
-    def __init__(self, stampdata, disk, annulus, center, disk_radius, annulus_radii, empty = False):
+    def __init__(self, stampdata, disk, annulus, center, disk_radius, annulus_radii, empty = False, summary = None):
         """
-        Constructor for a Button object
+        Constructor for a Button object. Only the button geometry and summary are stored; the
+        disk and annulus masks and intensities are generated from the stamp data when requested.
 
         Arguments:
-            (np.ndarray) stampdata: the original stamp data
-            (np.ndarray) disk: a boolean mask for the stampdata FALSE within the found chamber
-            (np.ndarray) annulus: a boolean mask for the stampdata FALSE within the button annulus 
-                (local background)
+            (np.ndarray | None) stampdata: the original stamp data (None if released)
+            (np.ndarray | None) disk: a boolean mask for the stampdata FALSE within the found 
+                button. If None, generated from the center and radius when requested.
+            (np.ndarray | None) annulus: a boolean mask for the stampdata FALSE within the button 
+                annulus (local background). If None, generated from the center and radii when 
+                requested.
             (tuple) center: chamber center coordinates, with respect to stampdata coord. system
             (int) disk_radius: button radius
             (tuple) annulus radii: inner and outer radii of the annulus (innerrad, outerrad)
             (bool) empty: flag for empty button
+            (dict | None) summary: precomputed button summary (see Button.summarize)
 
         Returns:
             None
@@ -796,20 +1419,46 @@ class Button:
 
         self.blankFlag = empty
         self.stampdata = stampdata  # uint16 ndarray
-        self.disk = disk # a mask
-        self.disk_intensities = ma.compressed(self.get_disk())
-        self.annulus = annulus # a mask
-        self.annulus_intensities = ma.compressed(self.get_annulus())
-        try:
-            self.annulus_to_disk_ratio =  len(self.annulus_intensities) / len(self.disk_intensities)
-        except:
-            warnings.warn('Annulus ratio could not be calculated.\nButton Intensities Are Of Length Zero.\
-                            Annulus to disk ratio is NaN')
-            self.annulus_to_disk_ratio = np.nan
+        self._disk = disk # a mask
+        self._annulus = annulus # a mask
         self.center = center
         self.disk_radius = disk_radius
         self.annulus_radii = annulus_radii
-        self.summary = self.summarize()
+        self.summary = summary if summary is not None else self.summarize()
+
+
+    @property
+    def disk(self):
+        if self._disk is None:
+            self._disk = Stamp.circularSubsection(_stampdata(self), self.center, self.disk_radius)['mask']
+        return self._disk
+
+
+    @property
+    def annulus(self):
+        if self._annulus is None:
+            self._annulus = Stamp.annularSubsection(_stampdata(self), self.center, self.annulus_radii)['mask']
+        return self._annulus
+
+
+    @property
+    def disk_intensities(self):
+        return ma.compressed(self.get_disk())
+
+
+    @property
+    def annulus_intensities(self):
+        return ma.compressed(self.get_annulus())
+
+
+    @property
+    def annulus_to_disk_ratio(self):
+        try:
+            return np.count_nonzero(~self.annulus) / np.count_nonzero(~self.disk)
+        except ZeroDivisionError:
+            warnings.warn('Annulus ratio could not be calculated.\nButton Intensities Are Of Length Zero.\
+                            Annulus to disk ratio is NaN')
+            return np.nan
 
 
     def get_disk(self):
@@ -824,7 +1473,7 @@ class Button:
 
         """
 
-        return ma.array(self.stampdata, mask = self.disk)
+        return ma.array(_stampdata(self), mask = self.disk)
 
 
     def get_annulus(self):
@@ -839,7 +1488,7 @@ class Button:
 
         """
 
-        return ma.array(self.stampdata, mask = self.annulus)
+        return ma.array(_stampdata(self), mask = self.annulus)
 
 
     def summarize(self):
@@ -854,10 +1503,8 @@ class Button:
 
         """
 
-        features_disk = ['median_button', 'summed_button', 'summed_button_BGsub', 'std_button', 'x_button_center', 
-                    'y_button_center', 'radius_button_disk']
-        features_ann = ['median_button_annulus', 'summed_button_annulus_normed', 'std_button_annulus_localBG', 
-                            'inner_radius_button_annulus', 'outer_radius_button_annulus']
+        features_disk = Button.features_disk
+        features_ann = Button.features_ann
 
         if self.blankFlag:
             return dict(zip(features_disk+features_ann, list(np.full(len(features_disk+features_ann), np.nan))))
@@ -884,6 +1531,80 @@ class Button:
 
 
 
+def _stampdata(feature):
+    """
+    Gets the stamp data of a Chamber or Button, which must not have been released.
+
+    Arguments:
+        (Chamber | Button) feature: the stamp feature
+
+    Returns:
+        (np.ndarray) the stamp data
+
+    """
+
+    if feature.stampdata is None:
+        raise ValueError('Stamp data has been released. Call ChipImage.restamp() to generate feature masks.')
+    return feature.stampdata
+
+
+
+def write_stamp(path, image, as_ubyte = False):
+    """
+    Writes an annotated stamp to a stamp repository (see ChipImage.repo_dump).
+
+    Arguments:
+        (str) path: stamp file path (.png)
+        (np.ndarray) image: annotated stamp
+        (bool) as_ubyte: flag to save stamp as uint8 image
+
+    Returns:
+        None
+
+    """
+
+    if as_ubyte:
+        image = skimage.img_as_ubyte(image) #uint8 for export (space saving)
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    skimage.io.imsave(path, image)
+
+
+def stamp_overlay(stamptype, summary, index):
+    """
+    Gets the feature borders and value drawn onto a summary stamp (see Stamp.summary_stamp) 
+    from the stamp summary.
+
+    Arguments:
+        (str) stamptype: parameterized feature type to draw onto stamp ('chamber' | 'button')
+        (dict) summary: stamp summary (see Stamp.summarize, StampGrid.summary_columns). Features
+            are NaN where blank, and absent where undefined.
+        (tuple) index: stamp chip index (x, y), for errors
+
+    Returns:
+        (tuple) circles of the form [radius, (centerx, centery)], and the stamp value (str)
+
+    """
+
+    if stamptype == 'chamber':
+        if 'radius_chamber' not in summary:
+            raise ValueError('No chamber defined for stamp {}'.format(index))
+        if summary['radius_chamber'] != summary['radius_chamber']: # blank
+            return [], ''
+        center = (int(summary['x_center_chamber']), int(summary['y_center_chamber']))
+        return [[int(summary['radius_chamber']), center]], ''
+    elif stamptype == 'button':
+        if 'radius_button_disk' not in summary:
+            raise ValueError('No button defined for stamp {}'.format(index))
+        if summary['radius_button_disk'] != summary['radius_button_disk']: # blank
+            return [], ''
+        center = (int(summary['x_button_center']), int(summary['y_button_center']))
+        circles = [[int(summary['radius_button_disk']), center], [int(summary['outer_radius_button_annulus']), center]]
+        val = '{}, {}'.format(int(summary['summed_button_BGsub']), int(summary['summed_button_annulus_normed']))
+        return circles, val
+    else:
+        raise ValueError('Invalid stamp type. Valid values are "chamber" or "button"') 
+
+
 def annotateStamp(data, circles, index, val):
     """
     Annotates a stamp image with an index, a feature value, and arbitrary circles
@@ -902,16 +1623,136 @@ def annotateStamp(data, circles, index, val):
 
     """
 
-    working = deepcopy(data)
-    d = cv2.copyMakeBorder(deepcopy(data), 1, 1, 1, 1, cv2.BORDER_CONSTANT, value = 60000)
-    cv2.putText(d, index, (2, 12), cv2.FONT_HERSHEY_PLAIN, 0.8, 60000) #Index
-    cv2.putText(d, val, (2, len(d) - 4), cv2.FONT_HERSHEY_PLAIN, 0.7, 60000) #Index
-    for rad, center in circles:
-        if center != center:
-            pass
-        else:
-            cv2.circle(d, center, rad+2, 0, thickness = 1)
-            cv2.circle(d, center, rad+1, (2**16)-1, thickness = 1)
-            cv2.circle(d, center, rad,0, thickness = 1)
-    return d
+    return render_stamps(data[np.newaxis, np.newaxis], [(circles, index, val)])
+
+
+def render_stamps(data, annotations):
+    """
+    Renders a stamp stack as a stitched summary image: each stamp is annotated as by 
+    annotateStamp (bordered, with its index, value, and feature circles), and the annotated
+    stamps are stitched as by ChipImage.stitch2D (x along columns, y along rows). The stamps 
+    are copied straight into a preallocated canvas, and the text and circle pixels, which are
+    rasterized once per label and radius (see _text_pixels, _circle_offsets), are set for all
+    stamps at once, one drawing step at a time.
+
+    Arguments:
+        (np.ndarray) data: stamp stack of shape (dims.x, dims.y, width, width)
+        (list) annotations: (circles, index, val) of each stamp, in chip index (x-major) order
+            (see annotateStamp)
+
+    Returns:
+        (np.ndarray) the summary image, of shape (dims.y*(width+2), dims.x*(width+2))
+
+    """
+
+    xdim, ydim, h, w = data.shape
+    shape = (h+2, w+2) # bordered stamp
+    canvas = np.empty((ydim, shape[0], xdim, shape[1]), dtype = data.dtype)
+    canvas[...] = _saturate(60000, data.dtype)
+    canvas[:, 1:-1, :, 1:-1] = data.transpose(1, 2, 0, 3)
+    canvas = canvas.reshape(ydim*shape[0], xdim*shape[1])
+    xs, ys = np.divmod(np.arange(len(annotations)), ydim)
+    origins = np.stack((ys*shape[0], xs*shape[1]))
+
+    texts = [_text_pixels(text, org, scale, shape) for _, index, val in annotations 
+        for text, org, scale in ((index, (2, 12), 0.8), (val, (2, shape[0] - 4), 0.7))]
+    if texts:
+        counts = [t.shape[1] for t in texts]
+        rows, cols = np.concatenate(texts, axis = 1) + np.repeat(np.repeat(origins, 2, axis = 1), counts, axis = 1)
+        canvas[rows, cols] = _saturate(60000, data.dtype)
+
+    # (outer, middle, inner) border of each circle, in order
+    for i in range(max([len(c) for c, _, _ in annotations] + [0])):
+        drawn = [n for n, (c, _, _) in enumerate(annotations) if len(c) > i]
+        radii = np.array([annotations[n][0][i][0] for n in drawn])
+        centers = np.array([annotations[n][0][i][1] for n in drawn]).reshape(-1, 2)
+        for dr, value in ((2, 0), (1, 2**16-1), (0, 0)):
+            rows, cols = _circle_pixels(radii + dr, centers, origins[:, drawn], shape)
+            canvas[rows, cols] = _saturate(value, data.dtype)
+    return canvas
+
+
+def _saturate(value, dtype):
+    """
+    Clips a drawing value to the range of an integer dtype (as OpenCV drawing does).
+    """
+
+    if np.dtype(dtype).kind in 'ui':
+        info = np.iinfo(dtype)
+        return min(max(value, info.min), info.max)
+    return value
+
+
+@lru_cache(maxsize = 2**14)
+def _text_pixels(text, org, scale, shape):
+    """
+    Rasterizes text (OpenCV Hershey plain font, as drawn by annotateStamp) onto a stamp.
+
+    Arguments:
+        (str) text: text
+        (tuple) org: bottom-left text position (x, y)
+        (float) scale: font scale
+        (tuple) shape: stamp shape
+
+    Returns:
+        (np.ndarray) (row, column) indices of the text pixels, of shape (2, n)
+
+    """
+
+    (width, height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_PLAIN, scale, 1)
+    margin = 4
+    top, left = max(org[1] - height - margin, 0), max(org[0] - margin, 0) # text box within the stamp
+    bottom, right = min(org[1] + baseline + margin, shape[0]), min(org[0] + width + margin, shape[1])
+    mask = np.zeros((max(bottom - top, 0), max(right - left, 0)), dtype = np.uint8)
+    cv2.putText(mask, text, (org[0] - left, org[1] - top), cv2.FONT_HERSHEY_PLAIN, scale, 1)
+    pixels = np.array(np.nonzero(mask)) + np.array([[top], [left]])
+    pixels.flags.writeable = False
+    return pixels
+
+
+def _circle_pixels(radii, centers, origins, shape):
+    """
+    Rasterizes circle borders (OpenCV, one pixel thick, as drawn by annotateStamp) onto stamps
+    of a summary image, from the circle pixels about the origin (cached by radius).
+
+    Arguments:
+        (np.ndarray) radii: circle radii of shape (n,)
+        (np.ndarray) centers: circle centers (x, y) within the stamps, of shape (n, 2)
+        (np.ndarray) origins: summary image (row, column) positions of the stamps, of shape (2, n)
+        (tuple) shape: stamp shape (circles are clipped to the stamp)
+
+    Returns:
+        (tuple) summary image row and column indices of the circle pixels (np.ndarray)
+
+    """
+
+    rows, cols = [np.empty(0, dtype = int)], [np.empty(0, dtype = int)]
+    for radius in np.unique(radii):
+        drawn = radii == radius
+        dr, dc = _circle_offsets(int(radius))
+        r = dr + centers[drawn, 1, np.newaxis]
+        c = dc + centers[drawn, 0, np.newaxis]
+        inside = (r >= 0) & (r < shape[0]) & (c >= 0) & (c < shape[1])
+        rows.append((r + origins[0, drawn, np.newaxis])[inside])
+        cols.append((c + origins[1, drawn, np.newaxis])[inside])
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+@lru_cache(maxsize = 256)
+def _circle_offsets(radius):
+    """
+    Rasterizes a circle border of a radius about the origin (see _circle_pixels).
+
+    Arguments:
+        (int) radius: circle radius
+
+    Returns:
+        (tuple) row and column offsets of the circle pixels (np.ndarray)
+
+    """
 
+    c = radius + 2
+    mask = np.zeros((2*c + 1, 2*c + 1), dtype = np.uint8)
+    cv2.circle(mask, (c, c), radius, 1, thickness = 1)
+    rows, cols = np.nonzero(mask)
+    return rows - c, cols - c
\ No newline at end of file
@@ -9,27 +9,39 @@
 
 # General Python
 import os
+import hashlib
 import logging
 from glob import glob
 from pathlib import Path
 from collections import namedtuple, OrderedDict
+from contextlib import nullcontext
+import numpy as np
 import pandas as pd
 
 from tqdm import tqdm
-from skimage import external
+import tifffile
 
-from processingpack.chip import ChipImage
+from processingpack.chip import ChipImage, apply_feature_map, map_rasters, summary_frame, concat_summaries
+from processingpack import featuremap
+from processingpack import export
+from processingpack import parallel
+from processingpack.writer import BackgroundWriter
+from processingpack.stampstore import StampCube
+from processingpack import raster
 
 
 
 class ChipSeries:
-    def __init__(self, device, series_index, attrs = None):
+    _summary_kind = 'ChipSeries'
+
+    def __init__(self, device, description, series_index, attrs = None):
         """
         Constructor for a ChipSeries object.
 
         Arguments:
             (experiment.Device) device: 
-            (int) series_index:
+            (str) description: a brief description of the series
+            (str) series_index: name of the series index (i.e., time, concentration, etc.)
             (dict) attrs: arbitrary ChipSeries metdata
 
         Returns:
@@ -43,6 +55,7 @@ class ChipSeries:
         self.description = description
         self.chips = {}
         self.series_root = None
+        self.cube = None
         logging.debug('ChipSeries Created | {}'.format(self.__str__()))
 
 
@@ -116,36 +129,64 @@ class ChipSeries:
             None
 
         Returns:
-            (pd.DataFrame) summary of the ChipSeries
+            (pd.DataFrame) summary of the ChipSeries, ordered by chip index and then by image 
+                (see chip.StampGrid.summary_columns for the schema)
 
         """
 
-        summaries = []
-        for i, r in self.chips.items():
-            df = r.summarize()
-            df[self.series_indexer] = i
-            summaries.append(df)
-        return pd.concat(summaries).sort_index()
+        summaries = [r.summary_columns() for r in self.chips.values()]
+        return summary_frame(concat_summaries(summaries, list(self.chips.keys()), self.series_indexer))
 
 
-    def map_from(self, reference, mapto_args = {}):
+    def map_from(self, reference, mapto_args = {}, compact = False, workers = None, prefetch = 0, cube = None):
         """
         Maps feature positions from a reference chip.ChipImage to each of the ChipImages in the series.
         Specific features can be mapped by passing the optional mapto_args to the underlying 
         mapper.
 
         Arguments:
-            (chip.ChipImage) reference: reference image (with found button and/or chamber features)
+            (chip.ChipImage | featuremap.FeatureMap) reference: reference image (with found button 
+                and/or chamber features), or its feature map
             (dict) mapto_args: dictionary of keyword arguments passed to ChipImage.mapto().
+            (bool) compact: if True, the stamp data of each ChipImage is released once mapped, 
+                keeping only the feature geometry and summaries (stamps are re-read on demand, 
+                see ChipImage.restamp), such that memory does not grow with the series length
+            (int | None) workers: number of worker processes to map the images across. The images
+                are quantified straight from their rasters (see chip.map_rasters) and are left 
+                unstamped, as with compact.
+            (int) prefetch: number of images whose stamps are read ahead on background threads
+                while the current image is mapped (see parallel.prefetch). If 0, images are read
+                when mapped.
+            (str | pathlib.Path | None) cube: if passed, path of a stamp cube (.npy) of the series 
+                stamps to build while mapping, for per-chamber access across the series (see 
+                stampstore.StampCube). The cube is kept as ChipSeries.cube. With workers, each 
+                worker writes the stamps of its images to the cube, so each raster is read once.
 
         Returns:
             None
 
         """
 
-        for chip in tqdm(self.chips.values(), desc = 'Series <{}> Stamped and Mapped'.format(self.description)):
-            chip.stamp()
-            reference.mapto(chip, **mapto_args)
+        chips = list(self.chips.values())
+        stampcube = None
+        if workers:
+            if cube:
+                stampcube = _create_cube(cube, self, raster.read_dtype(chips[0].data_ref))
+            _map_parallel(reference, chips, mapto_args, workers, 'Series <{}> Mapped'.format(self.description), 
+                cube = stampcube.path if stampcube else None)
+        else:
+            for i, (chip, stampstack) in enumerate(tqdm(zip(chips, _read_stamps(chips, prefetch)), 
+                total = len(chips), desc = 'Series <{}> Stamped and Mapped'.format(self.description))):
+                chip.stamp(stampstack)
+                reference.mapto(chip, **mapto_args)
+                if cube:
+                    stampcube = stampcube or _create_cube(cube, self, chip.stamps.data.dtype)
+                    stampcube.write(i, chip.stamps.data)
+                if compact:
+                    chip._delete_stamps()
+        if stampcube:
+            stampcube.flush()
+            self.cube = stampcube
 
 
     def from_record():
@@ -159,12 +200,16 @@ class ChipSeries:
         p.text('<{}>'.format(self.device.__str__()))
 
 
-    def save_summary(self, outPath = None):
+    def save_summary(self, outPath = None, writer = None, fmt = 'csv'):
         """
-        Generates and exports a ChipSeries summary Pandas DataFrame as a bzip2 compressed CSV file.
+        Generates and exports a ChipSeries summary Pandas DataFrame as a bzip2 compressed CSV file,
+        or as a Parquet or Feather file partitioned by device and description (see export.save_summary).
         
         Arguments:
             (str) outPath: target directory for summary
+            (writer.BackgroundWriter | None) writer: background writer to write the file on. If
+                None, the file is written before returning.
+            (str) fmt: file format ('csv' | 'parquet' | 'feather')
 
         Returns:
             None
@@ -174,35 +219,201 @@ class ChipSeries:
         target = self.series_root
         if outPath:
             target = outPath
-        df = self.summarize()
-        fn = '{}_{}_{}.csv.bz2'.format(self.device.dname, self.description, 'ChipSeries')
-        df.to_csv(os.path.join(target, fn), compression = 'bz2')
+        _save_summary(self.summarize(), target, self.device, self.description, 'ChipSeries', fmt, writer)
 
 
-    def save_summary_images(self, outPath = None, featuretype = 'chamber'):
+    def save_summary_images(self, outPath = None, featuretype = 'chamber', pyramid = False, montage = False, 
+        writer = None):
         """
         Generates and exports a stamp summary image (chip stamps concatenated)
         
         Arguments:
             (str) outPath: user-define export target directory
             (str) featuretype: type of feature overlay ('chamber' | 'button')
+            (bool) pyramid: flag to write the summary images as tiled, compressed, pyramidal TIFFs
+                (see raster.write_pyramid)
+            (bool) montage: flag to also write a montage of thumbnails of the summary images of
+                the series, in series order (Summary_<dname>_<description>_Montage.tif)
+            (writer.BackgroundWriter | None) writer: background writer to write the images on. If
+                None, the images are written on a writer of the call, before returning.
 
         Returns:
             None
 
         """
 
+        target = self._summary_image_target(outPath)
+        thumbnails = []
+        with (BackgroundWriter() if writer is None else nullcontext(writer)) as writer:
+            for c in self.chips.values():
+                image = _save_summary_image(c, target, featuretype, writer, pyramid)
+                if montage:
+                    thumbnails.append(raster.thumbnail(image))
+            if montage:
+                name = 'Summary_{}_{}_Montage.tif'.format(self.device.dname, self.description)
+                _write(writer, raster.write_pyramid, os.path.join(target, name), raster.montage(thumbnails))
+        logging.debug('Saved Summary Images | Series: {}'.format(self.__str__()))
+
+
+    def _summary_image_target(self, outPath = None):
         target_root = self.series_root
         if outPath:
             target_root = outPath
         target = os.path.join(target_root, 'SummaryImages') # Wrapping folder
         os.makedirs(target, exist_ok=True)
-        for c in self.chips.values():
-            image = c.summary_image(featuretype)
-            name = '{}_{}.tif'.format('Summary', c.data_ref.stem)
-            outDir = os.path.join(target, name)
-            external.tifffile.imsave(outDir, image)
-        logging.debug('Saved Summary Images | Series: {}'.format(self.__str__()))
+        return target
+
+
+    def stream(self, reference, features = 'all', summary_images = False, outPath = None, 
+        featuretype = 'button', prefetch = 0):
+        """
+        Maps the features of a reference to each ChipImage of the series and summarizes it, one
+        image at a time, as a generator. Only the summary of the current image is kept: images
+        are quantified straight from their rasters (see chip.apply_feature_map), or, if summary
+        images are written or images prefetched, stamped, mapped, imaged, and released. Memory 
+        is thus constant in the number of images. The ChipImages are left unstamped. Summary 
+        images are written on a background thread.
+
+        Arguments:
+            (chip.ChipImage | featuremap.FeatureMap) reference: reference image (with found 
+                button and/or chamber features), or its feature map
+            (str) features: features to map ('chamber', 'button', 'all')
+            (bool) summary_images: flag to write a summary image of each ChipImage
+            (str) outPath: user-defined summary image export target directory
+            (str) featuretype: type of summary image feature overlay ('chamber' | 'button')
+            (int) prefetch: number of images whose stamps are read ahead on background threads
+                (see ChipSeries.map_from)
+
+        Yields:
+            (tuple) the ChipImage identifier and its summary (pd.DataFrame)
+
+        """
+
+        for identifier, columns in self._stream_columns(reference, features, summary_images, outPath, 
+            featuretype, prefetch):
+            df = summary_frame(columns)
+            df[self.series_indexer] = identifier
+            yield identifier, df
+
+
+    def _stream_columns(self, reference, features, summary_images, outPath, featuretype, prefetch, chips = None):
+        """
+        Streams the ChipSeries as summary column arrays (see ChipSeries.stream and 
+        chip.StampGrid.summary_columns).
+
+        Arguments:
+            See ChipSeries.stream
+            (list | None) chips: (identifier, ChipImage) pairs to stream. If None, streams all.
+
+        Yields:
+            (tuple) the ChipImage identifier and its summary columns (OrderedDict)
+
+        """
+
+        target = self._summary_image_target(outPath) if summary_images else None
+        writer = BackgroundWriter() if summary_images else None
+        chips = list(self.chips.items()) if chips is None else chips
+        stampstacks = _read_stamps([c for _, c in chips], prefetch)
+        try:
+            for (identifier, chip), stampstack in tqdm(zip(chips, stampstacks), total = len(chips), 
+                desc = 'Series <{}> Streamed'.format(self.description)):
+                if summary_images or prefetch:
+                    chip.stamp(stampstack)
+                    reference.mapto(chip, features = features)
+                    columns = chip.summary_columns()
+                    if summary_images:
+                        _save_summary_image(chip, target, featuretype, writer)
+                    chip.stamps = None
+                    chip.stampstack = None
+                else:
+                    columns = apply_feature_map(reference, chip.data_ref, features, columns = True, geometry = chip.geometry)
+                yield identifier, columns
+        finally:
+            if writer:
+                writer.close()
+
+
+    def summarize_stream(self, reference, stream_args = {}):
+        """
+        Summarizes the ChipSeries by streaming its images (see ChipSeries.stream), keeping only 
+        the summary columns in memory.
+
+        Arguments:
+            (chip.ChipImage | featuremap.FeatureMap) reference: reference image (with found 
+                button and/or chamber features), or its feature map
+            (dict) stream_args: dictionary of keyword arguments passed to ChipSeries.stream()
+
+        Returns:
+            (pd.DataFrame) summary of the ChipSeries (see ChipSeries.summarize)
+
+        """
+
+        stream_args = dict(_stream_defaults, **stream_args)
+        identifiers, summaries = zip(*self._stream_columns(reference, **stream_args))
+        return summary_frame(concat_summaries(list(summaries), list(identifiers), self.series_indexer))
+
+
+    def update_summary(self, reference, outPath = None, fmt = 'parquet', stream_args = {}):
+        """
+        Incrementally summarizes the ChipSeries to a Parquet or Feather summary file (see 
+        export.save_summary), keeping a manifest of the summarized images (their paths, 
+        identifiers, modification times, and sizes) next to it. Only images that are new or have 
+        changed since the last update are streamed (see ChipSeries.stream), and their rows are 
+        added to the stored summary, replacing any previous ones. Rows of images no longer in the
+        series are dropped. If the reference (identified by its feature geometry), the 
+        mapped features, or the series index differ from those of the stored summary, all images
+        are summarized again. CSV summaries are not supported, as they do not round-trip the 
+        summary schema.
+
+        Arguments:
+            (chip.ChipImage | featuremap.FeatureMap) reference: reference image (with found 
+                button and/or chamber features), or its feature map
+            (str | None) outPath: target directory for summary. If None, saves to the series root.
+            (str) fmt: file format ('parquet' | 'feather')
+            (dict) stream_args: dictionary of keyword arguments passed to ChipSeries.stream()
+
+        Returns:
+            (pd.DataFrame) the updated summary, ordered by chip index and then by image identifier
+
+        """
+
+        target = self.series_root
+        if outPath:
+            target = outPath
+        path = export.summary_path(target, self.device, self.description, self._summary_kind, fmt)
+        manifestPath = export.manifest_path(path)
+        stream_args = dict(_stream_defaults, **stream_args)
+        parameters = {'reference': _reference_key(reference), 'features': stream_args['features'], 
+            'series_index': self.series_indexer}
+        images = {str(c.data_ref): dict(identifier = i, **export.file_state(c.data_ref)) 
+            for i, c in self.chips.items()}
+
+        manifest = export.load_manifest(manifestPath)
+        previous = {}
+        if manifest and manifest['parameters'] == parameters and path.exists():
+            previous = manifest['images']
+        changed = [(i, c) for i, c in self.chips.items() if previous.get(str(c.data_ref)) != images[str(c.data_ref)]]
+        kept = [r['identifier'] for p, r in previous.items() if images.get(p) == r]
+        logging.debug('Updating Series Summary | {}, New or Changed: {}, Kept: {}'.format(self.__str__(), 
+            [i for i, _ in changed], kept))
+        if not changed and len(kept) == len(previous) and previous:
+            return export.load_summary(path)
+
+        summaries = []
+        if kept:
+            stored = export.load_summary(path)
+            summaries.append(stored[stored[self.series_indexer].isin(kept)])
+        if changed:
+            identifiers, columns = zip(*self._stream_columns(reference, chips = changed, **stream_args))
+            summaries.append(summary_frame(concat_summaries(list(columns), list(identifiers), self.series_indexer)))
+        if not summaries:
+            raise ValueError('No images to summarize in series {}'.format(self.__str__()))
+        df = pd.concat(summaries).reset_index()
+        df = df.sort_values(['x', 'y', self.series_indexer], kind = 'mergesort').set_index(['x', 'y'])
+
+        export.save_summary(df, target, self.device, self.description, self._summary_kind, fmt)
+        export.save_manifest(manifestPath, {'parameters': parameters, 'images': images})
+        return df
 
 
     def _delete_stamps(self):
@@ -221,7 +432,7 @@ class ChipSeries:
             c._delete_stamps()
 
 
-    def repo_dump(self, target_root, title, as_ubyte = False, featuretype = 'button'):
+    def repo_dump(self, target_root, title, as_ubyte = False, featuretype = 'button', writer = None):
         """
         Save the chip stamp images to the target_root within folders title by chamber IDs
 
@@ -229,15 +440,37 @@ class ChipSeries:
             (str) target_root:
             (str) title:
             (bool) as_ubyte:
+            (str) featuretype: type of feature overlay ('chamber' | 'button')
+            (writer.BackgroundWriter | None) writer: background writer to write the stamps on. If
+                None, the stamps are written on a writer of the call, before returning.
+
+        Returns:
+            None
+
+        """
+
+        with (BackgroundWriter() if writer is None else nullcontext(writer)) as writer:
+            for i, c in self.chips.items():
+                title = '{}{}_{}'.format(self.device.setup, self.device.dname, i)
+                c.repo_dump(featuretype, target_root, title, as_ubyte = as_ubyte, writer = writer)
+
+
+    def store_stamps(self, store):
+        """
+        Writes the stamps and feature summaries of the processed ChipImages to a stamp store, as
+        an alternative to a PNG stamp repository (see ChipSeries.repo_dump, 
+        stampstore.StampStore.export_repo).
+
+        Arguments:
+            (stampstore.StampStore) store: stamp store, open for writing
 
         Returns:
             None
 
         """
 
-        for i, c in self.chips.items():
-            title = '{}{}_{}'.format(self.device.setup, self.device.dname, i)
-            c.repo_dump(featuretype, target_root, title, as_ubyte = as_ubyte)
+        for i, c in tqdm(self.chips.items(), desc = 'Series <{}> Stored'.format(self.description)):
+            store.write(c, self.description, i, self.series_indexer)
 
     def __str__(self):
         return ('Description: {}, Device: {}'.format(self.description, str((self.device.setup, self.device.dname))))
@@ -245,6 +478,8 @@ class ChipSeries:
 
 
 class StandardSeries(ChipSeries):
+    _summary_kind = 'StandardSeries_Analysis'
+
     def __init__(self, device, description, attrs = None):
         """
         Constructor for a StandardSeries object.
@@ -286,29 +521,44 @@ class StandardSeries(ChipSeries):
         return self.chips[self.get_hs_key()]
     
 
-    def map_from_hs(self, mapto_args = {}):
+    def map_from_hs(self, mapto_args = {}, compact = False, reference = None, workers = None):
         """
         Maps the chip image feature position from the StandardSeries high standard to each 
         other ChipImage
         
         Arguments:
             (dict) mapto_args: dictionary of keyword arguments passed to ChipImage.mapto().
+            (bool) compact: if True, the stamp data of each mapped ChipImage is released once 
+                mapped (see ChipSeries.map_from)
+            (chip.ChipImage | featuremap.FeatureMap) reference: reference to map from in place 
+                of the processed high standard (e.g., a saved FeatureMap of the high standard). 
+                The reference is also mapped to the high standard.
+            (int | None) workers: number of worker processes to map the images across (see 
+                ChipSeries.map_from)
 
         Returns:
             None
 
         """
 
-        reference_key = {self.get_hs_key()}
-        all_keys = set(self.chips.keys())
         hs = self.get_highstandard()
+        if reference is None:
+            reference = hs
+        keys = [key for key, c in self.chips.items() if c is not reference]
+
+        if workers:
+            chips = [self.chips[key] for key in keys]
+            _map_parallel(reference, chips, mapto_args, workers, 'Processing Standard <{}>'.format(self.__str__()))
+            return
         
-        for key in tqdm(all_keys - reference_key, desc = 'Processing Standard <{}>'.format(self.__str__())):
+        for key in tqdm(keys, desc = 'Processing Standard <{}>'.format(self.__str__())):
             self.chips[key].stamp()
-            hs.mapto(self.chips[key], **mapto_args)
+            reference.mapto(self.chips[key], **mapto_args)
+            if compact:
+                self.chips[key]._delete_stamps()
 
 
-    def process(self, featuretype = 'chamber'):
+    def process(self, featuretype = 'chamber', feature_maps = None):
         """
         A high-level (script-like) function to execute analysis of a loaded Standard Series.
         Processes the high-standard (stamps and finds chambers) and maps processed high standard
@@ -316,6 +566,9 @@ class StandardSeries(ChipSeries):
         
         Arguments:
             (str) featuretype: stamp feature to map
+            (str | None) feature_maps: directory of stored FeatureMaps. If the high standard 
+                image has a stored feature map, chamber finding is skipped; otherwise, its 
+                found features are stored.
 
         Returns:
             None
@@ -324,7 +577,7 @@ class StandardSeries(ChipSeries):
 
         hs = self.get_highstandard()
         hs.stamp()
-        hs.findChambers()
+        _find_or_reuse(hs, 'chamber', feature_maps, hs.findChambers)
         self.map_from_hs(mapto_args = {'features': featuretype})
     
 
@@ -345,12 +598,16 @@ class StandardSeries(ChipSeries):
         return df
 
 
-    def save_summary(self, outPath = None):
+    def save_summary(self, outPath = None, writer = None, fmt = 'csv'):
         """
-        Generates and exports a StandardSeries summary Pandas DataFrame as a bzip2 compressed CSV file.
+        Generates and exports a StandardSeries summary Pandas DataFrame as a bzip2 compressed CSV file,
+        or as a Parquet or Feather file partitioned by device and description (see export.save_summary).
         
         Arguments:
             (str | None) outPath: target directory for summary. If None, saves to the series root.
+            (writer.BackgroundWriter | None) writer: background writer to write the file on. If
+                None, the file is written before returning.
+            (str) fmt: file format ('csv' | 'parquet' | 'feather')
 
         Returns:
             None
@@ -360,9 +617,8 @@ class StandardSeries(ChipSeries):
         target = self.series_root
         if outPath:
             target = outPath
-        df = self.summarize()
-        fn = '{}_{}_{}.csv.bz2'.format(self.device.dname, self.description, 'StandardSeries_Analysis')
-        df.to_csv(os.path.join(target, fn), compression = 'bz2')
+        _save_summary(self.summarize(), target, self.device, self.description, 'StandardSeries_Analysis', 
+            fmt, writer)
         logging.debug('Saved StandardSeries Summary | Series: {}'.format(self.__str__()))
 
 
@@ -411,14 +667,17 @@ class ChipQuant:
         logging.debug('ChipQuant Loaded | Description: {}'.format(self.description))
 
 
-    def process(self, reference = None, mapped_features = 'button'):
+    def process(self, reference = None, mapped_features = 'button', feature_maps = None):
         """
         Processes a chip quantification by stamping and finding buttons. If a reference is passed,
         button positions are mapped.
         
         Arguments:
-            (ChipImage) button_ref: Reference ChipImage
-            (st) mapped_features: features to map from the reference (if button_ref)
+            (ChipImage | featuremap.FeatureMap) reference: Reference ChipImage, or its feature map
+            (st) mapped_features: features to map from the reference (if reference), or to find
+            (str | None) feature_maps: directory of stored FeatureMaps. Without a reference, if
+                the image has a stored feature map, feature finding is skipped; otherwise, its
+                found features are stored.
 
         Returns:
             None
@@ -428,14 +687,14 @@ class ChipQuant:
         self.chip.stamp()
         if not reference:
             if mapped_features == 'button':
-                self.chip.findButtons()
+                find = self.chip.findButtons
             elif mapped_features == 'chamber':
-                self.chip.findChambers()
+                find = self.chip.findChambers
             elif mapped_features == 'all':
-                self.chip.findButtons()
-                self.chip.findChambers()
+                find = lambda: (self.chip.findButtons(), self.chip.findChambers())
             else:
                 raise ValueError('Must specify valid feature name to map ("button", "chamber", or "all"')
+            _find_or_reuse(self.chip, mapped_features, feature_maps, find)
         else:
             reference.mapto(self.chip, features = mapped_features)
         self.processed = True
@@ -478,12 +737,38 @@ class ChipQuant:
         return self.summarize()
 
 
-    def save_summary_image(self, outPath_root = None):
+    def save_summary(self, outPath = None, writer = None, fmt = 'csv'):
+        """
+        Generates and exports a ChipQuant summary Pandas DataFrame as a bzip2 compressed CSV file,
+        or as a Parquet or Feather file partitioned by device and description (see export.save_summary).
+        
+        Arguments:
+            (str | None) outPath: target directory for summary. If None, saves to the image directory.
+            (writer.BackgroundWriter | None) writer: background writer to write the file on. If
+                None, the file is written before returning.
+            (str) fmt: file format ('csv' | 'parquet' | 'feather')
+
+        Returns:
+            None
+
+        """
+
+        target = self.chip.data_ref.parent
+        if outPath:
+            target = outPath
+        _save_summary(self.summarize(), target, self.device, self.description, 'ChipQuant', fmt, writer)
+
+
+    def save_summary_image(self, outPath_root = None, pyramid = False, writer = None):
         """
         Generates and exports a stamp summary image (chip stamps concatenated)
 
         Arguments:
             (str) outPath_root: path of user-defined export root directory
+            (bool) pyramid: flag to write the summary image as a tiled, compressed, pyramidal TIFF
+                (see raster.write_pyramid)
+            (writer.BackgroundWriter | None) writer: background writer to write the file on. If
+                None, the file is written before returning.
 
         Returns:
             None
@@ -492,7 +777,7 @@ class ChipQuant:
 
         outPath = self.chip.data_ref.parent
         if outPath_root:
-            if not os.isdir(outPath_root):
+            if not os.path.isdir(outPath_root):
                 em = 'Export directory does not exist: {}'.format(outPath_root)
                 raise ValueError(em)
             outPath = Path(outPath_root)
@@ -500,15 +785,11 @@ class ChipQuant:
         target = os.path.join(outPath, 'SummaryImages') # Wrapping folder
         os.makedirs(target, exist_ok=True)
         
-        c = self.chip
-        image = c.summary_image('button')
-        name = '{}_{}.tif'.format('Summary', c.data_ref.stem)
-        outDir = os.path.join(target, name)
-        external.tifffile.imsave(outDir, image)
+        _save_summary_image(self.chip, target, 'button', writer, pyramid)
         logging.debug('Saved ChipQuant Summary Image | ChipQuant: {}'.format(self.__str__()))
 
 
-    def repo_dump(self, outPath_root, as_ubyte = False):
+    def repo_dump(self, outPath_root, as_ubyte = False, writer = None):
         """
         Export the ChipQuant chip stamps to a repository (repo). The repo root contains a 
         directory for each unique pinlist identifier (MutantID, or other) and subdirs
@@ -517,6 +798,8 @@ class ChipQuant:
         Arguments:
             (str): outPath_root: path of user-defined repo root directory
             (bool) as_ubyte: flag to export the stamps as uint8 images
+            (writer.BackgroundWriter | None) writer: background writer to write the stamps on. If
+                None, the stamps are written on a writer of the call, before returning.
 
         Returns:
             None
@@ -524,7 +807,23 @@ class ChipQuant:
         """
 
         title = '{}{}_{}'.format(self.device.setup, self.device.dname, self.description)
-        self.chip.repo_dump('button', outPath_root, title, as_ubyte = as_ubyte)
+        self.chip.repo_dump('button', outPath_root, title, as_ubyte = as_ubyte, writer = writer)
+
+
+    def store_stamps(self, store):
+        """
+        Writes the ChipQuant stamps and feature summaries to a stamp store, as a series of a 
+        single image identified by the description (see ChipSeries.store_stamps).
+
+        Arguments:
+            (stampstore.StampStore) store: stamp store, open for writing
+
+        Returns:
+            None
+
+        """
+
+        store.write(self.chip, self.description, self.description)
     
 
     def __str__(self):
@@ -532,3 +831,195 @@ class ChipQuant:
             self.description, str((self.device.setup, self.device.dname))))
 
 
+
+_stream_defaults = {'features': 'all', 'summary_images': False, 'outPath': None, 'featuretype': 'button', 
+    'prefetch': 0} # see ChipSeries.stream
+
+
+def _map_parallel(reference, chips, mapto_args, workers, desc, cube = None):
+    """
+    Maps the features of a reference to ChipImages on a process pool (see chip.map_rasters).
+
+    Arguments:
+        (chip.ChipImage | featuremap.FeatureMap) reference: reference image, or its feature map
+        (list) chips: ChipImages to map to
+        (dict) mapto_args: dictionary of keyword arguments, as passed to ChipImage.mapto()
+        (int) workers: number of worker processes
+        (str) desc: progress bar description
+        (str | pathlib.Path | None) cube: path of a stamp cube to write the stamps of the 
+            ChipImages to, in order (see chip.map_rasters)
+
+    Returns:
+        None
+
+    """
+
+    features = mapto_args.get('features', 'all')
+    results = map_rasters(reference, [c.data_ref for c in chips], features, workers, [c.geometry for c in chips], cube)
+    for c, summaries in tqdm(zip(chips, results), total = len(chips), desc = desc):
+        c.set_mapped(reference, features, summaries)
+
+
+def _create_cube(path, series, dtype):
+    """
+    Creates an empty stamp cube for the images of a series (see ChipSeries.map_from).
+
+    Arguments:
+        (str | pathlib.Path) path: cube file path (.npy)
+        (ChipSeries) series: the series
+        (np.dtype) dtype: stamp dtype
+
+    Returns:
+        (stampstore.StampCube) the cube, open for writing
+
+    """
+
+    first = next(iter(series.chips.values()))
+    attrs = {'setup': series.device.setup, 'dname': series.device.dname, 'description': series.description, 
+        'series_index': series.series_indexer}
+    return StampCube.create(path, list(series.chips.keys()), first.geometry.ids, first.stampWidth, dtype, attrs)
+
+
+def _reference_key(reference):
+    """
+    Identifies a reference for summary manifests by its feature geometry: a hash (SHA-1) of the
+    chamber and button feature arrays of its stamps (see featuremap.FeatureMap), such that a 
+    ChipImage and its FeatureMap share a key, and re-found features change it.
+
+    Arguments:
+        (chip.ChipImage | featuremap.FeatureMap) reference: reference image, or its feature map
+
+    Returns:
+        (str) the reference key
+
+    """
+
+    h = hashlib.sha1()
+    for a in featuremap.FeatureMap._arrays:
+        arr = np.ascontiguousarray(getattr(reference.stamps, a))
+        h.update('{}|{}|{}'.format(a, arr.dtype.str, arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def _read_stamps(chips, prefetch):
+    """
+    Reads the stamp stacks of ChipImages ahead of their use on background threads, or, if
+    prefetch is 0, defers the reads to stamping (yielding None for each ChipImage).
+
+    Arguments:
+        (list) chips: ChipImages
+        (int) prefetch: number of ChipImages read ahead
+
+    Returns:
+        (iterator) stamp stacks (or None) of the ChipImages, in order
+
+    """
+
+    if prefetch:
+        return parallel.prefetch(ChipImage.read_stamps, chips, prefetch)
+    return iter([None]*len(chips))
+
+
+def _write(writer, func, *args, **kwargs):
+    """
+    Runs a write call on a background writer, or directly if there is none.
+
+    Arguments:
+        (writer.BackgroundWriter | None) writer: background writer
+        (callable) func: write function
+        (tuple) args: positional arguments of func
+        (dict) kwargs: keyword arguments of func
+
+    Returns:
+        None
+
+    """
+
+    if writer:
+        writer.submit(func, *args, **kwargs)
+    else:
+        func(*args, **kwargs)
+
+
+def _save_summary(df, target, device, description, kind, fmt, writer):
+    """
+    Writes a summary as a bzip2 compressed CSV file (<dname>_<description>_<kind>.csv.bz2) or as
+    a partitioned Parquet or Feather file (see export.save_summary).
+
+    Arguments:
+        (pd.DataFrame) df: summary
+        (str) target: target directory
+        (experiment.Device) device: device object
+        (str) description: series description
+        (str) kind: summary type
+        (str) fmt: file format ('csv' | 'parquet' | 'feather')
+        (writer.BackgroundWriter | None) writer: background writer
+
+    Returns:
+        None
+
+    """
+
+    if fmt == 'csv':
+        fn = '{}_{}_{}.csv.bz2'.format(device.dname, description, kind)
+        _write(writer, df.to_csv, os.path.join(target, fn), compression = 'bz2')
+    elif fmt in export.formats:
+        export.require_pyarrow() # before queuing the write
+        _write(writer, export.save_summary, df, target, device, description, kind, fmt)
+    else:
+        raise ValueError('Summary format must be one of {}, not {}'.format(['csv'] + list(export.formats), fmt))
+
+
+def _save_summary_image(chip, target, featuretype, writer = None, pyramid = False):
+    """
+    Writes the summary image of a ChipImage to a target directory. The image is generated in
+    the calling thread, and written on the writer (if passed).
+
+    Arguments:
+        (chip.ChipImage) chip: the processed ChipImage
+        (str) target: export directory
+        (str) featuretype: type of feature overlay ('chamber' | 'button')
+        (writer.BackgroundWriter | None) writer: background writer
+        (bool) pyramid: flag to write a tiled, compressed, pyramidal TIFF (see raster.write_pyramid)
+
+    Returns:
+        (np.ndarray) the summary image
+
+    """
+
+    image = chip.summary_image(featuretype)
+    name = '{}_{}.tif'.format('Summary', chip.data_ref.stem)
+    _write(writer, raster.write_pyramid if pyramid else tifffile.imwrite, os.path.join(target, name), image)
+    return image
+
+
+def _find_or_reuse(chip, features, root, find):
+    """
+    Defines the features of a stamped ChipImage from its stored FeatureMap if there is one, 
+    found on stamps of the same geometry, or else finds them and stores its FeatureMap (see 
+    featuremap.store). Without a feature map directory, the features are simply found.
+
+    Arguments:
+        (chip.ChipImage) chip: stamped ChipImage
+        (str) features: features to define ('chamber', 'button', 'all')
+        (str | None) root: directory of stored FeatureMaps
+        (callable) find: feature finding function of no arguments
+
+    Returns:
+        None
+
+    """
+
+    if root:
+        digest = featuremap.content_hash(chip.data_ref)
+        fmap = featuremap.lookup(chip.data_ref, root, digest = digest)
+        if fmap is not None and fmap.defines(features):
+            if fmap.fits(chip.geometry):
+                fmap.mapto(chip, features = features)
+                logging.debug('Reused Stored Features | {}'.format(chip.data_ref))
+                return
+            logging.debug('Stored Features Stamped Elsewhere | {}'.format(chip.data_ref))
+    find()
+    if root:
+        featuremap.store(chip.feature_map(digest = digest), root)
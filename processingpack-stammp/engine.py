@@ -0,0 +1,637 @@
+# title             : engine.py
+# description       : Array-based feature finding engines for chip stamps
+# authors           : Daniel Mokhtari
+# credits           : Craig Markin
+# date              : 20180615
+# version update    : 20200913
+# version           : 0.1.0
+# python_version    : 3.7
+
+# General Python
+import warnings
+from functools import lru_cache
+
+import numpy as np
+import cv2
+import skimage
+
+
+@lru_cache(maxsize = None)
+def _disk_spans(radius):
+    """
+    Rasterizes a filled circle exactly as cv2.circle does and returns it as horizontal spans.
+
+    Arguments:
+        (int) radius: disk radius
+
+    Returns:
+        (tuple) arrays (dy, xleft, xright) of row offsets and inclusive column offset bounds,
+            with respect to the disk center
+
+    """
+
+    canvas = np.zeros((2*radius+3, 2*radius+3), dtype = np.uint8)
+    cv2.circle(canvas, (radius+1, radius+1), radius, 1, -1)
+    rows = np.flatnonzero(canvas.any(axis = 1))
+    xleft = np.array([np.flatnonzero(canvas[r]).min() for r in rows])
+    xright = np.array([np.flatnonzero(canvas[r]).max() for r in rows])
+    return rows-(radius+1), xleft-(radius+1), xright-(radius+1)
+
+
+@lru_cache(maxsize = None)
+def disk_offsets(radius):
+    """
+    Pixel offsets of a filled disk (as rasterized by cv2.circle), in row-major order. Cached
+    per radius.
+
+    Arguments:
+        (int) radius: disk radius
+
+    Returns:
+        (tuple) arrays (dy, dx) of row and column offsets with respect to the disk center
+
+    """
+
+    dy, xleft, xright = _disk_spans(radius)
+    lengths = xright - xleft + 1
+    rows = np.repeat(dy, lengths)
+    cols = np.repeat(xleft - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    for a in (rows, cols):
+        a.flags.writeable = False
+    return rows, cols
+
+
+@lru_cache(maxsize = None)
+def annulus_offsets(inner, outer):
+    """
+    Pixel offsets of an annulus: the pixels of exactly one of the disks of radius inner and
+    outer (the XOR of the two disks), in row-major order. Cached per radius pair.
+
+    Arguments:
+        (int) inner: inner disk radius
+        (int) outer: outer disk radius
+
+    Returns:
+        (tuple) arrays (dy, dx) of row and column offsets with respect to the annulus center
+
+    """
+
+    span = max(inner, outer)
+    width = 2*span+1
+    keys = [(dy+span)*width + dx+span for dy, dx in (disk_offsets(inner), disk_offsets(outer))]
+    ring = np.setxor1d(*keys)
+    rows, cols = ring//width - span, ring%width - span
+    for a in (rows, cols):
+        a.flags.writeable = False
+    return rows, cols
+
+
+def offset_indices(center, offsets, shape):
+    """
+    Maps pixel offsets about a center to flat indices into an image, dropping the pixels that
+    fall outside of the image (as cv2.circle clips).
+
+    Arguments:
+        (tuple) center: (x, y) center
+        (tuple) offsets: arrays (dy, dx) of row and column offsets
+        (tuple) shape: image shape (height, width)
+
+    Returns:
+        (np.ndarray) flat (row-major) pixel indices, in row-major order
+
+    """
+
+    dy, dx = offsets
+    rows = dy + int(center[1])
+    cols = dx + int(center[0])
+    inside = (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+    return rows[inside]*shape[1] + cols[inside]
+
+
+def disk_indices(center, radius, shape):
+    """
+    Flat pixel indices of a disk (clipped to the image), without rasterizing a mask.
+
+    Arguments:
+        (tuple) center: (x, y) disk center
+        (int) radius: disk radius
+        (tuple) shape: image shape (height, width)
+
+    Returns:
+        (np.ndarray) flat pixel indices, in row-major order
+
+    """
+
+    return offset_indices(center, disk_offsets(int(radius)), shape)
+
+
+def annulus_indices(center, radii, shape):
+    """
+    Flat pixel indices of an annulus (clipped to the image), without rasterizing a mask.
+
+    Arguments:
+        (tuple) center: (x, y) annulus center
+        (tuple) radii: annulus (inner, outer) radii
+        (tuple) shape: image shape (height, width)
+
+    Returns:
+        (np.ndarray) flat pixel indices, in row-major order
+
+    """
+
+    return offset_indices(center, annulus_offsets(int(radii[0]), int(radii[1])), shape)
+
+
+def indices_mask(indices, shape):
+    """
+    Generates a boolean mask that is FALSE at the passed flat pixel indices (the convention of
+    numpy masked arrays: masked where TRUE).
+
+    Arguments:
+        (np.ndarray) indices: flat pixel indices
+        (tuple) shape: image shape (height, width)
+
+    Returns:
+        (np.ndarray) boolean mask
+
+    """
+
+    mask = np.ones(shape, dtype = bool)
+    mask.flat[indices] = False
+    return mask
+
+
+def row_prefix(stamps, power = 1):
+    """
+    Computes the row-wise cumulative sum of a stamp (or a stack of stamps), with a leading 
+    column of zeros, such that the sum of stamp[r, a:b] is prefix[r, b] - prefix[r, a].
+
+    Arguments:
+        (np.ndarray) stamps: stamp image of shape (height, width), or stamp stack of shape
+            (N, height, width)
+        (int) power: power of the intensities to sum (2 for sums of squares)
+
+    Returns:
+        (np.ndarray) int64 row prefix sums of shape (..., height, width+1)
+
+    """
+
+    values = stamps.astype(np.int64)
+    if power != 1:
+        values **= power
+    prefix = np.zeros(stamps.shape[:-1] + (stamps.shape[-1]+1,), dtype = np.int64)
+    np.cumsum(values, axis = -1, out = prefix[..., 1:])
+    return prefix
+
+
+def _disk_rows(prefix, cx, cy, radius, index = None):
+    """
+    Gathers the per-row span sums of disks of a single radius from row prefix sums.
+
+    Arguments:
+        (np.ndarray) prefix: row prefix sums of shape (height, width+1) or (N, height, width+1)
+        (np.ndarray) cx: candidate center x positions. For stacked prefixes, of shape (N, ...)
+        (np.ndarray) cy: candidate center y positions (same shape as cx)
+        (int) radius: disk radius
+        (np.ndarray | None) index: for stacked prefixes, the stamp index of each candidate (of 
+            shape cx.shape). If None, the leading axis of cx indexes the stamps.
+
+    Returns:
+        (tuple) span sums and span pixel counts, of shape cx.shape + (number of disk rows,)
+
+    """
+
+    dy, xleft, xright = _disk_spans(radius)
+    height, width = prefix.shape[-2], prefix.shape[-1]-1
+    cx = np.asarray(cx)[..., np.newaxis]
+    rows = np.asarray(cy)[..., np.newaxis] + dy
+    valid = (rows >= 0) & (rows < height)
+    rows = np.clip(rows, 0, height-1)
+    lo = np.clip(cx + xleft, 0, width)
+    hi = np.clip(cx + xright + 1, 0, width)
+    if prefix.ndim == 3:
+        if index is None:
+            n = np.arange(prefix.shape[0]).reshape((-1,) + (1,)*(rows.ndim-1))
+        else:
+            n = np.asarray(index)[..., np.newaxis]
+        spans = prefix[n, rows, hi] - prefix[n, rows, lo]
+    else:
+        spans = prefix[rows, hi] - prefix[rows, lo]
+    return np.where(valid, spans, 0), np.where(valid, hi-lo, 0)
+
+
+def disk_sums(prefix, cx, cy, radius, index = None):
+    """
+    Sums the stamp intensities within disks of a single radius for many candidate centers at
+    once. Disks are clipped to the stamp, as with cv2.circle.
+
+    Arguments:
+        (np.ndarray) prefix: stamp row prefix sums (see row_prefix), of shape (height, width+1) or
+            (N, height, width+1) for a stack of stamps
+        (np.ndarray) cx: candidate center x positions. For stacked prefixes, of shape (N, ...)
+        (np.ndarray) cy: candidate center y positions (same shape as cx)
+        (int) radius: disk radius
+        (np.ndarray | None) index: for stacked prefixes, the stamp index of each candidate (of 
+            shape cx.shape). If None, the leading axis of cx indexes the stamps.
+
+    Returns:
+        (np.ndarray) int64 summed intensities, of the same shape as cx
+
+    """
+
+    return _disk_rows(prefix, cx, cy, radius, index)[0].sum(axis = -1)
+
+
+def disk_stds(prefix, prefix2, cx, cy, radii):
+    """
+    Standard deviations of the stamp intensities within disks (clipped to the stamp), from the
+    row prefix sums of the intensities and of their squares. The variance numerator is computed
+    exactly in integer arithmetic.
+
+    Arguments:
+        (np.ndarray) prefix: row prefix sums of shape (N, height, width+1)
+        (np.ndarray) prefix2: row prefix sums of the squared intensities, of the same shape
+        (np.ndarray) cx: disk center x positions, of shape (N,)
+        (np.ndarray) cy: disk center y positions, of shape (N,)
+        (np.ndarray) radii: disk radii, of shape (N,)
+
+    Returns:
+        (np.ndarray) intensity standard deviations of shape (N,), NaN for empty disks
+
+    """
+
+    stds = np.full(len(radii), np.nan)
+    for radius in np.unique(radii):
+        group = np.flatnonzero(radii == radius)
+        s1, count = (a.sum(axis = -1) for a in _disk_rows(prefix[group], cx[group], cy[group], radius))
+        s2 = disk_sums(prefix2[group], cx[group], cy[group], radius)
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            stds[group] = np.sqrt((count*s2 - s1*s1).astype(float))/count
+    return stds
+
+
+def region_statistics(stamps, index, centers, offsets):
+    """
+    Intensity statistics of a pixel region (disk or annulus offsets) about centers in many 
+    stamps at once. Pixels are gathered by index into a (stamps, region pixels) array, 
+    with the region clipped to the stamp (as cv2.circle clips); no masks are rasterized.
+
+    Arguments:
+        (np.ndarray | raster.StampWindows) stamps: stamp stack of shape (N, height, width)
+        (np.ndarray) index: stamp index of each region, of shape (M,)
+        (np.ndarray) centers: region (x, y) centers of shape (M, 2)
+        (tuple) offsets: arrays (dy, dx) of the region pixel offsets
+
+    Returns:
+        (tuple) pixel counts, int64 intensity sums, intensity medians, and intensity standard 
+            deviations, each of shape (M,). Medians and standard deviations are NaN for empty 
+            regions.
+
+    """
+
+    dy, dx = offsets
+    if not len(dy):
+        return np.zeros(len(index), dtype = np.int64), np.zeros(len(index), dtype = np.int64), \
+            np.full(len(index), np.nan), np.full(len(index), np.nan)
+    height, width = stamps.shape[-2:]
+    rows = centers[:, 1, np.newaxis] + dy
+    cols = centers[:, 0, np.newaxis] + dx
+    valid = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    values = np.where(valid, stamps[index[:, np.newaxis], np.clip(rows, 0, height-1), 
+        np.clip(cols, 0, width-1)], 0).astype(np.int64)
+
+    counts = valid.sum(axis = 1)
+    sums = values.sum(axis = 1)
+    squares = (values*values).sum(axis = 1)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        stds = np.sqrt((counts*squares - sums*sums).astype(float))/counts
+
+    # Medians: partition regions lying wholly within the stamp, sort those clipped by its edge
+    medians = np.full(len(index), np.nan)
+    size = values.shape[1]
+    whole = counts == size
+    middle = np.partition(values[whole], ((size-1)//2, size//2), axis = 1)
+    medians[whole] = (middle[:, (size-1)//2] + middle[:, size//2])/2
+    clipped = np.flatnonzero(~whole & (counts > 0))
+    ordered = np.sort(np.where(valid[clipped], values[clipped], np.iinfo(np.int64).max), axis = 1)
+    n = np.arange(len(clipped))
+    medians[clipped] = (ordered[n, (counts[clipped]-1)//2] + ordered[n, counts[clipped]//2])/2
+    return counts, sums, medians, stds
+
+
+def disk_statistics(stamps, index, centers, radii, chunksize = 256):
+    """
+    Intensity statistics of disks (see region_statistics), grouped by radius.
+
+    Arguments:
+        (np.ndarray | raster.StampWindows) stamps: stamp stack of shape (N, height, width)
+        (np.ndarray) index: stamp index of each disk, of shape (M,)
+        (np.ndarray) centers: disk (x, y) centers of shape (M, 2)
+        (np.ndarray) radii: disk radii of shape (M,)
+        (int) chunksize: number of disks gathered at once, to bound memory
+
+    Returns:
+        (tuple) pixel counts, intensity sums, medians, and standard deviations of shape (M,)
+
+    """
+
+    return _grouped_statistics(stamps, index, centers, radii[:, np.newaxis], 
+        lambda key: disk_offsets(int(key[0])), chunksize)
+
+
+def annulus_statistics(stamps, index, centers, radii, chunksize = 256):
+    """
+    Intensity statistics of annuli (see region_statistics), grouped by radii.
+
+    Arguments:
+        (np.ndarray | raster.StampWindows) stamps: stamp stack of shape (N, height, width)
+        (np.ndarray) index: stamp index of each annulus, of shape (M,)
+        (np.ndarray) centers: annulus (x, y) centers of shape (M, 2)
+        (np.ndarray) radii: annulus (inner, outer) radii of shape (M, 2)
+        (int) chunksize: number of annuli gathered at once, to bound memory
+
+    Returns:
+        (tuple) pixel counts, intensity sums, medians, and standard deviations of shape (M,)
+
+    """
+
+    return _grouped_statistics(stamps, index, centers, radii, 
+        lambda key: annulus_offsets(int(key[0]), int(key[1])), chunksize)
+
+
+def _grouped_statistics(stamps, index, centers, keys, offsets, chunksize):
+    counts = np.zeros(len(index), dtype = np.int64)
+    sums = np.zeros(len(index), dtype = np.int64)
+    medians = np.full(len(index), np.nan)
+    stds = np.full(len(index), np.nan)
+    uniqueKeys, groups = np.unique(keys, axis = 0, return_inverse = True)
+    for g, key in enumerate(uniqueKeys):
+        members = np.flatnonzero(groups.ravel() == g)
+        for start in range(0, len(members), chunksize):
+            chunk = members[start:start+chunksize]
+            counts[chunk], sums[chunk], medians[chunk], stds[chunk] = region_statistics(stamps, 
+                index[chunk], centers[chunk], offsets(key))
+    return counts, sums, medians, stds
+
+
+def _column_search(prefix, xs, centers, best, radius, refiningRange):
+    """
+    Refines disk centers by maximizing the summed intensity over a local search grid, for a
+    stack of stamps. Mirrors the sequential grid search: the grid columns (x) are fixed up front,
+    and the rows (y) of each column are centered on the best center found so far. Only strict
+    improvements are accepted, so ties resolve to the first candidate in search order.
+
+    Arguments:
+        (np.ndarray) prefix: stamp row prefix sums of shape (N, height, width+1)
+        (np.ndarray) xs: candidate x positions (grid columns) of shape (N, columns)
+        (np.ndarray) centers: starting (x, y) centers of shape (N, 2)
+        (np.ndarray) best: summed intensities to improve upon, of shape (N,)
+        (int) radius: disk radius
+        (int) refiningRange: half-width of the search grid rows
+
+    Returns:
+        (tuple) the best (x, y) centers, their summed intensities, and flags for whether
+            they improved
+
+    """
+
+    n = np.arange(len(centers))
+    centers = centers.copy()
+    best = best.copy()
+    improved = np.zeros(len(centers), dtype = bool)
+    for x in xs.T:
+        ys = np.linspace(centers[:, 1]-refiningRange, centers[:, 1]+refiningRange, num = 2*refiningRange, 
+            dtype = int, axis = -1)
+        sums = disk_sums(prefix, np.broadcast_to(x[:, np.newaxis], ys.shape), ys, radius)
+        k = np.argmax(sums, axis = 1)
+        better = sums[n, k] > best
+        best[better] = sums[n, k][better]
+        centers[better] = np.stack((x, ys[n, k]), axis = 1)[better]
+        improved |= better
+    return centers, best, improved
+
+
+def find_button(stamp, **kwargs):
+    """
+    Button finding for a single stamp (see find_buttons).
+
+    Arguments:
+        (np.ndarray) stamp: 2-D stamp image
+        (dict) kwargs: search parameters passed to find_buttons
+
+    Returns:
+        (tuple) the button (x, y) center, and a flag that is False if no intensity was observed
+
+    """
+
+    centers, found = find_buttons(stamp[np.newaxis], **kwargs)
+    return (int(centers[0, 0]), int(centers[0, 1])), bool(found[0])
+
+
+def find_buttons(stamps, searchSpacing = 7, radius = 15, tileWidth = 110, tileHeight = 110,
+    refiningRange = 7, minRadius = 9, stdCutoff = 0.9, boundingInsetRatio = 0.3, chunksize = 256):
+    """
+    Button finding using Craig's "grid search" optimization, vectorized over a stack of stamps.
+    The summed intensities of all candidate disks of a search grid are read from row prefix
+    sums (summed-area tables), without rasterizing masks, and the search returns the same 
+    optimum as the mask-based search. The stack is processed in chunks of stamps to bound
+    the memory of the prefix sums.
+
+    Searches sparse grid of tile position centers, finds optimum, then refines by searching local 
+    neighborhood. Then, fits the radius and re-fits the centerposition after each decrease in radius.
+    Terminates when either the minRadius is reached or the standard deviation within the found 
+    circle border falls below the specified threshold.
+
+    Arguments:
+        (np.ndarray) stamps: stamp stack of shape (N, height, width)
+        (int) searchSpacing: spacing of the sparse initial search grid
+        (int) radius: initial disk radius
+        (int) tileWidth: width of the initial search region
+        (int) tileHeight: height of the initial search region
+        (int) refiningRange: half-width of the local refinement grids
+        (int) minRadius: minimum fitted radius
+        (float) stdCutoff: fraction of the initial disk standard deviation below which the
+            radius fitting terminates
+        (float) boundingInsetRatio: inset of the initial search grid, as a fraction of the tile
+        (int) chunksize: number of stamps processed at once
+
+    Returns:
+        (tuple) button (x, y) centers of shape (N, 2), and flags of shape (N,) that are False
+            where no intensity was observed
+
+    """
+
+    params = (searchSpacing, radius, tileWidth, tileHeight, refiningRange, minRadius, stdCutoff, boundingInsetRatio)
+    results = [_find_buttons(stamps[i:i+chunksize], *params) for i in range(0, len(stamps), chunksize)]
+    if not results:
+        return np.zeros((0, 2), dtype = int), np.zeros(0, dtype = bool)
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+def _find_buttons(stamps, searchSpacing, radius, tileWidth, tileHeight, refiningRange, minRadius, 
+    stdCutoff, boundingInsetRatio):
+    """
+    Vectorized button grid search on a chunk of stamps (see find_buttons).
+    """
+
+    N = len(stamps)
+    n = np.arange(N)
+    prefix = row_prefix(stamps)
+    prefix2 = row_prefix(stamps, power = 2)
+    boundingInset = int(tileWidth*boundingInsetRatio)
+
+    #Crude initial fit of center position (sparse initial search grid) by maximizing summed intensity
+    xs = np.arange(boundingInset, tileWidth-boundingInset, searchSpacing)
+    ys = np.arange(boundingInset, tileHeight-boundingInset, searchSpacing)
+    cx, cy = (np.broadcast_to(a.ravel(), (N, a.size)) for a in np.meshgrid(xs, ys, indexing = 'ij'))
+    sums = disk_sums(prefix, cx, cy, radius)
+    k = np.argmax(sums, axis = 1)
+    maxI = sums[n, k]
+    centers = np.stack((cx[n, k], cy[n, k]), axis = 1)
+
+    #If the image is perfectly black in the bounding region, just pick the center position as a placeholder
+    found = maxI > 0
+    centers[~found] = (int(tileWidth/2), int(tileHeight/2))
+
+    # Fine-tuning center position (dense local grid) by maximizing summed intensity
+    active = np.flatnonzero(found)
+    xs = np.linspace(centers[active, 0]-refiningRange, centers[active, 0]+refiningRange, num = 2*refiningRange, 
+        dtype = int, axis = -1)
+    centers[active], _, _ = _column_search(prefix[active], xs, centers[active], maxI[active], radius, refiningRange)
+    refStdDev = disk_stds(prefix, prefix2, centers[:, 0], centers[:, 1], np.full(N, radius))
+
+    #Refines center position by optimizing radius via watershed method
+    #Per stamp, runs while the best radius is above minRadius, as the sequential search does. Where
+    #no candidate improves, the radius stalls: the center is kept, and the (nested) smaller disks
+    #about the same candidates cannot improve either, so the stamp is done
+    fitRadius = radius
+    bestRadius = np.full(N, radius)
+    while True:
+        active = active[bestRadius[active] > minRadius]
+        if not len(active):
+            break
+        fitRadius -= 1
+        xs = np.linspace(centers[active, 0]-refiningRange, centers[active, 0]+refiningRange, num = 2*refiningRange, 
+            dtype = int, axis = -1)
+        centerAtRadius, _, improved = _column_search(prefix[active], xs, centers[active], np.zeros(len(active)), 
+            fitRadius, refiningRange)
+        radiusAtRadius = np.where(improved, fitRadius, bestRadius[active])
+        centers[active] = centerAtRadius
+        #If the radius has shrunk the optimal circle to w/in bright bounds, stop the fitting and use that circle center
+        stds = disk_stds(prefix[active], prefix2[active], centerAtRadius[:, 0], centerAtRadius[:, 1], radiusAtRadius)
+        converged = stds < stdCutoff*refStdDev[active]
+        bestRadius[active] = radiusAtRadius
+        active = active[~converged & improved]
+
+    return centers, found
+
+
+def gradient_magnitude(img):
+    """
+    L1 Sobel gradient magnitude of an 8-bit image, as computed within cv2.Canny (and therefore
+    within cv2.HoughCircles).
+
+    Arguments:
+        (np.ndarray) img: 2-D uint8 image
+
+    Returns:
+        (np.ndarray) int32 gradient magnitudes
+
+    """
+
+    dx = cv2.Sobel(img, cv2.CV_16S, 1, 0, ksize = 3, borderType = cv2.BORDER_REPLICATE)
+    dy = cv2.Sobel(img, cv2.CV_16S, 0, 1, ksize = 3, borderType = cv2.BORDER_REPLICATE)
+    return np.abs(dx.astype(np.int32)) + np.abs(dy.astype(np.int32))
+
+
+def find_chamber(stamp, chamberRadius = 33, outerChamberBound = 5, param1 = 50, param2 = 40):
+    """
+    Uses Hough transform to find a chamber. If no circle is found, the gradient threshold 
+    (param1) is loosened until one is. Of the circles found, that of highest summed intensity 
+    is selected.
+
+    The loosening only runs the Hough transform for thresholds that can change its result: 
+    cv2.HoughCircles depends on param1 only through its Canny edge map, so thresholds above 
+    the peak gradient magnitude (no edges), and thresholds yielding an edge map that already 
+    failed, are skipped. The result is identical to trying every threshold.
+
+    Arguments:
+        (np.ndarray) stamp: 2-D stamp image
+        (int) chamberRadius: minimum chamber radius
+        (int) outerChamberBound: chamber radius search range
+        (int) param1: Hough gradient (Canny) threshold
+        (int) param2: Hough accumulator threshold
+
+    Returns:
+        (tuple | None) the chamber (x, y) center and radius, or None if no chamber was found
+
+    """
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore") # Will throw warning due to precision loss
+        cimg = skimage.img_as_ubyte(stamp, force_copy = True);
+    
+    # searchRadii
+    minRad = chamberRadius
+    maxRad = minRad + outerChamberBound
+
+    # find circles
+    circles = cv2.HoughCircles(cimg,cv2.HOUGH_GRADIENT,2,10,param1=param1,param2=param2, minRadius=minRad, maxRadius=maxRad)
+    
+    # If no circles found, loosen gradient threshold
+    if type(circles) is not np.ndarray:
+        circlePara1Index = min(param1, int(gradient_magnitude(cimg).max()))
+        failedEdges = set()
+        while type(circles) is not np.ndarray and circlePara1Index > 5:
+            edges = cv2.Canny(cimg, max(circlePara1Index//2, 1), circlePara1Index, apertureSize = 3)
+            key = edges.tobytes()
+            if edges.any() and key not in failedEdges:
+                circles = cv2.HoughCircles(cimg,cv2.HOUGH_GRADIENT,2,10,param1=circlePara1Index, param2=param2, minRadius=minRad+1, maxRadius=maxRad+2)
+                failedEdges.add(key)
+            circlePara1Index -= 1
+    
+    # If still none found, the chamber finding failed
+    if not np.any(circles): 
+        return None
+    
+    # Else, round the resulting circle params
+    circles = np.around(circles)
+    
+    # Then select circle of highest summed I from those found
+    bestCircle = circles[0, 0]
+    bestIntensity = 0
+    for i in circles[0,:]:
+        if len(circles[0,:]) == 1: 
+            break
+        #pick the set of circles that maximizes intensity inside of it (may have ties)
+        circleResultsSum = np.sum(np.take(cimg, disk_indices((int(i[0]), int(i[1])), i[2], cimg.shape)))
+        if circleResultsSum > bestIntensity: 
+            bestIntensity = circleResultsSum
+            bestCircle = i
+    
+    return (int(bestCircle[0]), int(bestCircle[1])), int(bestCircle[2])
+
+
+def find_chambers(stamps, **kwargs):
+    """
+    Chamber finding for a stack of stamps (see find_chamber).
+
+    Arguments:
+        (np.ndarray) stamps: stamp stack of shape (N, height, width)
+        (dict) kwargs: search parameters passed to find_chamber
+
+    Returns:
+        (tuple) chamber (x, y) centers of shape (N, 2), radii of shape (N,), and flags of 
+            shape (N,) that are False where no chamber was found
+
+    """
+
+    centers = np.zeros((len(stamps), 2), dtype = int)
+    radii = np.zeros(len(stamps), dtype = int)
+    found = np.zeros(len(stamps), dtype = bool)
+    for i, stamp in enumerate(stamps):
+        result = find_chamber(stamp, **kwargs)
+        if result is not None:
+            centers[i], radii[i] = result
+            found[i] = True
+    return centers, radii, found
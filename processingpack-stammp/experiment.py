@@ -12,9 +12,10 @@
 import os
 from pathlib import Path
 import logging
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 # Scientific Data Structures and Plotting
+import numpy as np
 import pandas as pd
 
 
@@ -112,7 +113,12 @@ class Experiment:
         return ('Description: {}, Operator: {}'.format(self.info, self.operator))
 
 
+DeviceGeometry = namedtuple('DeviceGeometry', ['centers', 'slices', 'ids', 'width'])
+
+
 class Device:
+    geometry_cache_size = 8 # geometries cached per device (see Device.geometry)
+
     def __init__(self, setup, dname, dims, pinlist, corners, operators = 'FordyceLab', attrs = None):
         """
         Constructor for the Device class.
@@ -140,6 +146,86 @@ class Device:
         self.attrs = attrs #arbitrary metadata, as a dict
         self.experiments = None
         self.corners = Device._corners(corners)
+        self._geometry = OrderedDict() # least recently used last
+
+
+    def geometry(self, corners = None, width = 100, pinlist = None):
+        """
+        Gets the chamber lattice of the device: stamp center positions, stamp slice bounds, and 
+        pinlist identifiers. The geometry is computed once per (corners, width, pinlist MutantIDs) and 
+        cached, so every ChipImage on the device shares the same (read-only) arrays. The pinlist is
+        keyed by its content (digested once, when set on the device; see Device.pinlist), such that
+        replaced pinlists are not served stale. At most Device.geometry_cache_size geometries are 
+        cached.
+
+        Arguments:
+            (tuple | namedtuple | None) corners: corner positions of the form 
+                ((ULx, ULy),(URx, URy),(LLx, LLy),(LRx, LRy)). Defaults to the device corners.
+            (int) width: stamp width (pixels)
+            (pd.DataFrame | None) pinlist: pinlist indexed by (x, y). Defaults to the device pinlist.
+
+        Returns:
+            (DeviceGeometry) namedtuple of centers (dims.x, dims.y, 2), slices (dims.x, dims.y, 2, 2) 
+                of the form [[rowstart, rowstop], [colstart, colstop]], ids (dims.x, dims.y), and width
+
+        """
+
+        from processingpack.chip import ChipImage
+
+        if corners is None:
+            corners = self.corners
+        if pinlist is None or pinlist is self.pinlist:
+            mutants, digest = self._pinlist_digest
+        else:
+            mutants, digest = self._digest(pinlist)
+        corners = Device._corners(tuple(tuple(c) for c in corners))
+        key = (corners, width, digest)
+        if key in self._geometry:
+            self._geometry.move_to_end(key)
+        else:
+            half = width//2
+            centers = ChipImage.quadrilateralInterp(corners, self.dims).astype(np.int32)
+            slices = np.stack((centers[..., ::-1]-half, centers[..., ::-1]+half), axis = -1)
+            ids = mutants.values.astype(object).reshape(self.dims.x, self.dims.y)
+            for a in (centers, slices, ids):
+                a.flags.writeable = False
+            self._geometry[key] = DeviceGeometry(centers, slices, ids, width)
+            while len(self._geometry) > Device.geometry_cache_size:
+                self._geometry.popitem(last = False)
+            logging.debug('Computed Device Geometry | Device: {}'.format(self.__str__()))
+        return self._geometry[key]
+
+    @property
+    def pinlist(self):
+        return self._pinlist
+
+
+    @pinlist.setter
+    def pinlist(self, pinlist):
+        """
+        Sets the device pinlist and digests its MutantIDs, to key the device geometry (see 
+        Device.geometry). A pinlist edited in place must be set again for the edits to apply.
+        """
+
+        self._pinlist = pinlist
+        self._pinlist_digest = self._digest(pinlist)
+
+
+    def _digest(self, pinlist):
+        """
+        Gets the MutantIDs of a pinlist in chip index (x-major) order, and a digest of them.
+
+        Arguments:
+            (pd.DataFrame) pinlist: pinlist indexed by (x, y)
+
+        Returns:
+            (tuple) the MutantIDs (pd.Series), and their digest (tuple of dtype and hash bytes)
+
+        """
+
+        index = pd.MultiIndex.from_product([range(1, self.dims.x+1), range(1, self.dims.y+1)])
+        mutants = pinlist.loc[index, 'MutantID']
+        return mutants, (str(mutants.dtype), pd.util.hash_pandas_object(mutants).values.tobytes())
 
     @staticmethod
     def _corners(corners):
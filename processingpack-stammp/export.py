@@ -0,0 +1,239 @@
+# title             : export.py
+# description       : Columnar (Parquet, Feather) export and loading of summaries
+# authors           : Daniel Mokhtari
+# credits           : Craig Markin
+# date              : 20180615
+# version update    : 20200913
+# version           : 0.1.0
+# python_version    : 3.7
+
+# General Python
+import os
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+# format: (file extension, default compression codec). Both formats require pyarrow.
+formats = {'parquet': ('parquet', 'zstd'), 'feather': ('feather', 'lz4')}
+
+
+def require_pyarrow():
+    """
+    Checks that pyarrow, which Parquet and Feather summaries require, is installed (see the
+    'parquet' extra of the package).
+
+    Arguments:
+        None
+
+    Returns:
+        None
+
+    """
+
+    if pyarrow is None:
+        raise ImportError('Parquet and Feather summaries require pyarrow (pip install pyarrow)')
+
+
+def summary_path(root, device, description, kind, fmt = 'parquet'):
+    """
+    Gets the path of a summary in a summary directory partitioned by device and series
+    description: root/device=<dname>/series=<description>/<kind>.<extension>
+
+    Arguments:
+        (str | pathlib.Path) root: summary directory
+        (experiment.Device) device: device object
+        (str) description: series description
+        (str) kind: summary type (e.g., 'ChipSeries', 'StandardSeries_Analysis', 'ChipQuant')
+        (str) fmt: file format ('parquet' | 'feather')
+
+    Returns:
+        (pathlib.Path) the summary file path
+
+    """
+
+    if fmt not in formats:
+        raise ValueError('Summary format must be one of {}, not {}'.format(list(formats), fmt))
+    extension = formats[fmt][0]
+    return Path(root) / 'device={}'.format(device.dname) / 'series={}'.format(description) / '{}.{}'.format(kind, extension)
+
+
+def save_summary(df, root, device, description, kind, fmt = 'parquet', compression = None):
+    """
+    Writes a summary DataFrame (see chip.StampGrid.summary_columns) to a partitioned summary
+    directory (see summary_path). The chip indices (x, y) are stored as columns.
+
+    Arguments:
+        (pd.DataFrame) df: summary indexed by the chip indices (x, y)
+        (str | pathlib.Path) root: summary directory
+        (experiment.Device) device: device object
+        (str) description: series description
+        (str) kind: summary type (e.g., 'ChipSeries', 'StandardSeries_Analysis', 'ChipQuant')
+        (str) fmt: file format ('parquet' | 'feather')
+        (str | None) compression: compression codec. If None, uses the format default ('zstd'
+            for Parquet, 'lz4' for Feather).
+
+    Returns:
+        (pathlib.Path) the summary file path
+
+    """
+
+    path = summary_path(root, device, description, kind, fmt)
+    require_pyarrow()
+    os.makedirs(str(path.parent), exist_ok = True)
+    compression = compression if compression else formats[fmt][1]
+    table = df.reset_index()
+    partial = path.with_name(path.name + '.partial') # replaced once written
+    if fmt == 'parquet':
+        table.to_parquet(str(partial), compression = compression, index = False)
+    else:
+        table.to_feather(str(partial), compression = compression)
+    os.replace(str(partial), str(path))
+    logging.debug('Saved Summary | Path: {}'.format(path))
+    return path
+
+
+def load_summary(path, columns = None):
+    """
+    Loads a summary written with save_summary.
+
+    Arguments:
+        (str | pathlib.Path) path: summary file path (.parquet | .feather)
+        (list | None) columns: summary columns to load (the chip indices are always loaded). If
+            None, loads all columns.
+
+    Returns:
+        (pd.DataFrame) summary indexed by the chip indices (x, y)
+
+    """
+
+    path = Path(path)
+    if path.suffix not in ('.parquet', '.feather'):
+        raise ValueError('Unknown summary format: {}'.format(path))
+    require_pyarrow()
+    if columns is not None:
+        columns = ['x', 'y'] + [c for c in columns if c not in ('x', 'y')]
+    if path.suffix == '.parquet':
+        df = pd.read_parquet(str(path), columns = columns)
+    else:
+        df = pd.read_feather(str(path), columns = columns)
+    return df.set_index(['x', 'y'])
+
+
+def load_summaries(root, fmt = 'parquet', kind = '*', devices = None, descriptions = None, columns = None):
+    """
+    Loads and concatenates the summaries of a partitioned summary directory (see summary_path),
+    adding the device name ('device') and series description ('series') of each.
+
+    Arguments:
+        (str | pathlib.Path) root: summary directory
+        (str) fmt: file format ('parquet' | 'feather')
+        (str) kind: summary type, or a glob pattern of summary types
+        (list | None) devices: device names to load. If None, loads all devices.
+        (list | None) descriptions: series descriptions to load. If None, loads all series.
+        (list | None) columns: summary columns to load (see load_summary)
+
+    Returns:
+        (pd.DataFrame) the concatenated summaries, indexed by the chip indices (x, y)
+
+    """
+
+    if fmt not in formats:
+        raise ValueError('Summary format must be one of {}, not {}'.format(list(formats), fmt))
+    pattern = 'device=*/series=*/{}.{}'.format(kind, formats[fmt][0])
+    summaries = []
+    for path in sorted(Path(root).glob(pattern)):
+        dname = path.parent.parent.name.split('=', 1)[1]
+        description = path.parent.name.split('=', 1)[1]
+        if devices is not None and dname not in devices:
+            continue
+        if descriptions is not None and description not in descriptions:
+            continue
+        df = load_summary(path, columns)
+        df['device'] = dname
+        df['series'] = description
+        summaries.append(df)
+    if not summaries:
+        raise ValueError('No {} summaries found in {}'.format(fmt, root))
+    logging.debug('Loaded {} Summaries | Root: {}'.format(len(summaries), root))
+    return pd.concat(summaries)
+
+
+def manifest_path(summary):
+    """
+    Gets the path of the manifest of a summary file (see load_manifest).
+
+    Arguments:
+        (str | pathlib.Path) summary: summary file path
+
+    Returns:
+        (pathlib.Path) the manifest file path
+
+    """
+
+    summary = Path(summary)
+    return summary.with_name(summary.name + '.manifest.json')
+
+
+def file_state(path):
+    """
+    Gets the modification time and size of a file, to detect changes to it.
+
+    Arguments:
+        (str | pathlib.Path) path: file path
+
+    Returns:
+        (dict) modification time (ns) and size (bytes) of the file
+
+    """
+
+    stat = os.stat(str(path))
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def load_manifest(path):
+    """
+    Loads a summary manifest: the summarized image files, with their identifiers and file states
+    (see file_state), and the parameters they were summarized with.
+
+    Arguments:
+        (str | pathlib.Path) path: manifest file path
+
+    Returns:
+        (dict | None) the manifest, or None if there is none
+
+    """
+
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(str(path)) as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    """
+    Writes a summary manifest (see load_manifest). The manifest is replaced only once written.
+
+    Arguments:
+        (str | pathlib.Path) path: manifest file path
+        (dict) manifest: JSON-serializable manifest
+
+    Returns:
+        None
+
+    """
+
+    path = Path(path)
+    partial = path.with_name(path.name + '.partial')
+    with open(str(partial), 'w') as f:
+        json.dump(manifest, f, indent = 1)
+    os.replace(str(partial), str(path))
+    logging.debug('Saved Manifest | Path: {}'.format(path))
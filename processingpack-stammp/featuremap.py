@@ -0,0 +1,258 @@
+# title             : featuremap.py
+# description       : Serializable chamber and button feature maps
+# authors           : Daniel Mokhtari
+# credits           : Craig Markin
+# date              : 20180615
+# version update    : 20200913
+# version           : 0.1.0
+# python_version    : 3.7
+
+# General Python
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from processingpack import experiment
+from processingpack.chip import StampGrid
+
+
+class FeatureMap:
+    _arrays = ['chamber_defined', 'chamber_blank', 'chamber_centers', 'chamber_radii',
+                'button_defined', 'button_blank', 'button_centers', 'button_radii', 'button_annulus_radii']
+
+    def __init__(self, geometry, grid, attrs = None):
+        """
+        Constructor for a FeatureMap object. A FeatureMap is the found chamber and button
+        geometry of a processed chip image (the device geometry, and the per-chamber feature
+        centers and radii), without any image data. It can be saved, loaded, and used in place
+        of the reference ChipImage for feature mapping.
+
+        Arguments:
+            (experiment.DeviceGeometry) geometry: the device geometry
+            (chip.StampGrid) grid: a StampGrid holding the feature geometry (without stamp data)
+            (dict) attrs: source metadata (raster path, content hash, device, etc.)
+
+        Returns:
+            None
+
+        """
+
+        self.geometry = geometry
+        self.stamps = grid
+        self.attrs = attrs if attrs is not None else {}
+
+
+    @classmethod
+    def from_chip(cls, chip, digest = None):
+        """
+        Exports the feature geometry of a processed ChipImage as a FeatureMap.
+
+        Arguments:
+            (chip.ChipImage) chip: the processed (stamped, with found features) ChipImage
+            (str | None) digest: content hash of the image file, if already computed (see 
+                content_hash)
+
+        Returns:
+            (FeatureMap) the feature map
+
+        """
+
+        grid = StampGrid(None, chip.geometry)
+        grid.copy_features(chip.stamps, 'all')
+        attrs = {'raster': str(chip.data_ref),
+                'hash': digest if digest is not None else content_hash(chip.data_ref),
+                'setup': chip.device.setup,
+                'dname': chip.device.dname,
+                'dims': [int(i) for i in chip.device.dims],
+                'corners': [[int(i) for i in c] for c in chip.corners]}
+        return cls(chip.geometry, grid, attrs)
+
+
+    def defines(self, features = 'all'):
+        """
+        Checks whether the FeatureMap holds the passed features.
+
+        Arguments:
+            (str) features: features ('chamber', 'button', 'all')
+
+        Returns:
+            (bool) whether the features are defined
+
+        """
+
+        chambers = bool(self.stamps.chamber_defined.any())
+        buttons = bool(self.stamps.button_defined.any())
+        return {'chamber': chambers, 'button': buttons, 'all': chambers and buttons}[features]
+
+
+    def fits(self, geometry):
+        """
+        Checks whether the FeatureMap was found on stamps of the passed device geometry (the 
+        same stamp lattice, positions, and width), such that its features can be reused as is.
+
+        Arguments:
+            (experiment.DeviceGeometry) geometry: device geometry of the stamps
+
+        Returns:
+            (bool) whether the geometries match
+
+        """
+
+        g = self.geometry
+        return (g.width == geometry.width and g.centers.shape == geometry.centers.shape 
+            and np.array_equal(g.centers, geometry.centers) and np.array_equal(g.slices, geometry.slices))
+
+
+    def mapto(self, target, features = 'all'):
+        """
+        Maps the feature positions onto a target ChipImage (see ChipImage.mapto).
+
+        Arguments:
+            (chip.ChipImage) target: ChipImage to map to (must be stamped)
+            (str) features: features to map ('chamber', 'button', 'all')
+
+        Returns:
+            None
+
+        """
+
+        target.stamps.copy_features(self.stamps, features)
+        target.stamps.quantify(features)
+
+
+    def save(self, path):
+        """
+        Saves the FeatureMap as a compressed numpy archive (.npz). The metadata, and the pinlist
+        identifiers (such that their types, e.g. integer or NaN MutantIDs, are kept), are stored 
+        as JSON within the archive.
+
+        Arguments:
+            (str | pathlib.Path) path: target file path
+
+        Returns:
+            None
+
+        """
+
+        g = self.geometry
+        arrays = {a: getattr(self.stamps, a) for a in FeatureMap._arrays}
+        np.savez_compressed(str(path), centers = g.centers, slices = g.slices, ids = json.dumps(g.ids.tolist(), default = _item),
+            width = g.width, attrs = json.dumps(self.attrs), **arrays)
+        logging.debug('Saved FeatureMap | {}'.format(path))
+
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a FeatureMap saved with FeatureMap.save.
+
+        Arguments:
+            (str | pathlib.Path) path: FeatureMap file path
+
+        Returns:
+            (FeatureMap) the feature map
+
+        """
+
+        with np.load(str(path)) as f:
+            if f['ids'].ndim: # saved as strings
+                ids = f['ids'].astype(object)
+            else:
+                ids = np.empty(f['centers'].shape[:2], dtype = object)
+                ids[...] = json.loads(str(f['ids']))
+            geometry = experiment.DeviceGeometry(f['centers'], f['slices'], ids, int(f['width']))
+            for a in (geometry.centers, geometry.slices, geometry.ids):
+                a.flags.writeable = False
+            grid = StampGrid(None, geometry)
+            for a in FeatureMap._arrays:
+                setattr(grid, a, f[a])
+            attrs = json.loads(str(f['attrs']))
+        logging.debug('Loaded FeatureMap | {}'.format(path))
+        return cls(geometry, grid, attrs)
+
+
+    def __str__(self):
+        return ('FeatureMap| Raster: {}, Device: {}'.format(self.attrs.get('raster'),
+            str((self.attrs.get('setup'), self.attrs.get('dname')))))
+
+
+    def _repr_pretty_(self, p, cycle = True):
+        p.text('<{}>'.format(self.__str__()))
+
+
+
+def _item(value):
+    """
+    JSON encoder fallback for numpy scalars (e.g., pinlist identifiers).
+    """
+
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError('{} is not JSON serializable'.format(type(value).__name__))
+
+
+
+def content_hash(path, blocksize = 2**20):
+    """
+    Hashes the content of an image file (SHA-1), to key the FeatureMaps of an image.
+
+    Arguments:
+        (str | pathlib.Path) path: image file path
+        (int) blocksize: read block size (bytes)
+
+    Returns:
+        (str) hexadecimal digest
+
+    """
+
+    h = hashlib.sha1()
+    with open(str(path), 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def store(fmap, root):
+    """
+    Saves a FeatureMap to a directory of feature maps, keyed by the content hash of its image.
+
+    Arguments:
+        (FeatureMap) fmap: feature map
+        (str | pathlib.Path) root: feature map directory
+
+    Returns:
+        (pathlib.Path) the feature map file path
+
+    """
+
+    os.makedirs(str(root), exist_ok = True)
+    path = Path(root) / '{}.npz'.format(fmap.attrs['hash'])
+    fmap.save(path)
+    return path
+
+
+def lookup(raster, root, digest = None):
+    """
+    Finds the stored FeatureMap of an image in a directory of feature maps (see store).
+
+    Arguments:
+        (str | pathlib.Path) raster: image file path
+        (str | pathlib.Path) root: feature map directory
+        (str | None) digest: content hash of the image file, if already computed (see 
+            content_hash)
+
+    Returns:
+        (FeatureMap | None) the stored feature map of the image, or None if there is none
+
+    """
+
+    digest = digest if digest is not None else content_hash(raster)
+    path = Path(root) / '{}.npz'.format(digest)
+    if not path.exists():
+        return None
+    logging.debug('Found Stored FeatureMap | Raster: {}'.format(raster))
+    return FeatureMap.load(path)
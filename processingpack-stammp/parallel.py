@@ -0,0 +1,167 @@
+# title             : parallel.py
+# description       : Pooled execution of stamp stack and image operations
+# authors           : Daniel Mokhtari
+# credits           : Craig Markin
+# date              : 20180615
+# version update    : 20200913
+# version           : 0.1.0
+# python_version    : 3.7
+
+# General Python
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError: # Python < 3.8
+    shared_memory = None
+
+
+_shared = {} # worker-side attached stamp stack
+
+
+def _attach(name, shape, dtype):
+    """
+    Pool initializer: attaches the worker process to the shared stamp stack.
+
+    Arguments:
+        (str) name: shared memory block name
+        (tuple) shape: stamp stack shape
+        (str) dtype: stamp stack dtype
+
+    Returns:
+        None
+
+    """
+
+    shm = shared_memory.SharedMemory(name = name)
+    _shared['shm'] = shm
+    _shared['stack'] = np.ndarray(shape, dtype = dtype, buffer = shm.buf)
+
+
+def _run_shared(task):
+    func, start, stop = task
+    return func(_shared['stack'][start:stop])
+
+
+def _run(task):
+    func, stamps = task
+    return func(stamps)
+
+
+def map_stamps(stack, func, workers, chunks_per_worker = 4):
+    """
+    Applies func to chunks of a stamp stack on a process pool and concatenates the results.
+    The stack is placed in shared memory (multiprocessing.shared_memory) so that it is not
+    pickled to the workers; on Python < 3.8 the chunks are pickled instead.
+
+    Arguments:
+        (np.ndarray) stack: stamp stack of shape (N, height, width)
+        (callable) func: picklable function of a stamp stack chunk (n, height, width) returning an
+            array, or a tuple of arrays, with a leading axis of length n
+        (int) workers: number of worker processes
+        (int) chunks_per_worker: number of chunks the stack is split into per worker
+
+    Returns:
+        (np.ndarray | tuple) the concatenated result(s) of func
+
+    """
+
+    bounds = np.linspace(0, len(stack), min(len(stack), workers*chunks_per_worker)+1, dtype = int)
+    spans = [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    logging.debug('Mapping {} Stamps in {} Chunks on {} Workers'.format(len(stack), len(spans), workers))
+
+    if shared_memory is None:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_run, [(func, stack[start:stop]) for start, stop in spans]))
+    else:
+        shm = shared_memory.SharedMemory(create = True, size = max(stack.nbytes, 1))
+        try:
+            np.ndarray(stack.shape, dtype = stack.dtype, buffer = shm.buf)[:] = stack
+            initargs = (shm.name, stack.shape, stack.dtype.str)
+            with ProcessPoolExecutor(workers, initializer = _attach, initargs = initargs) as pool:
+                results = list(pool.map(_run_shared, [(func, start, stop) for start, stop in spans]))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    if isinstance(results[0], tuple):
+        return tuple(np.concatenate(r) for r in zip(*results))
+    return np.concatenate(results)
+
+
+def _set_context(context):
+    """
+    Pool initializer: stores the context shared by all tasks of the worker process.
+
+    Arguments:
+        (object) context: picklable task context
+
+    Returns:
+        None
+
+    """
+
+    _shared['context'] = context
+
+
+def _run_context(task):
+    func, item = task
+    return func(_shared['context'], item)
+
+
+def map_items(func, items, workers, context = None):
+    """
+    Applies func to each item on a process pool, as a generator of the results (in item order).
+    The context is sent to each worker process once, when it starts, rather than with each item.
+
+    Arguments:
+        (callable) func: picklable function of the context and an item
+        (list) items: picklable items
+        (int) workers: number of worker processes
+        (object) context: picklable context shared by all items
+
+    Yields:
+        (object) the result of func for each item
+
+    """
+
+    logging.debug('Mapping {} Items on {} Workers'.format(len(items), workers))
+    with ProcessPoolExecutor(workers, initializer = _set_context, initargs = (context,)) as pool:
+        for result in pool.map(_run_context, [(func, item) for item in items]):
+            yield result
+
+
+def prefetch(func, items, depth = 2):
+    """
+    Applies func to each item on a thread pool, running ahead of the consumer by at most depth
+    items, as a generator of the results (in item order). Intended for I/O (e.g., raster reads, 
+    during which the GIL is released) overlapping the consumer's computation. At most depth 
+    results are held at once.
+
+    Arguments:
+        (callable) func: function of an item
+        (iterable) items: items
+        (int) depth: number of items processed ahead (and threads)
+
+    Yields:
+        (object) the result of func for each item
+
+    """
+
+    items = iter(items)
+    with ThreadPoolExecutor(max(depth, 1)) as pool:
+        pending = deque(pool.submit(func, item) for _, item in zip(range(max(depth, 1)), items))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for item in items:
+                    pending.append(pool.submit(func, item))
+                    break
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
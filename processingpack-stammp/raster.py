@@ -0,0 +1,251 @@
+# title             : raster.py
+# description       : Windowed reading of rastered (stitched) chip images, pyramidal TIFF writing
+# authors           : Daniel Mokhtari
+# credits           : Craig Markin
+# date              : 20180615
+# version update    : 20200913
+# version           : 0.1.0
+# python_version    : 3.7
+
+# General Python
+import logging
+from pathlib import Path
+
+import numpy as np
+import cv2
+import skimage
+from skimage import io
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+def read_windowed(path, centers, width):
+    """
+    Reads a rastered chip image such that at least the stamp windows around the passed centers
+    are populated. Uncompressed, contiguous TIFFs are memory-mapped (only the pages under the
+    stamps are ever touched), and for tiled or stripped TIFFs only the segments that overlap
+    a stamp are decoded. Other formats fall back to reading the full image.
+
+    Arguments:
+        (str | pathlib.Path) path: path of the rastered image file
+        (np.ndarray) centers: array of chamber (x, y) center positions of shape (dims.x, dims.y, 2)
+        (int) width: stamp width (pixels)
+
+    Returns:
+        (np.ndarray) an image-shaped array (possibly a read-only np.memmap) in which the stamp
+            windows are populated
+
+    """
+
+    if tifffile is not None and Path(path).suffix.lower() in ('.tif', '.tiff'):
+        with tifffile.TiffFile(str(path)) as tif:
+            page = tif.pages[0]
+            if len(page.shape) == 2:
+                if page.is_memmappable:
+                    logging.debug('Memory-mapped Raster | {}'.format(path))
+                    return tifffile.memmap(str(path), page = 0, mode = 'r')
+                try:
+                    return _read_segments(tif, page, centers, width)
+                except (ValueError, NotImplementedError, AttributeError) as e:
+                    logging.debug('Windowed Read Failed, Reading Full Raster | {}: {}'.format(path, e))
+    return skimage.io.imread(path)
+
+
+def read_dtype(path):
+    """
+    Gets the pixel type of a rastered chip image. For TIFFs, only the header is read; other 
+    formats fall back to reading the full image.
+
+    Arguments:
+        (str | pathlib.Path) path: path of the rastered image file
+
+    Returns:
+        (np.dtype) the pixel type
+
+    """
+
+    if tifffile is not None and Path(path).suffix.lower() in ('.tif', '.tiff'):
+        with tifffile.TiffFile(str(path)) as tif:
+            return np.dtype(tif.pages[0].dtype)
+    return skimage.io.imread(path).dtype
+
+
+def _read_segments(tif, page, centers, width):
+    """
+    Decodes only the strips or tiles of a TIFF page that overlap the stamp windows.
+
+    Arguments:
+        (tifffile.TiffFile) tif: open TIFF file
+        (tifffile.TiffPage) page: 2-D image page
+        (np.ndarray) centers: array of chamber (x, y) center positions of shape (dims.x, dims.y, 2)
+        (int) width: stamp width (pixels)
+
+    Returns:
+        (np.ndarray) an image-shaped array, zero outside of the decoded segments
+
+    """
+
+    chunkLength, chunkWidth = page.chunks[-2:]
+    nRows, nCols = page.chunked[-2:]
+    if len(page.dataoffsets) != nRows*nCols:
+        raise ValueError('Unsupported TIFF segment layout')
+
+    half = width//2
+    flat = centers.reshape(-1, 2)
+    rowChunks = np.arange(nRows)
+    colChunks = np.arange(nCols)
+    rowStart = (flat[:, 1]-half)//chunkLength
+    rowStop = (flat[:, 1]+half-1)//chunkLength
+    colStart = (flat[:, 0]-half)//chunkWidth
+    colStop = (flat[:, 0]+half-1)//chunkWidth
+    rowCover = (rowChunks >= rowStart[:, np.newaxis]) & (rowChunks <= rowStop[:, np.newaxis])
+    colCover = (colChunks >= colStart[:, np.newaxis]) & (colChunks <= colStop[:, np.newaxis])
+    needed = np.any(rowCover[:, :, np.newaxis] & colCover[:, np.newaxis, :], axis = 0)
+
+    # np.zeros is lazily allocated, so the pages of undecoded segments are never resident
+    img = np.zeros(page.shape, dtype = page.dtype)
+    fh = tif.filehandle
+    for index in np.flatnonzero(needed):
+        offset, bytecount = page.dataoffsets[index], page.databytecounts[index]
+        if not bytecount:
+            continue
+        fh.seek(offset)
+        segment, position, shape = page.decode(fh.read(bytecount), int(index), jpegtables = page.jpegtables)
+        top, left = position[2], position[3]
+        bottom = min(top + shape[1], img.shape[0])
+        right = min(left + shape[2], img.shape[1])
+        img[top:bottom, left:right] = segment[0, :bottom-top, :right-left, 0]
+    logging.debug('Decoded {}/{} Raster Segments'.format(int(needed.sum()), needed.size))
+    return img
+
+
+class StampWindows:
+    def __init__(self, img, origins, width):
+        """
+        Constructor for a StampWindows object, a stamp stack view onto a rastered image. It is
+        indexed like a stamp stack of shape (N, width, width), but reads the indexed pixels 
+        straight from the image, so no stamps are cut.
+
+        Arguments:
+            (np.ndarray) img: 2-D rastered chip image (possibly a np.memmap)
+            (np.ndarray) origins: (row, column) positions of the stamp upper left corners, of 
+                shape (N, 2)
+            (int) width: stamp width (pixels)
+
+        Returns:
+            None
+
+        """
+
+        if origins.min() < 0 or (origins + width > img.shape).any():
+            raise ValueError('Stamps extend past the image border. Check the corner positions.')
+        self.img = img
+        self.origins = origins
+        self.shape = (len(origins), width, width)
+        self.dtype = img.dtype
+
+
+    def __len__(self):
+        return self.shape[0]
+
+
+    def __getitem__(self, index):
+        n, rows, cols = index
+        return self.img[self.origins[n, 0] + rows, self.origins[n, 1] + cols]
+
+
+def pyramid_levels(image, min_size = 256):
+    """
+    Generates the resolution levels of an image, each half the size of the previous one
+    (area-averaged), down to the first level no larger than min_size in either dimension.
+
+    Arguments:
+        (np.ndarray) image: 2-D image
+        (int) min_size: size (pixels) of the smallest level
+
+    Returns:
+        (list) the levels (np.ndarray), from full resolution
+
+    """
+
+    levels = [image]
+    while max(levels[-1].shape) > min_size and min(levels[-1].shape) > 1:
+        h, w = levels[-1].shape
+        levels.append(cv2.resize(levels[-1], (max(w//2, 1), max(h//2, 1)), interpolation = cv2.INTER_AREA))
+    return levels
+
+
+def write_pyramid(path, image, tile = 256, compression = 'zlib', min_size = 256):
+    """
+    Writes an image as a tiled, compressed, pyramidal TIFF: the full resolution image, with its
+    reduced resolution levels (see pyramid_levels) as SubIFDs, such that viewers can open an 
+    overview without reading the full image.
+
+    Arguments:
+        (str | pathlib.Path) path: TIFF file path
+        (np.ndarray) image: 2-D image
+        (int) tile: tile size (pixels, a multiple of 16)
+        (str | None) compression: TIFF compression ('zlib', or any codec tifffile supports)
+        (int) min_size: size (pixels) of the smallest level
+
+    Returns:
+        None
+
+    """
+
+    if tifffile is None:
+        raise ImportError('Pyramidal TIFF writing requires tifffile')
+    levels = pyramid_levels(image, min_size)
+    options = {'tile': (tile, tile), 'compression': compression}
+    with tifffile.TiffWriter(str(path), bigtiff = image.nbytes > 2**31) as tif:
+        tif.write(levels[0], subifds = len(levels) - 1, **options)
+        for level in levels[1:]:
+            tif.write(level, subfiletype = 1, **options)
+    logging.debug('Wrote Pyramidal TIFF | Path: {}, Levels: {}'.format(path, len(levels)))
+
+
+def thumbnail(image, width = 256):
+    """
+    Downsamples an image (area-averaged) to a width, keeping its aspect ratio.
+
+    Arguments:
+        (np.ndarray) image: 2-D image
+        (int) width: thumbnail width (pixels)
+
+    Returns:
+        (np.ndarray) the thumbnail
+
+    """
+
+    h, w = image.shape
+    height = max(int(round(h * width / w)), 1)
+    return cv2.resize(image, (width, height), interpolation = cv2.INTER_AREA)
+
+
+def montage(images, columns = None):
+    """
+    Tiles images into a single image, row by row (zero-padded to the largest image).
+
+    Arguments:
+        (list) images: 2-D images of the same dtype
+        (int | None) columns: number of images per row. If None, tiles the images in a square.
+
+    Returns:
+        (np.ndarray) the montage
+
+    """
+
+    if not images:
+        raise ValueError('No images to tile')
+    columns = columns if columns else int(np.ceil(np.sqrt(len(images))))
+    rows = int(np.ceil(len(images) / columns))
+    h = max(i.shape[0] for i in images)
+    w = max(i.shape[1] for i in images)
+    tiled = np.zeros((rows*h, columns*w), dtype = images[0].dtype)
+    for n, image in enumerate(images):
+        r, c = divmod(n, columns)
+        tiled[r*h:r*h + image.shape[0], c*w:c*w + image.shape[1]] = image
+    return tiled
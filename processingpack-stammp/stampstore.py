@@ -0,0 +1,491 @@
+# title             : stampstore.py
+# description       : Chunked stamp repositories (HDF5 stamp store, memory-mapped stamp cube)
+# authors           : Daniel Mokhtari
+# credits           : Craig Markin
+# date              : 20180615
+# version update    : 20200913
+# version           : 0.1.0
+# python_version    : 3.7
+
+# General Python
+import os
+import json
+import logging
+from pathlib import Path
+from collections import OrderedDict
+from contextlib import nullcontext
+
+import numpy as np
+from tqdm import tqdm
+
+from processingpack.chip import render_stamps, stamp_overlay, write_stamp
+from processingpack.writer import BackgroundWriter
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+class StampStore:
+    def __init__(self, path, mode = 'a', chunks = (8, 8), compression = 'gzip', compression_opts = 4):
+        """
+        Constructor for a StampStore object. A StampStore is a single chunked, compressed HDF5
+        file holding the stamps of the images of an experiment, as a stamp repository (repo)
+        alternative to per-stamp PNG files (see ChipImage.repo_dump).
+
+        The store holds a group per device (by device name), holding the chip indices ('x', 'y')
+        and MutantIDs ('id') of its chambers, and a group per series (by description) holding:
+            stamps: raw stamps of shape (images, chambers, width, width), chunked by
+                (images, chambers) blocks
+            summary/<feature>: feature summaries of shape (images, chambers) (see
+                chip.StampGrid.summary_columns)
+        Chambers are in chip index (x-major) order. The series image identifiers are stored as
+        attributes, in write order.
+
+        Arguments:
+            (str | pathlib.Path) path: store file path (.h5)
+            (str) mode: file mode ('r': read, 'a': read/write, creating the store if needed)
+            (tuple) chunks: number of images and of chambers per stamp chunk
+            (str) compression: HDF5 compression filter ('gzip' | 'lzf' | None)
+            (int | None) compression_opts: compression filter options (gzip level)
+
+        Returns:
+            None
+
+        """
+
+        if h5py is None:
+            raise ImportError('StampStore requires h5py (pip install h5py)')
+        self.path = path
+        self.chunks = chunks
+        self.compression = compression
+        self.compression_opts = compression_opts if compression == 'gzip' else None
+        self.file = h5py.File(str(path), mode)
+        logging.debug('Opened StampStore | Path: {}'.format(path))
+
+
+    def close(self):
+        self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def series(self):
+        """
+        Lists the series of the store.
+
+        Arguments:
+            None
+
+        Returns:
+            (list) (device name, series description) pairs
+
+        """
+
+        return [(dname, description) for dname, d in self.file.items() for description in d['series']]
+
+
+    def write(self, chip, description, identifier, series_index = None):
+        """
+        Writes the stamps and feature summaries of a processed ChipImage to a series of the store.
+        The image is appended to the series, or replaces the image of the same identifier.
+
+        Arguments:
+            (chip.ChipImage) chip: processed ChipImage (stamps may be released)
+            (str) description: series description
+            (Hashable) identifier: image identifier within the series (JSON-serializable)
+            (str | None) series_index: name of the series index (i.e., time, concentration, etc.)
+
+        Returns:
+            None
+
+        """
+
+        device = self._device_group(chip)
+        series = device['series'].require_group(description)
+        if series_index is not None:
+            series.attrs['series_index'] = series_index
+        data = chip.stamps.data if chip.stamps.data is not None else chip.read_stamps()
+        data = data.reshape((-1,) + data.shape[2:])
+        columns = chip.summary_columns()
+
+        identifiers = json.loads(series.attrs.get('identifiers', '[]'))
+        rasters = json.loads(series.attrs.get('rasters', '[]'))
+        if identifier in identifiers:
+            i = identifiers.index(identifier)
+            rasters[i] = str(chip.data_ref)
+        else:
+            i = len(identifiers)
+            identifiers.append(identifier)
+            rasters.append(str(chip.data_ref))
+
+        if 'stamps' not in series:
+            chunks = (self.chunks[0], min(self.chunks[1], len(data))) + data.shape[1:]
+            series.create_dataset('stamps', shape = (0,) + data.shape, maxshape = (None,) + data.shape,
+                dtype = data.dtype, chunks = chunks, compression = self.compression,
+                compression_opts = self.compression_opts, shuffle = self.compression is not None)
+            series.create_group('summary')
+        stamps = series['stamps']
+        if stamps.shape[1:] != data.shape:
+            raise ValueError('Stamps of shape {} cannot be stored in series of shape {}'.format(data.shape, stamps.shape[1:]))
+        stamps.resize(len(identifiers), axis = 0)
+        stamps[i] = data
+
+        summary = series['summary']
+        features = [k for k, v in columns.items() if v.dtype.kind == 'f']
+        for f in set(features) | set(summary.keys()):
+            if f not in summary:
+                summary.create_dataset(f, data = np.full((len(identifiers), len(data)), np.nan),
+                    maxshape = (None, len(data)), chunks = (self.chunks[0], len(data)))
+            summary[f].resize(len(identifiers), axis = 0)
+            summary[f][i] = columns[f] if f in columns else np.nan
+
+        series.attrs['identifiers'] = json.dumps(identifiers)
+        series.attrs['rasters'] = json.dumps(rasters)
+        logging.debug('Stored Stamps | Series: {}, ID: {}, Raster: {}'.format(description, identifier, chip.data_ref))
+
+
+    def _device_group(self, chip):
+        """
+        Gets the device group of a ChipImage, creating it from the ChipImage geometry if needed.
+
+        Arguments:
+            (chip.ChipImage) chip: ChipImage
+
+        Returns:
+            (h5py.Group) the device group
+
+        """
+
+        dname = chip.device.dname
+        ids = chip.stamps.ids.ravel().astype(str)
+        if dname in self.file:
+            device = self.file[dname]
+            if len(device['id']) != len(ids):
+                raise ValueError('Device {} of the store has {} chambers, not {}'.format(dname, len(device['id']), len(ids)))
+            return device
+        device = self.file.create_group(dname)
+        device.attrs['setup'] = chip.device.setup
+        device.attrs['dname'] = dname
+        xs, ys = np.indices(chip.stamps.shape, dtype = np.int32)
+        device.create_dataset('x', data = xs.ravel()+1)
+        device.create_dataset('y', data = ys.ravel()+1)
+        device.create_dataset('id', data = ids.astype(object), dtype = h5py.string_dtype())
+        device.create_group('series')
+        return device
+
+
+    def _series(self, dname, description):
+        if dname not in self.file or description not in self.file[dname]['series']:
+            raise ValueError('No series {} of device {} in the store'.format(description, dname))
+        return self.file[dname]['series'][description]
+
+
+    def identifiers(self, dname, description):
+        """
+        Gets the image identifiers of a series, in store order.
+
+        Arguments:
+            (str) dname: device name
+            (str) description: series description
+
+        Returns:
+            (list) the image identifiers
+
+        """
+
+        return json.loads(self._series(dname, description).attrs['identifiers'])
+
+
+    def chambers(self, dname):
+        """
+        Gets the chip indices and MutantIDs of the chambers of a device, in store order.
+
+        Arguments:
+            (str) dname: device name
+
+        Returns:
+            (tuple) x indices, y indices, and MutantIDs (np.ndarray)
+
+        """
+
+        device = self.file[dname]
+        return device['x'][:], device['y'][:], device['id'].asstr()[:].astype(object)
+
+
+    def _chamber_index(self, dname, x, y):
+        xs, ys, _ = self.chambers(dname)
+        index = np.flatnonzero((xs == x) & (ys == y))
+        if not len(index):
+            raise ValueError('No chamber {} in device {}'.format((x, y), dname))
+        return int(index[0])
+
+
+    def chamber(self, dname, description, x, y):
+        """
+        Gets the stamps of a chamber across the images of a series.
+
+        Arguments:
+            (str) dname: device name
+            (str) description: series description
+            (int) x: chamber x index (one-based)
+            (int) y: chamber y index (one-based)
+
+        Returns:
+            (np.ndarray) the chamber stamps of shape (images, width, width), in identifier order
+                (see StampStore.identifiers)
+
+        """
+
+        return self._series(dname, description)['stamps'][:, self._chamber_index(dname, x, y)]
+
+
+    def mutant(self, mutant, dname = None, description = None):
+        """
+        Gets the stamps of the chambers of a MutantID across the images of the series of the store.
+
+        Arguments:
+            (str) mutant: MutantID
+            (str | None) dname: device name. If None, searches all devices.
+            (str | None) description: series description. If None, searches all series.
+
+        Returns:
+            (OrderedDict) chamber stamps of shape (images, width, width), keyed by device name,
+                series description, and chamber index (x, y)
+
+        """
+
+        stamps = OrderedDict()
+        for d, s in self.series():
+            if (dname is not None and d != dname) or (description is not None and s != description):
+                continue
+            xs, ys, ids = self.chambers(d)
+            index = np.flatnonzero(ids == mutant)
+            if not len(index):
+                continue
+            block = self._series(d, s)['stamps'][:, list(index)]
+            for j, n in enumerate(index):
+                stamps[(d, s, (int(xs[n]), int(ys[n])))] = block[:, j]
+        return stamps
+
+
+    def export_repo(self, target_root, stamptype = 'button', as_ubyte = False, dname = None, description = None, 
+        writer = None):
+        """
+        Exports series of the store as a PNG stamp repository, as written by ChipImage.repo_dump:
+        target_root/<MutantID>/<x_y>/<setup><dname>_<identifier>.png. Stamps are annotated with
+        their features (see Stamp.summary_stamp).
+
+        Arguments:
+            (str) target_root: repo directory
+            (str) stamptype: parameterized feature type to draw onto stamp ('chamber' | 'button')
+            (bool) as_ubyte: flag to save stamps as uint8 images
+            (str | None) dname: device name. If None, exports all devices.
+            (str | None) description: series description. If None, exports all series.
+            (writer.BackgroundWriter | None) writer: background writer to write the stamps on. If
+                None, the stamps are written on a writer of the call, before returning.
+
+        Returns:
+            None
+
+        """
+
+        with (BackgroundWriter() if writer is None else nullcontext(writer)) as writer:
+            for d, s in self.series():
+                if (dname is None or d == dname) and (description is None or s == description):
+                    self._export_series(target_root, d, s, stamptype, as_ubyte, writer)
+
+
+    def _export_series(self, target_root, dname, description, stamptype, as_ubyte, writer):
+        """
+        Exports a series of the store as a PNG stamp repository (see StampStore.export_repo), 
+        one chunk of chambers at a time. The stamps of each chamber are rendered together 
+        (see chip.render_stamps) and written on the writer.
+
+        Arguments:
+            (str) target_root: repo directory
+            (str) dname: device name
+            (str) description: series description
+            (str) stamptype: parameterized feature type to draw onto stamp ('chamber' | 'button')
+            (bool) as_ubyte: flag to save stamps as uint8 images
+            (writer.BackgroundWriter) writer: background writer
+
+        Returns:
+            None
+
+        """
+
+        series = self._series(dname, description)
+        setup = self.file[dname].attrs['setup']
+        titles = ['{}{}_{}'.format(setup, dname, i) for i in self.identifiers(dname, description)]
+        xs, ys, ids = self.chambers(dname)
+        stamps = series['stamps']
+        step = stamps.chunks[1]
+        for start in tqdm(range(0, len(ids), step), desc = 'Exporting Series <{}> Repo'.format(description)):
+            stop = min(start + step, len(ids))
+            block = stamps[:, start:stop]
+            summaries = {f: v[:, start:stop] for f, v in series['summary'].items()}
+            for n in range(start, stop):
+                index = (int(xs[n]), int(ys[n]))
+                label = '{}.{} | {}'.format(index[0], index[1], ids[n])
+                annotations = []
+                for i in range(len(titles)):
+                    circles, val = stamp_overlay(stamptype, {f: v[i, n - start] for f, v in summaries.items()}, index)
+                    annotations.append((circles, label, val))
+                image = render_stamps(block[:, n - start, np.newaxis], annotations) # images along x
+                w = image.shape[1] // len(titles)
+                target = os.path.join(target_root, ids[n], '{}_{}'.format(*index))
+                for i, title in enumerate(titles):
+                    writer.submit(write_stamp, os.path.join(target, '{}.png'.format(title)), image[:, i*w:(i+1)*w], as_ubyte)
+        logging.debug('Exported Repo | Device: {}, Series: {}, Root: {}'.format(dname, description, target_root))
+
+
+    def __str__(self):
+        return ('StampStore| Path: {}, Series: {}'.format(self.path, self.series()))
+
+
+    def _repr_pretty_(self, p, cycle = True):
+        p.text('<{}>'.format(self.__str__()))
+
+
+
+class StampCube:
+    def __init__(self, path, mode = 'r'):
+        """
+        Constructor for a StampCube object (see StampCube.create). A StampCube is an uncompressed,
+        memory-mapped numpy array (.npy) of the stamps of a series, of logical shape 
+        (images, dims.x, dims.y, width, width), stored chamber-major: the time course (all images)
+        of each chamber is contiguous on disk, so reading it is a single small read. The image 
+        identifiers and MutantIDs are stored in a JSON file next to the array (<path>.json).
+
+        Arguments:
+            (str | pathlib.Path) path: cube file path (.npy)
+            (str) mode: memory map mode ('r': read, 'r+': read/write)
+
+        Returns:
+            None
+
+        """
+
+        self.path = Path(path)
+        self.data = np.load(str(self.path), mmap_mode = mode) # (dims.x, dims.y, images, width, width)
+        with open(str(StampCube._attrs_path(self.path))) as f:
+            attrs = json.load(f)
+        self.identifiers = attrs.pop('identifiers')
+        self.ids = np.array(attrs.pop('ids'), dtype = object).reshape(self.data.shape[:2])
+        self.attrs = attrs
+        logging.debug('Opened StampCube | Path: {}, Shape: {}'.format(path, self.shape))
+
+
+    @classmethod
+    def create(cls, path, identifiers, ids, width, dtype, attrs = None):
+        """
+        Creates an empty StampCube (filled by StampCube.write), open for writing.
+
+        Arguments:
+            (str | pathlib.Path) path: cube file path (.npy)
+            (list) identifiers: image identifiers (JSON-serializable), in image order
+            (np.ndarray) ids: MutantIDs of shape (dims.x, dims.y)
+            (int) width: stamp width (pixels)
+            (np.dtype) dtype: stamp dtype
+            (dict) attrs: arbitrary JSON-serializable metadata
+
+        Returns:
+            (StampCube) the cube
+
+        """
+
+        path = Path(path)
+        shape = ids.shape + (len(identifiers), width, width)
+        np.lib.format.open_memmap(str(path), mode = 'w+', dtype = dtype, shape = shape).flush()
+        attrs = dict(attrs if attrs else {}, identifiers = list(identifiers), ids = ids.astype(str).ravel().tolist())
+        with open(str(StampCube._attrs_path(path)), 'w') as f:
+            json.dump(attrs, f)
+        return cls(path, 'r+')
+
+
+    @staticmethod
+    def _attrs_path(path):
+        return path.with_name(path.name + '.json')
+
+
+    @property
+    def shape(self):
+        """The logical cube shape (images, dims.x, dims.y, width, width)"""
+        x, y, n, h, w = self.data.shape
+        return (n, x, y, h, w)
+
+
+    @property
+    def stamps(self):
+        """The cube as an (images, dims.x, dims.y, width, width) view (not read into memory)"""
+        return self.data.transpose(2, 0, 1, 3, 4)
+
+
+    def write(self, image, stack):
+        """
+        Writes the stamps of an image to the cube.
+
+        Arguments:
+            (int) image: image position (see StampCube.identifiers)
+            (np.ndarray) stack: stamp stack of shape (dims.x, dims.y, width, width)
+
+        Returns:
+            None
+
+        """
+
+        if stack.shape != self.data.shape[:2] + self.data.shape[3:]:
+            raise ValueError('Stamps of shape {} cannot be written to cube of shape {}'.format(stack.shape, self.shape))
+        self.data[:, :, image] = stack
+
+
+    def flush(self):
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+
+    def chamber(self, x, y):
+        """
+        Reads the stamps of a chamber across the images of the cube.
+
+        Arguments:
+            (int) x: chamber x index (one-based)
+            (int) y: chamber y index (one-based)
+
+        Returns:
+            (np.ndarray) the chamber stamps of shape (images, width, width), in identifier order
+
+        """
+
+        return np.array(self.data[x-1, y-1])
+
+
+    def mutant(self, mutant):
+        """
+        Reads the stamps of the chambers of a MutantID across the images of the cube.
+
+        Arguments:
+            (str) mutant: MutantID
+
+        Returns:
+            (OrderedDict) chamber stamps of shape (images, width, width), keyed by chamber index (x, y)
+
+        """
+
+        return OrderedDict(((int(x)+1, int(y)+1), np.array(self.data[x, y])) for x, y in np.argwhere(self.ids == mutant))
+
+
+    def __str__(self):
+        return ('StampCube| Path: {}, Shape: {}'.format(self.path, self.shape))
+
+
+    def _repr_pretty_(self, p, cycle = True):
+        p.text('<{}>'.format(self.__str__()))
@@ -0,0 +1,164 @@
+# title             : writer.py
+# description       : Background writing of summary files, images, and stamp repositories
+# authors           : Daniel Mokhtari
+# credits           : Craig Markin
+# date              : 20180615
+# version update    : 20200913
+# version           : 0.1.0
+# python_version    : 3.7
+
+# General Python
+import queue
+import atexit
+import logging
+import weakref
+import threading
+
+
+_open = weakref.WeakSet() # writers not yet closed, flushed at interpreter exit
+
+
+class BackgroundWriter:
+    def __init__(self, maxsize = 8, workers = 4):
+        """
+        Constructor for a BackgroundWriter object. A BackgroundWriter runs write calls (e.g.,
+        summary CSV, TIFF, and stamp repository exports) on a pool of background threads, so
+        that they overlap the caller's computation and each other's filesystem latency. At most
+        maxsize writes are queued; submitting more blocks until one is started (backpressure).
+        Errors raised by writes are logged as they occur and re-raised (once) by the next submit,
+        flush, or close; the writer stays usable. Usable as a context manager, which closes the 
+        writer on exit. Writers left open are closed at interpreter exit.
+
+        Arguments:
+            (int) maxsize: maximum number of queued writes
+            (int) workers: number of writer threads. Writes on more than one thread may
+                complete out of order.
+
+        Returns:
+            None
+
+        """
+
+        self.queue = queue.Queue(maxsize)
+        self.errors = []
+        self.lock = threading.Lock() # guards errors
+        self.closed = False
+        self.threads = [threading.Thread(target = self._work, daemon = True) for _ in range(max(workers, 1))]
+        for thread in self.threads:
+            thread.start()
+        _open.add(self)
+
+
+    def _work(self):
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                func, args, kwargs = task
+                try:
+                    func(*args, **kwargs)
+                except Exception as e:
+                    logging.error('Background Write Failed | {}: {}'.format(getattr(func, '__name__', func), e))
+                    with self.lock:
+                        self.errors.append(e)
+            finally:
+                self.queue.task_done()
+
+
+    def _raise(self):
+        with self.lock:
+            errors, self.errors = self.errors, []
+        if errors:
+            if len(errors) > 1:
+                logging.error('{} Background Writes Failed'.format(len(errors)))
+            raise errors[0]
+
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queues a write call, blocking while the queue is full. Raises the first error of the
+        previous writes not yet raised, if any (the call is then not queued).
+
+        Arguments:
+            (callable) func: write function
+            (tuple) args: positional arguments of func
+            (dict) kwargs: keyword arguments of func
+
+        Returns:
+            None
+
+        """
+
+        if self.closed:
+            raise ValueError('BackgroundWriter is closed')
+        self._raise()
+        self.queue.put((func, args, kwargs))
+
+
+    def flush(self):
+        """
+        Waits for the queued writes to complete. Raises the first write error not yet raised, if 
+        any.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.queue.join()
+        self._raise()
+
+
+    def close(self):
+        """
+        Waits for the queued writes to complete and stops the writer threads. Raises the first
+        write error not yet raised, if any.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        if not self.closed:
+            self.closed = True
+            for _ in self.threads:
+                self.queue.put(None)
+            for thread in self.threads:
+                thread.join()
+            _open.discard(self)
+        self._raise()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+            return
+        try: # an exception is already propagating: write errors are only logged
+            self.close()
+        except Exception:
+            pass
+
+
+
+@atexit.register
+def _close_open():
+    """
+    Closes the writers left open at interpreter exit, such that their queued writes complete.
+    """
+
+    for writer in list(_open):
+        try:
+            writer.close()
+        except Exception as e:
+            logging.error('Background Writer Closed With Errors | {}'.format(e))
@@ -12,4 +12,8 @@ setup(
 	description = 'STAMMP Experimental Image Processing',
 	packages = find_packages(),    
 	install_requires = requirements,
+	extras_require = {
+		'parquet': ['pyarrow'], # Parquet and Feather summaries
+		'hdf5': ['h5py'], # stamp stores (stampstore.StampStore)
+	},
 )
\ No newline at end of file
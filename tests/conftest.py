@@ -0,0 +1,95 @@
+import sys
+import importlib.util
+import warnings
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+import tifffile
+
+
+PACKAGE = Path(__file__).resolve().parents[1] / 'processingpack-stammp'
+
+# The package directory is not named after the package: import it as processingpack
+if importlib.util.find_spec('processingpack') is None:
+    spec = importlib.util.spec_from_file_location('processingpack', str(PACKAGE / '__init__.py'),
+        submodule_search_locations = [str(PACKAGE)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['processingpack'] = module
+    spec.loader.exec_module(module)
+
+from processingpack import experiment, chip
+
+
+DIMS = (4, 3)
+SPACING = 110
+OFFSET = 80
+
+
+def make_chip(path, dims = DIMS, seed = 0):
+    """
+    Writes a synthetic chip image: a noisy background with, for each chamber, a chamber ring
+    and a bright button disk, both jittered about the chamber lattice.
+
+    Returns:
+        (tuple) the chip corners, of the form ((ULx, ULy),(URx, URy),(LLx, LLy),(LRx, LRy))
+
+    """
+
+    rng = np.random.RandomState(seed)
+    width, height = OFFSET*2 + SPACING*(dims[0]-1), OFFSET*2 + SPACING*(dims[1]-1)
+    img = rng.randint(200, 400, size = (height, width)).astype(np.uint16)
+    for x in range(dims[0]):
+        for y in range(dims[1]):
+            cx, cy = OFFSET + SPACING*x + rng.randint(-4, 5), OFFSET + SPACING*y + rng.randint(-4, 5)
+            cv2.circle(img, (cx, cy), 35 + rng.randint(0, 3), 3000 + rng.randint(0, 2000), 2)
+            bx, by = cx + rng.randint(-8, 9), cy + rng.randint(-8, 9)
+            cv2.circle(img, (bx, by), 12, 6000 + rng.randint(0, 4000), -1)
+    tifffile.imwrite(str(path), img)
+    far = (OFFSET + SPACING*(dims[0]-1), OFFSET + SPACING*(dims[1]-1))
+    return ((OFFSET, OFFSET), (far[0], OFFSET), (OFFSET, far[1]), far)
+
+
+def make_pinlist(dims = DIMS):
+    index = pd.MultiIndex.from_product([range(1, dims[0]+1), range(1, dims[1]+1)], names = ['x', 'y'])
+    return pd.DataFrame({'MutantID': ['M{}'.format((x*7 + y) % 5) for x, y in index]}, index = index)
+
+
+def shifted(corners, dx = 3, dy = 2):
+    return tuple((x + dx, y + dy) for x, y in corners)
+
+
+@pytest.fixture(scope = 'session')
+def series(tmp_path_factory):
+    """
+    A synthetic series of chip images sharing the chamber lattice, with its device.
+    """
+
+    root = tmp_path_factory.mktemp('series')
+    paths = [root / 'x_StitchedImg_{}.tif'.format(i) for i in range(3)]
+    corners = [make_chip(path, seed = i) for i, path in enumerate(paths)][0]
+    device = experiment.Device('s1', 'd1', DIMS, make_pinlist(), corners)
+    return device, paths
+
+
+@pytest.fixture(scope = 'session')
+def reference(series):
+    """
+    A processed reference image of the series, stamped at corners re-picked a few pixels off
+    those of the device.
+    """
+
+    device, paths = series
+    ref = chip.ChipImage(device, paths[0], {}, shifted(device.corners), device.pinlist, 'egfp', 100)
+    ref.stamp()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        ref.findChambers()
+        ref.findButtons()
+    return ref
+
+
+def chip_image(device, path):
+    return chip.ChipImage(device, path, {}, device.corners, device.pinlist, 'egfp', 100)
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+
+from processingpack import chipcollections
+from processingpack.chip import Chamber, Button
+from conftest import chip_image
+
+
+def circle_mask(shape, center, radius):
+    """
+    Baseline feature mask: FALSE within a filled cv2.circle.
+    """
+
+    mask = np.zeros(shape)
+    cv2.circle(mask, (int(center[0]), int(center[1])), int(radius), 1, -1)
+    return ~mask.astype(bool)
+
+
+@pytest.fixture
+def mapped(series, reference):
+    device, paths = series
+    target = chip_image(device, paths[1])
+    target.stamp()
+    reference.mapto(target)
+    return target
+
+
+def test_masks_generated_on_demand(reference):
+    for s in reference.stamps.flatten():
+        chamber, button = s.chamber, s.button
+        assert chamber._disk is None and button._disk is None and button._annulus is None
+        if not chamber.blankFlag:
+            assert np.array_equal(chamber.disk, circle_mask(s.data.shape, chamber.center, chamber.radius))
+        disk = circle_mask(s.data.shape, button.center, button.disk_radius)
+        outer = circle_mask(s.data.shape, button.center, button.annulus_radii[1])
+        assert np.array_equal(button.disk, disk)
+        assert np.array_equal(button.annulus, ~(outer ^ disk))
+        assert button.summary == Button(s.data, None, None, button.center, button.disk_radius,
+            button.annulus_radii).summary
+
+
+def test_released_chip_keeps_summaries(mapped):
+    summary = mapped.summarize()
+    images = {t: mapped.summary_image(t) for t in ('chamber', 'button')}
+    mapped._delete_stamps()
+    assert mapped.stamps.data is None
+    pd.testing.assert_frame_equal(mapped.summarize(), summary)
+    for stamptype, image in images.items():
+        assert np.array_equal(mapped.summary_image(stamptype), image)
+        assert mapped.stamps.data is None # released again
+    with pytest.raises(ValueError):
+        mapped.stamps[0, 0].button.disk
+    mapped.restamp()
+    assert mapped.stamps[0, 0].button.disk.shape == mapped.stamps.data.shape[2:]
+    pd.testing.assert_frame_equal(mapped.summarize(), summary)
+
+
+def test_compact_map_from(series, reference):
+    device, paths = series
+    results = []
+    for compact in (False, True):
+        s = chipcollections.ChipSeries(device, 'desc', 'step')
+        s.load_files(str(paths[0].parent), 'egfp', 100)
+        s.map_from(reference, compact = compact)
+        results.append(s)
+    assert all(c.stamps.data is None for c in results[1].chips.values())
+    pd.testing.assert_frame_equal(results[1].summarize(), results[0].summarize())
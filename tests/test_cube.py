@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from processingpack import chipcollections
+from processingpack.chip import ChipImage
+from processingpack.stampstore import StampCube
+
+
+def load(series):
+    device, paths = series
+    s = chipcollections.ChipSeries(device, 'desc', 'step')
+    s.load_files(str(paths[0].parent), 'egfp', 100)
+    return s
+
+
+@pytest.fixture(scope = 'module')
+def cubed(series, reference, tmp_path_factory):
+    s = load(series)
+    s.map_from(reference, cube = tmp_path_factory.mktemp('cube') / 'stamps.npy')
+    return s
+
+
+def test_cube_holds_series_stamps(cubed):
+    cube = StampCube(cubed.cube.path)
+    chips = list(cubed.chips.values())
+    assert cube.identifiers == list(cubed.chips)
+    assert cube.shape == (len(chips),) + chips[0].stamps.data.shape
+    assert np.array_equal(cube.stamps, [c.stamps.data for c in chips])
+    for (x, y), mid in np.ndenumerate(cube.ids):
+        assert mid == cubed.device.pinlist.loc[(x+1, y+1), 'MutantID']
+        assert np.array_equal(cube.chamber(x+1, y+1), [c.stamps.data[x, y] for c in chips])
+    stamps = cube.mutant('M0')
+    assert list(stamps) == [(int(x)+1, int(y)+1) for x, y in np.argwhere(cube.ids == 'M0')]
+    for (x, y), v in stamps.items():
+        assert np.array_equal(v, cube.chamber(x, y))
+
+
+def test_pooled_cube_reads_each_raster_once(series, reference, cubed, tmp_path, monkeypatch):
+    def read_stamps(self):
+        raise AssertionError('raster read again to build the cube')
+
+    monkeypatch.setattr(ChipImage, 'read_stamps', read_stamps) # the workers quantify from the raster
+    s = load(series)
+    s.map_from(reference, workers = 2, cube = tmp_path / 'stamps.npy')
+    assert np.array_equal(StampCube(tmp_path / 'stamps.npy').data, cubed.cube.data)
+    pd.testing.assert_frame_equal(s.summarize(), cubed.summarize())
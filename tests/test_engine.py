@@ -0,0 +1,167 @@
+import warnings
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+import skimage
+
+from processingpack import engine
+from processingpack.chip import Stamp
+from conftest import chip_image
+
+
+def disk(img, center, radius):
+    """
+    Baseline disk intensities: a filled cv2.circle mask.
+    """
+
+    mask = np.zeros(img.shape)
+    cv2.circle(mask, (int(center[0]), int(center[1])), int(radius), 1, -1)
+    return img[mask.astype(bool)]
+
+
+def grid_search(stamp, searchSpacing, radius, tileWidth, tileHeight, refiningRange, minRadius, stdCutoff,
+    boundingInsetRatio):
+    """
+    Baseline button grid search on cv2.circle masks, as per stamp before the engine.
+    """
+
+    inset = int(tileWidth*boundingInsetRatio)
+    best, maxI = None, 0
+    for x in range(inset, tileWidth-inset, searchSpacing):
+        for y in range(inset, tileHeight-inset, searchSpacing):
+            summed = disk(stamp, (x, y), radius).sum()
+            if summed > maxI:
+                best, maxI = (x, y), summed
+    if best is None:
+        return (tileWidth//2, tileHeight//2), False
+
+    def refine(center, fit, maxI):
+        best = center
+        grid = lambda c: np.linspace(c-refiningRange, c+refiningRange, num = 2*refiningRange, dtype = int)
+        for x in grid(center[0]):
+            for y in grid(best[1]): # rows follow the best center found so far
+                summed = disk(stamp, (x, y), fit).sum()
+                if summed > maxI:
+                    best, maxI = (int(x), int(y)), summed
+        return best, maxI
+
+    best, maxI = refine(best, radius, maxI)
+    refStd = disk(stamp, best, radius).std()
+    fit, bestRadius = radius, radius
+    while bestRadius > minRadius and fit > 0:
+        fit -= 1
+        atRadius, maxAtRadius = refine(best, fit, 0)
+        radiusAtRadius = fit if maxAtRadius > 0 else bestRadius # the radius stalls without improvement
+        if disk(stamp, atRadius, radiusAtRadius).std() < stdCutoff*refStd:
+            return atRadius, True
+        best, bestRadius = atRadius, radiusAtRadius
+    return best, True
+
+
+def relaxed_hough(stamp, chamberRadius, outerChamberBound, param1, param2):
+    """
+    Baseline chamber search: the gradient threshold is loosened one step at a time.
+    """
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        cimg = skimage.img_as_ubyte(stamp, force_copy = True)
+    minRad, maxRad = chamberRadius, chamberRadius + outerChamberBound
+    circles = cv2.HoughCircles(cimg, cv2.HOUGH_GRADIENT, 2, 10, param1 = param1, param2 = param2,
+        minRadius = minRad, maxRadius = maxRad)
+    threshold = param1
+    while circles is None and threshold > 5:
+        circles = cv2.HoughCircles(cimg, cv2.HOUGH_GRADIENT, 2, 10, param1 = threshold, param2 = param2,
+            minRadius = minRad+1, maxRadius = maxRad+2)
+        threshold -= 1
+    if circles is None:
+        return None
+    circles = np.around(circles)[0]
+    best = circles[0]
+    if len(circles) > 1:
+        sums = [disk(cimg, c[:2], c[2]).sum() for c in circles]
+        best = circles[int(np.argmax(sums))]
+    return (int(best[0]), int(best[1])), int(best[2])
+
+
+@pytest.fixture(scope = 'module')
+def stack(series):
+    device, paths = series
+    target = chip_image(device, paths[1])
+    target.stamp()
+    return target.stamps.data.reshape((-1,) + target.stamps.data.shape[2:])
+
+
+def test_disk_sums_match_masks(stack):
+    rng = np.random.RandomState(0)
+    prefix = engine.row_prefix(stack[0])
+    for radius in (1, 9, 15, 30):
+        cx, cy = rng.randint(-10, 110, size = (2, 50))
+        result = engine.disk_sums(prefix, cx, cy, radius)
+        assert result.tolist() == [disk(stack[0], c, radius).sum() for c in zip(cx, cy)]
+
+
+def test_find_buttons_matches_grid_search(stack):
+    params = Stamp.buttonSearchParams
+    blank = np.zeros_like(stack[:1])
+    stamps = np.concatenate((stack, blank))
+    centers, found = engine.find_buttons(stamps, **params)
+    for stamp, center, f in zip(stamps, centers, found):
+        assert ((int(center[0]), int(center[1])), bool(f)) == grid_search(stamp, **params)
+
+
+def test_find_buttons_stalled_radius():
+    """
+    Single pixel stamps, searched on a sparse refining grid: for some, no smaller disk improves
+    and the fitted radius stalls.
+    """
+
+    params = dict(Stamp.buttonSearchParams, refiningRange = 1)
+    stamps = np.zeros((17*17, 110, 110), dtype = np.uint16)
+    for n, (y, x) in enumerate(np.ndindex(17, 17)):
+        stamps[n, 30 + 3*y, 30 + 3*x] = 100
+    centers, found = engine.find_buttons(stamps, **params)
+    for stamp, center, f in zip(stamps, centers, found):
+        assert ((int(center[0]), int(center[1])), bool(f)) == grid_search(stamp, **params)
+
+
+def test_find_chamber_matches_full_relaxation(stack):
+    params = Stamp.chamberSearchParams()
+    faint = (stack - 200) // 6 + 200 # edges below the default gradient threshold
+    noise = np.random.RandomState(0).randint(200, 400, size = (2,) + stack.shape[1:]).astype(stack.dtype)
+    for stamp in np.concatenate((stack, faint, noise)):
+        assert engine.find_chamber(stamp, **params) == relaxed_hough(stamp, **params)
+
+
+def test_batched_and_pooled_search_match_per_stamp(series):
+    device, paths = series
+    summaries = []
+    for batched, workers in ((False, None), (True, None), (True, 2)):
+        target = chip_image(device, paths[2])
+        target.stamp()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            target.findChambers(workers = workers)
+            target.findButtons(batched = batched, workers = workers)
+        summaries.append(target.summarize())
+    for summary in summaries[1:]:
+        pd.testing.assert_frame_equal(summary, summaries[0])
+
+
+def test_find_chambers_sets_per_stamp_results(series):
+    device, paths = series
+    target = chip_image(device, paths[1])
+    target.stamp()
+    g = target.stamps
+    g.data[0, 0] = 300 # no chamber border
+    with pytest.warns(UserWarning, match = r'chamber \(1, 1\)'):
+        target.findChambers()
+    params = Stamp.chamberSearchParams()
+    for s in g.flatten():
+        result = engine.find_chamber(s.data, **params)
+        assert g.chamber_defined[s.x, s.y] and g.chamber_blank[s.x, s.y] == (result is None)
+        if result is not None:
+            assert (tuple(g.chamber_centers[s.x, s.y]), g.chamber_radii[s.x, s.y]) == result
+    assert g.chamber_blank[0, 0]
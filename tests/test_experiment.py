@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from processingpack import experiment
+from conftest import DIMS, make_pinlist, shifted, chip_image
+
+
+@pytest.fixture
+def device(series):
+    d, _ = series
+    return experiment.Device('s1', 'd1', DIMS, make_pinlist(), d.corners)
+
+
+def test_geometry_is_shared(device, series):
+    _, paths = series
+    a, b = chip_image(device, paths[0]), chip_image(device, paths[1])
+    assert a.geometry is b.geometry is device.geometry()
+    assert not a.geometry.centers.flags.writeable
+
+
+def test_geometry_keyed_on_pinlist_content(device):
+    for i in range(20):
+        pinlist = make_pinlist()
+        pinlist['MutantID'] = 'M{}'.format(i)
+        assert device.geometry(pinlist = pinlist).ids[0, 0] == 'M{}'.format(i)
+    pinlist = make_pinlist()
+    pinlist['MutantID'] = range(len(pinlist))
+    assert device.geometry(pinlist = pinlist).ids[0, 0] == 0
+    pinlist['MutantID'] = pinlist['MutantID'].astype(str)
+    assert device.geometry(pinlist = pinlist).ids[0, 0] == '0'
+    assert len(device._geometry) <= experiment.Device.geometry_cache_size
+
+
+def test_geometry_cache_hit_does_not_digest(device, monkeypatch):
+    expected = device.geometry(shifted(device.corners))
+
+    def digest(*args):
+        raise AssertionError('pinlist digested on a cache hit')
+
+    monkeypatch.setattr(pd.util, 'hash_pandas_object', digest)
+    assert device.geometry(shifted(device.corners)) is expected
+    assert device.geometry(shifted(device.corners), pinlist = device.pinlist) is expected
+
+
+def test_set_pinlist_applies_edits(device):
+    pinlist = device.pinlist
+    pinlist.loc[(1, 1), 'MutantID'] = 'edited'
+    assert device.geometry().ids[0, 0] != 'edited' # edited in place, not set
+    device.pinlist = pinlist
+    assert device.geometry().ids[0, 0] == 'edited'
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from processingpack import chipcollections, export
+from processingpack.writer import BackgroundWriter
+
+
+@pytest.fixture(scope = 'module')
+def mapped(series, reference):
+    device, paths = series
+    s = chipcollections.ChipSeries(device, 'desc', 'step')
+    s.load_files(str(paths[0].parent), 'egfp', 100)
+    s.map_from(reference)
+    return s
+
+
+@pytest.mark.parametrize('fmt', sorted(export.formats))
+def test_summary_roundtrip(mapped, tmp_path, fmt):
+    pytest.importorskip('pyarrow')
+    with BackgroundWriter() as writer:
+        mapped.save_summary(str(tmp_path), writer = writer, fmt = fmt)
+    path = export.summary_path(tmp_path, mapped.device, 'desc', 'ChipSeries', fmt)
+    expected = mapped.summarize()
+    pd.testing.assert_frame_equal(export.load_summary(path), expected)
+    pd.testing.assert_frame_equal(export.load_summary(path, columns = ['step', 'id']), expected[['step', 'id']])
+    loaded = export.load_summaries(tmp_path, fmt)
+    assert (loaded['device'] == mapped.device.dname).all() and (loaded['series'] == 'desc').all()
+    pd.testing.assert_frame_equal(loaded.drop(columns = ['device', 'series']), expected)
+
+
+def test_missing_pyarrow(mapped, tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'pyarrow', None)
+    for fmt in export.formats:
+        with pytest.raises(ImportError, match = 'pyarrow'):
+            export.save_summary(mapped.summarize(), tmp_path, mapped.device, 'desc', 'ChipSeries', fmt)
+        with BackgroundWriter() as writer:
+            with pytest.raises(ImportError, match = 'pyarrow'): # raised by the call, not the writer
+                mapped.save_summary(str(tmp_path), writer = writer, fmt = fmt)
+        with pytest.raises(ImportError, match = 'pyarrow'):
+            export.load_summary(export.summary_path(tmp_path, mapped.device, 'desc', 'ChipSeries', fmt))
+    with pytest.raises(ValueError):
+        export.load_summary(tmp_path / 'summary.csv')
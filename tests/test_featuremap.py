@@ -0,0 +1,72 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processingpack import chipcollections, featuremap
+from processingpack.chip import ChipImage, StampGrid
+from conftest import make_pinlist, shifted
+
+
+def test_ids_roundtrip(series, reference, tmp_path):
+    device, _ = series
+    for ids in (['M1', 'M2', np.nan], [3, 7, np.nan], [3, 7, 11]):
+        pinlist = make_pinlist()
+        pinlist['MutantID'] = [ids[i % 3] for i in range(len(pinlist))]
+        geometry = device.geometry(pinlist = pinlist)
+        grid = StampGrid(None, geometry)
+        grid.copy_features(reference.stamps)
+        featuremap.FeatureMap(geometry, grid).save(tmp_path / 'map.npz')
+        loaded = featuremap.FeatureMap.load(tmp_path / 'map.npz')
+        for a, b in zip(loaded.geometry.ids.flat, geometry.ids.flat):
+            assert type(a) == type(b) and (a == b or (a != a and b != b))
+        assert loaded.fits(geometry)
+        for a in featuremap.FeatureMap._arrays:
+            assert np.array_equal(getattr(loaded.stamps, a), getattr(reference.stamps, a))
+
+
+def test_fits_geometry(series, reference):
+    device, _ = series
+    fmap = reference.feature_map()
+    assert fmap.fits(reference.geometry)
+    assert not fmap.fits(device.geometry())
+    assert not fmap.fits(device.geometry(shifted(device.corners, 4, 2)))
+
+
+def test_find_or_reuse(series, tmp_path, monkeypatch):
+    device, paths = series
+    hashes = []
+    content_hash = featuremap.content_hash
+    monkeypatch.setattr(featuremap, 'content_hash', lambda path: hashes.append(path) or content_hash(path))
+
+    def process(corners):
+        target = ChipImage(device, paths[0], {}, corners, device.pinlist, 'egfp', 100)
+        target.stamp()
+        found = []
+        chipcollections._find_or_reuse(target, 'chamber', tmp_path, lambda: found.append(target.findChambers()))
+        return target, bool(found)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        first, found = process(device.corners)
+        assert found and len(hashes) == 1
+        reused, found = process(device.corners)
+        assert not found and len(hashes) == 2
+        pd.testing.assert_frame_equal(reused.summarize(), first.summarize())
+        moved, found = process(shifted(device.corners))
+        assert found and len(hashes) == 3 # restamped elsewhere: found again, and stored
+        assert featuremap.lookup(paths[0], tmp_path).fits(moved.geometry)
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_map_from_hs_with_feature_map(series, reference, tmp_path, workers):
+    device, paths = series
+    reference.feature_map().save(tmp_path / 'reference.npz')
+    summaries = []
+    for ref in (reference, featuremap.FeatureMap.load(tmp_path / 'reference.npz')):
+        s = chipcollections.StandardSeries(device, 'desc')
+        s.load_files(str(paths[0].parent), 'egfp', 100)
+        s.map_from_hs(reference = ref, workers = workers)
+        summaries.append(s.summarize())
+    pd.testing.assert_frame_equal(summaries[1], summaries[0])
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from processingpack import chip, chipcollections, featuremap
+from conftest import chip_image
+
+
+def mapped_summary(reference, device, path):
+    """
+    Baseline: stamps the image at its own corners, maps the reference features, and summarizes.
+    """
+
+    target = chip_image(device, path)
+    target.stamp()
+    reference.mapto(target)
+    return target.summarize()
+
+
+@pytest.fixture(params = ['chip', 'featuremap'])
+def mapping_reference(request, reference, tmp_path):
+    if request.param == 'chip':
+        return reference
+    path = tmp_path / 'reference.npz'
+    featuremap.FeatureMap.from_chip(reference).save(path)
+    return featuremap.FeatureMap.load(path)
+
+
+def test_reference_corners_differ(series, reference):
+    device, _ = series
+    assert (reference.geometry.centers != device.geometry().centers).any()
+
+
+def test_apply_feature_map_matches_mapto(series, mapping_reference):
+    device, paths = series
+    for path in paths:
+        target = chip_image(device, path)
+        expected = mapped_summary(mapping_reference, device, path)
+        result = chip.apply_feature_map(mapping_reference, path, geometry = target.geometry)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_map_rasters_matches_mapto(series, mapping_reference):
+    device, paths = series
+    targets = [chip_image(device, path) for path in paths]
+    results = chip.map_rasters(mapping_reference, paths, 'all', 2, [t.geometry for t in targets])
+    for target, path, summaries in zip(targets, paths, results):
+        target.set_mapped(mapping_reference, 'all', summaries)
+        pd.testing.assert_frame_equal(target.summarize(), mapped_summary(mapping_reference, device, path))
+
+
+def test_series_paths_match_map_from(series, reference):
+    device, paths = series
+
+    def load():
+        s = chipcollections.ChipSeries(device, 'desc', 'step')
+        s.load_files(str(paths[0].parent), 'egfp', 100)
+        return s
+
+    serial = load()
+    serial.map_from(reference)
+    expected = serial.summarize()
+    parallel = load()
+    parallel.map_from(reference, workers = 2)
+    pd.testing.assert_frame_equal(parallel.summarize(), expected)
+    pd.testing.assert_frame_equal(load().summarize_stream(reference), expected)
@@ -0,0 +1,63 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from processingpack import chipcollections, parallel
+from processingpack.writer import BackgroundWriter
+
+
+def load(series):
+    device, paths = series
+    s = chipcollections.ChipSeries(device, 'desc', 'step')
+    s.load_files(str(paths[0].parent), 'egfp', 100)
+    return s
+
+
+@pytest.fixture(scope = 'module')
+def mapped(series, reference):
+    s = load(series)
+    s.map_from(reference)
+    return s
+
+
+@pytest.mark.parametrize('depth', [1, 3])
+def test_prefetch_order_and_depth(depth):
+    started = []
+    lock = threading.Lock()
+
+    def square(i):
+        with lock:
+            started.append(i)
+        return i*i
+
+    for i, result in enumerate(parallel.prefetch(square, range(20), depth)):
+        assert result == i*i
+        with lock:
+            assert len(started) <= i + 1 + depth # read ahead by at most depth
+    assert sorted(started) == list(range(20))
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_map_from_prefetch(series, reference, mapped, compact):
+    s = load(series)
+    s.map_from(reference, compact = compact, prefetch = 2)
+    pd.testing.assert_frame_equal(s.summarize(), mapped.summarize())
+
+
+def test_stream_prefetch(series, reference, mapped):
+    s = load(series)
+    summary = s.summarize_stream(reference, stream_args = {'prefetch': 2})
+    pd.testing.assert_frame_equal(summary, mapped.summarize())
+    assert all(c.stamps is None for c in s.chips.values())
+
+
+def test_save_summary_on_writer(mapped, tmp_path):
+    for d in ('direct', 'written'):
+        os.makedirs(str(tmp_path / d))
+    mapped.save_summary(str(tmp_path / 'direct'))
+    with BackgroundWriter() as writer:
+        mapped.save_summary(str(tmp_path / 'written'), writer = writer)
+    name, = os.listdir(str(tmp_path / 'direct'))
+    assert (tmp_path / 'written' / name).read_bytes() == (tmp_path / 'direct' / name).read_bytes()
@@ -0,0 +1,61 @@
+import numpy as np
+
+from processingpack.chip import StampGrid, Chamber, Button
+
+
+def assert_summary_equal(result, expected):
+    assert result.keys() == expected.keys()
+    for f in expected:
+        assert result[f] == expected[f] or (result[f] != result[f] and expected[f] != expected[f]), f
+
+
+def test_quantify_matches_feature_masks(reference):
+    """
+    The whole-chip summaries (StampGrid.quantify) match the per-stamp mask summaries.
+    """
+
+    g = reference.stamps
+    for s in g.flatten():
+        x, y = s.x, s.y
+        if not g.chamber_blank[x, y]:
+            center = tuple(int(i) for i in g.chamber_centers[x, y])
+            expected = Chamber(s.data, None, center, int(g.chamber_radii[x, y])).summary
+            assert_summary_equal({f: v[x, y] for f, v in g.chamber_summary.items()}, expected)
+        center = tuple(int(i) for i in g.button_centers[x, y])
+        annulus_radii = (int(g.button_radii[x, y]), int(g.button_annulus_radii[x, y, 1]))
+        expected = Button(s.data, None, None, center, int(g.button_radii[x, y]), annulus_radii).summary
+        assert_summary_equal({f: v[x, y] for f, v in g.button_summary.items()}, expected)
+
+
+def test_quantify_clipped_features(reference):
+    """
+    Features extending past the stamp border are clipped as the masks are.
+    """
+
+    g = StampGrid(reference.stamps.data, reference.geometry)
+    g.copy_features(reference.stamps)
+    g.chamber_centers[...] = [[2, 3]]
+    g.button_centers[...] = [[97, 1]]
+    g.quantify()
+    assert np.array_equal(g.button_annulus_radii, reference.stamps.button_annulus_radii)
+    for s in g.flatten():
+        x, y = s.x, s.y
+        if not g.chamber_blank[x, y]:
+            expected = Chamber(s.data, None, (2, 3), int(g.chamber_radii[x, y])).summary
+            assert_summary_equal({f: v[x, y] for f, v in g.chamber_summary.items()}, expected)
+        annulus_radii = (int(g.button_radii[x, y]), int(g.button_annulus_radii[x, y, 1]))
+        expected = Button(s.data, None, None, (97, 1), int(g.button_radii[x, y]), annulus_radii).summary
+        assert_summary_equal({f: v[x, y] for f, v in g.button_summary.items()}, expected)
+
+
+def test_quantify_leaves_annulus_radii(reference):
+    g = StampGrid(reference.stamps.data, reference.geometry)
+    g.copy_features(reference.stamps)
+    g.button_annulus_radii[...] = (40, 24)
+    g.quantify('button')
+    assert (g.button_annulus_radii == (40, 24)).all()
+    quantified = ~g.button_blank
+    assert (g.button_summary['inner_radius_button_annulus'][quantified] == g.button_radii[quantified]).all()
+    assert (g.button_summary['outer_radius_button_annulus'][quantified] == 24).all()
+    s = g[0, 0]
+    assert s.button.annulus_radii == (int(g.button_radii[0, 0]), 24)
@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+import pytest
+import skimage.io
+import tifffile
+
+from processingpack import chipcollections, raster
+from processingpack.chip import ChipImage
+
+
+LAYOUTS = {
+    'contiguous': {},
+    'stripped': {'rowsperstrip': 16},
+    'stripped_zlib': {'rowsperstrip': 16, 'compression': 'zlib'},
+    'tiled': {'tile': (64, 64)},
+    'tiled_zlib': {'tile': (64, 64), 'compression': 'zlib'},
+}
+
+
+@pytest.fixture(params = sorted(LAYOUTS))
+def layout(request, series, tmp_path):
+    device, paths = series
+    path = tmp_path / 'chip.tif'
+    tifffile.imwrite(str(path), tifffile.imread(str(paths[0])), **LAYOUTS[request.param])
+    return device, path
+
+
+def test_read_windowed_matches_full_read(layout):
+    device, path = layout
+    g = device.geometry()
+    expected = ChipImage.stampStack(skimage.io.imread(str(path)), g.centers, g.width)
+    assert np.array_equal(ChipImage.stampStack(raster.read_windowed(path, g.centers, g.width), g.centers, g.width), expected)
+
+
+def test_read_windowed_decodes_only_stamp_segments(series, tmp_path):
+    device, paths = series
+    img = tifffile.imread(str(paths[0]))
+    path = tmp_path / 'chip.tif'
+    tifffile.imwrite(str(path), img, tile = (16, 16), compression = 'zlib')
+    g = device.geometry()
+    centers = g.centers[:1, :1] # a single stamp
+    windowed = raster.read_windowed(path, centers, g.width)
+    (r0, r1), (c0, c1) = g.slices[0, 0]
+    assert np.array_equal(windowed[r0:r1, c0:c1], img[r0:r1, c0:c1])
+    assert not windowed[r1+16:].any() and not windowed[:, c1+16:].any()
+
+
+def test_read_windowed_falls_back_to_full_read(series, tmp_path):
+    device, paths = series
+    img = tifffile.imread(str(paths[0]))
+    path = tmp_path / 'chip.png'
+    skimage.io.imsave(str(path), img, check_contrast = False)
+    g = device.geometry()
+    assert np.array_equal(raster.read_windowed(path, g.centers, g.width), img)
+
+
+def test_pyramid_levels():
+    image = np.random.RandomState(0).randint(0, 2**16, size = (700, 530)).astype(np.uint16)
+    levels = raster.pyramid_levels(image, min_size = 100)
+    assert [l.shape for l in levels] == [(700, 530), (350, 265), (175, 132), (87, 66)]
+    for level, previous in zip(levels[1:], levels):
+        h, w = level.shape
+        assert np.array_equal(level, cv2.resize(previous, (w, h), interpolation = cv2.INTER_AREA))
+
+
+def test_write_pyramid(tmp_path):
+    image = np.random.RandomState(0).randint(0, 2**16, size = (700, 530)).astype(np.uint16)
+    levels = raster.pyramid_levels(image, min_size = 100)
+    raster.write_pyramid(tmp_path / 'pyramid.tif', image, tile = 128, min_size = 100)
+    with tifffile.TiffFile(str(tmp_path / 'pyramid.tif')) as tif:
+        page = tif.pages[0]
+        assert page.is_tiled and page.tilelength == page.tilewidth == 128
+        assert page.compression == tifffile.COMPRESSION.ADOBE_DEFLATE
+        assert len(page.subifds) == len(levels) - 1
+        stored = tif.series[0].levels
+        assert len(stored) == len(levels)
+        for s, level in zip(stored, levels):
+            assert np.array_equal(s.asarray(), level)
+
+
+def test_thumbnail_and_montage():
+    rng = np.random.RandomState(0)
+    images = [rng.randint(0, 255, size = (h, 400)).astype(np.uint8) for h in (300, 200, 300, 100, 250)]
+    thumbnails = [raster.thumbnail(i, 100) for i in images]
+    assert [t.shape for t in thumbnails] == [(75, 100), (50, 100), (75, 100), (25, 100), (62, 100)]
+    tiled = raster.montage(thumbnails)
+    assert tiled.shape == (2*75, 3*100) and tiled.dtype == np.uint8
+    for n, t in enumerate(thumbnails):
+        r, c = divmod(n, 3)
+        block = tiled[r*75:(r+1)*75, c*100:(c+1)*100]
+        assert np.array_equal(block[:t.shape[0]], t) and not block[t.shape[0]:].any()
+    assert not tiled[75:, 200:].any()
+    assert raster.montage(thumbnails, columns = 5).shape == (75, 500)
+    with pytest.raises(ValueError):
+        raster.montage([])
+
+
+def test_series_summary_images(series, reference, tmp_path):
+    device, paths = series
+    s = chipcollections.ChipSeries(device, 'desc', 'step')
+    s.load_files(str(paths[0].parent), 'egfp', 100)
+    s.map_from(reference)
+    s.save_summary_images(str(tmp_path), featuretype = 'button', pyramid = True, montage = True)
+    target = tmp_path / 'SummaryImages'
+    thumbnails = []
+    for c in s.chips.values():
+        image = c.summary_image('button')
+        with tifffile.TiffFile(str(target / 'Summary_{}.tif'.format(c.data_ref.stem))) as tif:
+            assert tif.pages[0].is_tiled
+            assert np.array_equal(tif.asarray(), image)
+        thumbnails.append(raster.thumbnail(image))
+    montage = tifffile.imread(str(target / 'Summary_{}_desc_Montage.tif'.format(device.dname)))
+    assert np.array_equal(montage, raster.montage(thumbnails))
+
+
+def test_contiguous_tiff_is_memory_mapped(series):
+    device, paths = series
+    g = device.geometry()
+    img = raster.read_windowed(paths[0], g.centers, g.width)
+    assert isinstance(img, np.memmap) and not img.flags.writeable
+    target = ChipImage(device, paths[0], {}, device.corners, device.pinlist, 'egfp', 100)
+    target.stamp()
+    expected = ChipImage.stampStack(skimage.io.imread(str(paths[0])), g.centers, g.width)
+    assert np.array_equal(target.stamps.data, expected)
@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+import pytest
+
+from processingpack.chip import ChipImage, render_stamps
+
+
+def annotate(data, circles, index, val):
+    """
+    Baseline stamp annotation, drawn with OpenCV.
+    """
+
+    d = cv2.copyMakeBorder(data.copy(), 1, 1, 1, 1, cv2.BORDER_CONSTANT, value = 60000)
+    cv2.putText(d, index, (2, 12), cv2.FONT_HERSHEY_PLAIN, 0.8, 60000)
+    cv2.putText(d, val, (2, len(d) - 4), cv2.FONT_HERSHEY_PLAIN, 0.7, 60000)
+    for rad, center in circles:
+        cv2.circle(d, center, rad+2, 0, thickness = 1)
+        cv2.circle(d, center, rad+1, (2**16)-1, thickness = 1)
+        cv2.circle(d, center, rad, 0, thickness = 1)
+    return d
+
+
+def stitched(data, annotations):
+    """
+    Baseline summary image: the annotated stamps, stitched in chip index order.
+    """
+
+    stamps = [annotate(d, *a) for d, a in zip(data.reshape((-1,) + data.shape[2:]), annotations)]
+    return ChipImage.stitch2D(np.array(stamps).reshape(data.shape[:2] + stamps[0].shape))
+
+
+def test_summary_image_matches_annotation(reference):
+    for stamptype in ('chamber', 'button'):
+        annotations = reference.stamps.annotations(stamptype)
+        expected = stitched(reference.stamps.data, annotations)
+        assert np.array_equal(reference.summary_image(stamptype), expected)
+
+
+@pytest.mark.parametrize('dtype', [np.uint16, np.uint8])
+def test_render_stamps_matches_annotation(dtype):
+    rng = np.random.RandomState(0)
+    data = rng.randint(0, np.iinfo(dtype).max + 1, size = (3, 2, 40, 40)).astype(dtype)
+    annotations = []
+    for n in range(6):
+        circles = [[int(rng.randint(0, 30)), (int(rng.randint(-5, 45)), int(rng.randint(-5, 45)))]
+            for _ in range(n % 3)]
+        annotations.append((circles, '{}.{} | M{}'.format(*divmod(n, 2), n), str(rng.randint(-10**6, 10**6))))
+    assert np.array_equal(render_stamps(data, annotations), stitched(data, annotations))
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+import skimage.io
+
+from processingpack import chipcollections, stampstore
+
+
+@pytest.fixture(scope = 'module')
+def mapped(series, reference):
+    device, paths = series
+    s = chipcollections.ChipSeries(device, 'desc', 'step')
+    s.load_files(str(paths[0].parent), 'egfp', 100)
+    s.map_from(reference)
+    return s
+
+
+def repo(root):
+    files = {}
+    for d, _, names in os.walk(str(root)):
+        for name in names:
+            path = os.path.join(d, name)
+            files[os.path.relpath(path, str(root))] = skimage.io.imread(path)
+    return files
+
+
+def test_store_roundtrip(mapped, tmp_path):
+    pytest.importorskip('h5py')
+    dname = mapped.device.dname
+    with stampstore.StampStore(tmp_path / 'stamps.h5') as store:
+        mapped.store_stamps(store)
+        mapped.store_stamps(store) # rewritten in place
+    with stampstore.StampStore(tmp_path / 'stamps.h5', mode = 'r') as store:
+        assert store.series() == [(dname, 'desc')]
+        assert store.identifiers(dname, 'desc') == list(mapped.chips)
+        xs, ys, ids = store.chambers(dname)
+        for x, y, mid in zip(xs, ys, ids):
+            expected = [c.stamps.data[x-1, y-1] for c in mapped.chips.values()]
+            assert np.array_equal(store.chamber(dname, 'desc', x, y), expected)
+            assert mid == mapped.device.pinlist.loc[(x, y), 'MutantID']
+        summary = store.file[dname]['series']['desc']['summary']
+        for n, c in enumerate(mapped.chips.values()):
+            columns = c.summary_columns()
+            for f in summary:
+                assert np.array_equal(summary[f][n], columns[f], equal_nan = True)
+        stamps = store.mutant('M0')
+        assert sorted(k[2] for k in stamps) == sorted((int(x), int(y)) for x, y, m in zip(xs, ys, ids) if m == 'M0')
+        for (_, _, (x, y)), v in stamps.items():
+            assert np.array_equal(v, store.chamber(dname, 'desc', x, y))
+
+
+def test_export_repo_matches_repo_dump(mapped, tmp_path):
+    pytest.importorskip('h5py')
+    with stampstore.StampStore(tmp_path / 'stamps.h5') as store:
+        mapped.store_stamps(store)
+        store.export_repo(tmp_path / 'exported')
+    mapped.repo_dump(str(tmp_path / 'dumped'), 'title')
+    exported, dumped = repo(tmp_path / 'exported'), repo(tmp_path / 'dumped')
+    assert sorted(exported) == sorted(dumped) and len(dumped) == len(mapped.chips)*12
+    for path, image in dumped.items():
+        assert np.array_equal(exported[path], image), path
+
+
+def test_missing_h5py(tmp_path, monkeypatch):
+    monkeypatch.setattr(stampstore, 'h5py', None)
+    with pytest.raises(ImportError, match = 'h5py'):
+        stampstore.StampStore(tmp_path / 'stamps.h5')
@@ -0,0 +1,51 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+import tifffile
+
+from processingpack import chipcollections
+
+
+def load(series):
+    device, paths = series
+    s = chipcollections.ChipSeries(device, 'desc', 'step')
+    s.load_files(str(paths[0].parent), 'egfp', 100)
+    return s
+
+
+@pytest.fixture(scope = 'module')
+def mapped(series, reference):
+    s = load(series)
+    s.map_from(reference)
+    return s
+
+
+@pytest.fixture(params = ['chip', 'featuremap'])
+def mapping_reference(request, reference):
+    return reference if request.param == 'chip' else reference.feature_map()
+
+
+def test_stream_matches_map_from(series, mapped, mapping_reference):
+    s = load(series)
+    for identifier, summary in s.stream(mapping_reference):
+        expected = mapped.chips[identifier].summarize()
+        expected[mapped.series_indexer] = identifier
+        pd.testing.assert_frame_equal(summary, expected)
+        assert all(c.stamps is None for c in s.chips.values()) # no image is held
+    pd.testing.assert_frame_equal(s.summarize_stream(mapping_reference), mapped.summarize())
+
+
+def test_stream_summary_images(series, mapped, reference, tmp_path):
+    s = load(series)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for identifier, summary in s.stream(reference, summary_images = True, outPath = str(tmp_path)):
+            assert all(c.stamps is None for c in s.chips.values())
+    target = os.path.join(str(tmp_path), 'SummaryImages')
+    assert len(os.listdir(target)) == len(s.chips)
+    for c in mapped.chips.values():
+        image = tifffile.imread(os.path.join(target, 'Summary_{}.tif'.format(c.data_ref.stem)))
+        assert np.array_equal(image, c.summary_image('button'))
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from processingpack.chip import Chamber, Button, StampGrid, summary_frame, concat_summaries
+
+
+SLICES = ['xslice_start', 'xslice_stop', 'yslice_start', 'yslice_stop']
+
+
+def test_summary_schema(reference):
+    columns = reference.summary_columns()
+    assert list(columns) == ['x', 'y'] + Chamber.features + Button.features + SLICES + ['id']
+    for k, v in columns.items():
+        expected = {'x': np.int32, 'y': np.int32, 'id': object}.get(k, np.int32 if k in SLICES else np.float64)
+        assert v.dtype == expected, k
+        assert len(v) == np.prod(reference.stamps.shape)
+    df = reference.summarize()
+    assert df.index.names == ['x', 'y']
+    assert list(df.index) == sorted(df.index)
+
+
+def test_summary_rows_match_stamps(reference):
+    df = reference.summarize()
+    for s in reference.stamps.flatten():
+        row = df.loc[(s.x+1, s.y+1)]
+        for k, v in s.summarize().items():
+            assert row[k] == v or (row[k] != row[k] and v != v), k
+
+
+def test_undefined_features_are_omitted(reference):
+    g = StampGrid(None, reference.geometry)
+    assert list(g.summary_columns()) == ['x', 'y'] + SLICES + ['id']
+    g.copy_features(reference.stamps, 'chamber')
+    assert list(g.summary_columns()) == ['x', 'y'] + Chamber.features + SLICES + ['id']
+
+
+def test_concat_summaries_matches_sorted_concat(reference):
+    chambers = StampGrid(None, reference.geometry)
+    chambers.copy_features(reference.stamps, 'chamber')
+    chambers.chamber_summary = reference.stamps.chamber_summary
+    summaries = [reference.summary_columns(), chambers.summary_columns(), reference.summary_columns()]
+    identifiers = [5, 1, 3]
+    frames = []
+    for columns, i in zip(summaries, identifiers):
+        df = summary_frame(columns)
+        df['step'] = i
+        frames.append(df)
+    expected = pd.concat(frames, sort = False).sort_index(kind = 'mergesort')
+    result = summary_frame(concat_summaries(summaries, identifiers, 'step'))
+    pd.testing.assert_frame_equal(result, expected[list(result.columns)])
+    assert result[Button.features].iloc[1::3].isna().all().all() # the chamber-only image
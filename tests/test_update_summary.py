@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processingpack import chipcollections, featuremap
+from processingpack.chip import StampGrid
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def images(series, tmp_path):
+    device, paths = series
+    root = tmp_path / 'images'
+    root.mkdir()
+    for path in paths:
+        shutil.copy(str(path), str(root / path.name))
+    return device, root
+
+
+def load(images):
+    device, root = images
+    s = chipcollections.ChipSeries(device, 'desc', 'step')
+    s.load_files(str(root), 'egfp', 100)
+    return s
+
+
+def streamed(s, monkeypatch):
+    """
+    Records the identifiers of the images streamed by the series.
+    """
+
+    calls = []
+    stream = chipcollections.ChipSeries._stream_columns
+
+    def record(self, reference, *args, chips = None, **kwargs):
+        calls.append(sorted(i for i, _ in (chips if chips is not None else self.chips.items())))
+        return stream(self, reference, *args, chips = chips, **kwargs)
+
+    monkeypatch.setattr(chipcollections.ChipSeries, '_stream_columns', record)
+    return calls
+
+
+def expected(s, reference):
+    df = s.summarize_stream(reference).reset_index()
+    return df.sort_values(['x', 'y', 'step'], kind = 'mergesort').set_index(['x', 'y'])
+
+
+def test_update_summary_is_incremental(images, reference, tmp_path, monkeypatch):
+    s = load(images)
+    full = expected(s, reference)
+    calls = streamed(s, monkeypatch)
+    pd.testing.assert_frame_equal(s.update_summary(reference, str(tmp_path)), full)
+    assert calls == [[0, 1, 2]]
+    pd.testing.assert_frame_equal(s.update_summary(reference.feature_map(), str(tmp_path)), full)
+    assert calls == [[0, 1, 2]] # same features: nothing to update
+
+    changed = s.chips[1].data_ref
+    stat = os.stat(str(changed))
+    os.utime(str(changed), ns = (stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    pd.testing.assert_frame_equal(s.update_summary(reference, str(tmp_path)), full)
+    assert calls[-1] == [1]
+
+    del s.chips[2]
+    result = s.update_summary(reference, str(tmp_path))
+    assert calls[-1] == [1] # dropped, not streamed
+    pd.testing.assert_frame_equal(result, full[full['step'] != 2])
+
+
+def test_refound_reference_updates_all(images, reference, tmp_path, monkeypatch):
+    s = load(images)
+    calls = streamed(s, monkeypatch)
+    fmap = reference.feature_map()
+    s.update_summary(fmap, str(tmp_path))
+    grid = StampGrid(None, fmap.geometry)
+    grid.copy_features(fmap.stamps)
+    grid.button_centers += np.array([1, 0], dtype = grid.button_centers.dtype)
+    moved = featuremap.FeatureMap(fmap.geometry, grid, fmap.attrs) # same raster, re-found features
+    assert chipcollections._reference_key(moved) != chipcollections._reference_key(fmap)
+    assert chipcollections._reference_key(fmap) == chipcollections._reference_key(reference)
+    result = s.update_summary(moved, str(tmp_path))
+    assert calls == [[0, 1, 2], [0, 1, 2]]
+    pd.testing.assert_frame_equal(result, expected(s, moved))
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from processingpack import writer
+from processingpack.writer import BackgroundWriter
+
+
+def fail(message):
+    raise OSError(message)
+
+
+def test_writes_complete_on_flush_and_close():
+    written = []
+    w = BackgroundWriter(maxsize = 2, workers = 3)
+    for i in range(20):
+        w.submit(written.append, i)
+    w.flush()
+    assert sorted(written) == list(range(20))
+    w.submit(written.append, 20)
+    w.close()
+    assert sorted(written) == list(range(21))
+    assert w not in writer._open
+
+
+def test_errors_raised_once():
+    written = []
+    w = BackgroundWriter(workers = 1)
+    w.submit(fail, 'first')
+    w.submit(fail, 'second')
+    with pytest.raises(OSError, match = 'first'):
+        w.flush()
+    w.flush() # both errors reported
+    w.submit(written.append, 1) # still usable
+    w.submit(fail, 'third')
+    w.queue.join()
+    with pytest.raises(OSError, match = 'third'):
+        w.submit(written.append, 2) # not queued
+    w.close()
+    assert written == [1]
+
+
+def test_close_raises_and_stops():
+    w = BackgroundWriter()
+    w.submit(fail, 'write')
+    with pytest.raises(OSError):
+        w.close()
+    w.close()
+    assert not any(t.is_alive() for t in w.threads)
+    with pytest.raises(ValueError):
+        w.submit(print)
+
+
+def test_backpressure():
+    release = threading.Event()
+    w = BackgroundWriter(maxsize = 1, workers = 1)
+    w.submit(release.wait) # running
+    w.submit(release.wait) # queued
+    submitted = threading.Event()
+    t = threading.Thread(target = lambda: (w.submit(print), submitted.set()))
+    t.start()
+    assert not submitted.wait(0.2) # blocked on the full queue
+    release.set()
+    t.join(5)
+    assert submitted.is_set()
+    w.close()
+
+
+def test_context_manager():
+    written = []
+    with BackgroundWriter() as w:
+        w.submit(written.append, 1)
+    assert written == [1] and w.closed
+    with pytest.raises(KeyError): # the write error does not mask the exception
+        with BackgroundWriter() as w:
+            w.submit(fail, 'write')
+            w.queue.join()
+            raise KeyError('body')
+    assert w.closed
+
+
+def test_open_writers_closed_at_exit():
+    release = threading.Event()
+    written = []
+    w = BackgroundWriter()
+    w.submit(lambda: (release.wait(), written.append(1)))
+    w2 = BackgroundWriter()
+    w2.submit(fail, 'write')
+    release.set()
+    writer._close_open() # registered with atexit
+    assert written == [1] and w.closed and w2.closed
+    assert w not in writer._open and w2 not in writer._open